@@ -1,20 +1,9 @@
 import pypdf
-import re
 import os
+from utils import page_index
 
 pdf_path = "z_extra/cat_gr_2526.pdf"
 
-def get_page_offset(page_text):
-    """
-    Attempts to find the printed page number in the text.
-    Returns the printed page number found.
-    """
-    # Pattern for "131 | Page" or "Page 131"
-    match = re.search(r'(\d+)\s*\|\s*Page', page_text)
-    if match:
-        return int(match.group(1))
-    return None
-
 def extract_smart(target_printed_page, num_pages_to_extract=3):
     print(f"--- Smart Extraction for Target Printed Page: {target_printed_page} ---")
     
@@ -35,7 +24,7 @@ def extract_smart(target_printed_page, num_pages_to_extract=3):
             return
 
         naive_text = reader.pages[naive_idx].extract_text()
-        found_printed_page = get_page_offset(naive_text)
+        found_printed_page = page_index.find_printed_page(naive_text)
         
         current_idx = naive_idx
         
@@ -62,7 +51,7 @@ def extract_smart(target_printed_page, num_pages_to_extract=3):
                 page_text = reader.pages[page_idx].extract_text()
                 
                 # Try to find page number on this page for verification
-                p_num = get_page_offset(page_text)
+                p_num = page_index.find_printed_page(page_text)
                 header = f"PDF Page {page_idx + 1} | Printed Page {p_num if p_num else 'Unknown'}"
                 
                 print(f"\n--- {header} ---\n")
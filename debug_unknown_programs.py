@@ -1,15 +1,9 @@
 import pypdf
-import re
 import os
+from utils import page_index
 
 pdf_path = "z_extra/cat_gr_2526.pdf"
 
-def get_page_offset(page_text):
-    match = re.search(r'(\d+)\s*\|\s*Page', page_text)
-    if match:
-        return int(match.group(1))
-    return None
-
 def extract_program_text(target_printed_page, program_name):
     print(f"\n--- Debugging: {program_name} (Page {target_printed_page}) ---")
     
@@ -29,7 +23,7 @@ def extract_program_text(target_printed_page, program_name):
             return
 
         naive_text = reader.pages[naive_idx].extract_text()
-        found_printed_page = get_page_offset(naive_text)
+        found_printed_page = page_index.find_printed_page(naive_text)
         
         current_idx = naive_idx
         
@@ -53,7 +47,7 @@ def extract_program_text(target_printed_page, program_name):
             page_idx = current_idx + i
             if page_idx < total_pages:
                 page_text = reader.pages[page_idx].extract_text()
-                p_num = get_page_offset(page_text)
+                p_num = page_index.find_printed_page(page_text)
                 print(f"\n--- PDF Page {page_idx + 1} | Printed Page {p_num if p_num else 'Unknown'} ---\n")
                 print(page_text)
                 print("\n" + "-"*50)
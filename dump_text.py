@@ -1,7 +1,7 @@
 import os
 from dotenv import load_dotenv
 from utils import llm_parser
-import re
+from utils import page_index
 
 # Load environment variables
 load_dotenv()
@@ -25,6 +25,9 @@ def dump_program_text():
         ug_pages = llm_parser.extract_all_pages(ug_pdf)
         gr_pages = llm_parser.extract_all_pages(gr_pdf)
         print(f"Extracted UG: {len(ug_pages)} pages, GR: {len(gr_pages)} pages.")
+        ug_map = page_index.build_page_map(ug_pages)
+        gr_map = page_index.build_page_map(gr_pages)
+        print(f"Pages without a printed number - UG: {len(ug_map['missing'])}, GR: {len(gr_map['missing'])}")
     except Exception as e:
         print(f"Error extracting PDF: {e}")
         return
@@ -39,30 +42,19 @@ def dump_program_text():
             cat_type = prog['type']
             
             pages_text = ug_pages if cat_type == 'ug' else gr_pages
+            page_map = ug_map if cat_type == 'ug' else gr_map
             pdf_name = "UG Catalog" if cat_type == 'ug' else "GR Catalog"
             
             f.write(f"PROGRAM: {program_name} ({pdf_name}, Target Page: {page_num})\n")
             f.write("-" * 40 + "\n")
             
             # Offset Logic
-            naive_idx = max(0, page_num - 1)
-            current_idx = naive_idx
-            
-            if naive_idx < len(pages_text):
-                page_content = pages_text[naive_idx]
-                
-                # Try to find printed page number
-                found_printed_page = None
-                match = re.search(r'(\d+)\s*\|\s*Page', page_content)
-                if match:
-                    found_printed_page = int(match.group(1))
-                
-                if found_printed_page is not None:
-                    shift = page_num - found_printed_page
-                    current_idx = naive_idx + shift
-                    f.write(f"Offset Calculation: Naive={naive_idx}, Found={found_printed_page}, Shift={shift}, NewIndex={current_idx}\n")
-                else:
-                    f.write(f"Offset Calculation: No printed page number found. Using Naive={naive_idx}\n")
+            current_idx = page_index.resolve_page_index(page_map, page_num)
+            if current_idx is not None:
+                f.write(f"Page Map Lookup: Printed={page_num}, Index={current_idx}\n")
+            elif page_num - 1 < len(pages_text):
+                current_idx = page_index.probe_page_index(pages_text, page_num)
+                f.write(f"Page Map Lookup: Printed page {page_num} not in map. Probed Index={current_idx}\n")
             else:
                 f.write(f"Offset Calculation: Page {page_num} is out of bounds (Total {len(pages_text)})\n")
                 current_idx = 0 # Fallback
@@ -4,8 +4,14 @@ import os
 from dotenv import load_dotenv
 import google.generativeai as genai
 from pypdf import PdfReader
-import io
+import time
 from utils import llm_parser
+from utils import catalog_report
+from utils import excel_export
+from utils import parallel_extract
+from utils import llm_cache
+from utils import llm_clients
+from utils import llm_telemetry
 
 # Load environment variables
 load_dotenv()
@@ -26,29 +32,51 @@ Generates a combined Table of Contents (ToC) for both the undergraduate and grad
 # Sidebar Model Selection
 model_choice = st.sidebar.radio(
     "Select Model",
-    options=["Gemini 1.5 Flash", "Gemini 2.5 Pro", "Gemini 3 Pro", "ChatGPT 5 mini"],
+    options=catalog_report.MODEL_CHOICES,
     index=0
 )
 
+# Sidebar ToC Parser
+toc_parser = st.sidebar.radio(
+    "ToC Parser",
+    options=["Rules (LLM for ambiguous lines)", "LLM"],
+    index=0,
+    help="Rules parse dotted-leader ToC lines directly and only send entries they cannot classify to the model."
+)
+
+toc_chunk_pages = st.sidebar.number_input(
+    "ToC Pages per Request",
+    min_value=1,
+    value=llm_parser.TOC_CHUNK_PAGES,
+    help="LLM parser only. The ToC is split into chunks of this many pages (plus one overlapping page) that are parsed in parallel.",
+    disabled=toc_parser != "LLM"
+)
+
+# Sidebar PDF Extraction Workers (1 = serial)
+extract_workers = st.sidebar.number_input(
+    "PDF Extraction Workers",
+    min_value=1,
+    max_value=os.cpu_count() or 1,
+    value=min(parallel_extract.get_default_workers(), os.cpu_count() or 1),
+    help="Number of processes used to extract PDF text. 1 extracts pages serially."
+)
+
+# Sidebar LLM Response Cache
+bypass_llm_cache = st.sidebar.checkbox(
+    "Bypass LLM Cache",
+    value=False,
+    help="Always send prompts to the model, even if an identical request was answered before."
+)
+
 # Academic Year Selector
 academic_year = st.selectbox(
     "Academic Year",
-    options=["2024-2025", "2025-2026"],
+    options=list(catalog_report.TOC_PAGE_RANGES),
     index=1  # Default to 2025-2026
 )
 
 # Default Page Numbers based on Academic Year
-if academic_year == "2024-2025":
-    ug_default_min = 141
-    ug_default_max = 1477
-    gr_default_min = 132
-    gr_default_max = 981
-else:
-    # Defaults for 2025-2026
-    ug_default_min = 155
-    ug_default_max = 1475
-    gr_default_min = 150
-    gr_default_max = 1038
+ug_default_min, ug_default_max, gr_default_min, gr_default_max = catalog_report.TOC_PAGE_RANGES[academic_year]
 
 col1, col2 = st.columns(2)
 
@@ -70,58 +98,114 @@ if st.button("Generate Combined ToC"):
         st.error("Please upload both Undergraduate and Graduate ToC files.")
     else:
         with st.spinner("Working..."):
+            # Programs parsed so far, kept if parsing fails partway
+            latest = [([], [])]
             try:
-                # 1. Extract Text
-                ug_text = llm_parser.extract_text_from_pdf(ug_file)
-                gr_text = llm_parser.extract_text_from_pdf(gr_file)
-
-                # 2. Parse with Gemini
-                ug_catalog_name = f"USF Undergraduate {academic_year}"
-                gr_catalog_name = f"USF Graduate {academic_year}"
-
-                ug_programs = llm_parser.parse_catalog_toc(ug_text, ug_catalog_name, academic_year, model_choice)
-                gr_programs = llm_parser.parse_catalog_toc(gr_text, gr_catalog_name, academic_year, model_choice)
-
-                st.write("Raw UG programs from LLM:", len(ug_programs))
-                st.write("Raw GR programs from LLM:", len(gr_programs))
-
-                # 3. Filter
-                ug_filtered_range = llm_parser.filter_programs(ug_programs, ug_min_page, ug_max_page)
-                gr_filtered_range = llm_parser.filter_programs(gr_programs, gr_min_page, gr_max_page)
-
-                st.write("UG programs after filtering:", len(ug_filtered_range))
-                st.write("GR programs after filtering:", len(gr_filtered_range))
-
-                # Validate Credentials
-                ug_final = llm_parser.validate_catalog_type(ug_filtered_range, 'ug')
-                gr_final = llm_parser.validate_catalog_type(gr_filtered_range, 'gr')
-
-                st.write("UG programs after validation:", len(ug_final))
-                st.write("GR programs after validation:", len(gr_final))
+                # 1. Extract Text (page by page, so the LLM parser can chunk it)
+                ug_pages = llm_parser.extract_all_pages(ug_file, workers=extract_workers)
+                gr_pages = llm_parser.extract_all_pages(gr_file, workers=extract_workers)
+
+                # 2. Parse (rules, or the full LLM prompt), UG and GR concurrently,
+                # then 3. filter to the page ranges and validate credentials.
+                # Rows are shown as they arrive.
+                live_status = st.empty()
+                live_table = st.empty()
+                last_render = [0.0]
+
+                def render_live(parsed):
+                    rows = parsed[0] + parsed[1]
+                    live_status.write(f"Parsed {len(rows)} entries so far...")
+                    if rows:
+                        live_df = pd.DataFrame(rows)[['original_text', 'page_number', 'catalog_name']]
+                        live_df.columns = ['Program', 'Page Number', 'Catalog Name']
+                        live_table.dataframe(live_df)
+
+                def on_program(parsed):
+                    latest[0] = parsed
+                    if time.monotonic() - last_render[0] > 0.5:
+                        render_live(parsed)
+                        last_render[0] = time.monotonic()
+
+                df_final, counts = catalog_report.generate_toc(
+                    ug_pages, gr_pages, academic_year, model_choice,
+                    (ug_min_page, ug_max_page), (gr_min_page, gr_max_page),
+                    parser="llm" if toc_parser == "LLM" else "rules",
+                    use_cache=not bypass_llm_cache, chunk_pages=toc_chunk_pages, on_program=on_program
+                )
+                live_status.empty()
+                live_table.empty()
+                st.session_state.llm_run_id = counts["run_id"]
+
+                st.write("Raw UG programs:", counts["raw"][0])
+                st.write("Raw GR programs:", counts["raw"][1])
+                st.write("UG programs after filtering:", counts["filtered"][0])
+                st.write("GR programs after filtering:", counts["filtered"][1])
+                st.write("UG programs after validation:", counts["validated"][0])
+                st.write("GR programs after validation:", counts["validated"][1])
+                if counts["partial"]:
+                    st.warning(f"Some ToC chunks broke off partway ({counts['failed_chunks'][0]} UG, {counts['failed_chunks'][1]} GR), "
+                               "so the table below is partial. Generate again to retry them.")
 
                 # 4. Aggregate
-                all_programs = ug_final + gr_final
-                
-                if not all_programs:
+                if df_final.empty:
                     st.warning("No programs found matching the criteria.")
                     st.session_state.toc_data = None # Clear if failed
                 else:
-                    # 5. Create DataFrame
-                    df = pd.DataFrame(all_programs)
-                    
-                    # Use the 'original_text' field which preserves the exact formatting from the catalog
-                    # (e.g. "Computer Engineering B.S.C.P." vs "Artificial Intelligence, M.S.A.I.")
-                    df['Program'] = df['original_text']
-                    
-                    # Select and rename columns to match user request: Col1 (Program), Col2 (Page), Col3 (Catalog)
-                    df_final = df[['Program', 'page_number', 'catalog_name']]
-                    df_final.columns = ['Program', 'Page Number', 'Catalog Name']
-                    
                     # Save to Session State
                     st.session_state.toc_data = df_final
 
             except Exception as e:
                 st.error(f"An error occurred: {e}")
+                # Keep the rows that had already arrived
+                if latest[0][0] or latest[0][1]:
+                    df_partial, _ = catalog_report.finalize_toc(latest[0], (ug_min_page, ug_max_page), (gr_min_page, gr_max_page))
+                    if not df_partial.empty:
+                        st.session_state.toc_data = df_partial
+                        st.warning(f"Kept the {len(df_partial)} programs parsed before the error. The ToC is partial.")
+
+# LLM Cache Status
+llm_cache_stats = llm_cache.get_stats()
+with st.sidebar.expander("LLM Cache"):
+    st.write(f"Hits: {llm_cache_stats['hits']} | Misses: {llm_cache_stats['misses']}")
+    st.write(f"Entries: {llm_cache_stats['entries']} ({llm_cache_stats['size_mb']} MB)")
+    if st.button("Clear LLM Cache", key="clear_llm_cache"):
+        llm_cache.clear()
+        llm_cache.reset_stats()
+        st.rerun()
+
+client_stats = llm_clients.get_stats()
+with st.sidebar.expander("LLM Clients"):
+    st.write(f"Clients built: {client_stats['builds']} | Shared: {client_stats['registry_hits']} ({client_stats['registry_hit_rate']:.0%})")
+    if client_stats["http_requests"]:
+        st.write(f"OpenAI connections opened: {client_stats['connections_opened']} | Reused: {client_stats['connections_reused']} ({client_stats['connection_reuse_rate']:.0%})")
+    for client_name, count in client_stats["clients"].items():
+        st.write(f"{client_name}: {count} requests")
+
+with st.sidebar.expander("LLM Telemetry"):
+    # The last run started from this session, unless every run is asked for
+    telemetry_all_runs = st.checkbox("All runs in this process", value=False, key="telemetry_all_runs")
+    telemetry_run = None if telemetry_all_runs else st.session_state.get("llm_run_id")
+    if telemetry_run is None and not telemetry_all_runs:
+        st.write("No run in this session yet.")
+    else:
+        telemetry_summary = llm_telemetry.summarize(telemetry_run)
+        if telemetry_summary.empty:
+            st.write("No LLM calls yet.")
+        else:
+            st.write(f"Calls: {int(telemetry_summary['calls'].sum())} | "
+                     f"Tokens: {int(telemetry_summary['prompt_tokens'].sum() + telemetry_summary['completion_tokens'].sum()):,} | "
+                     f"Est. cost: ${telemetry_summary['cost_usd'].sum():.2f}")
+            st.dataframe(telemetry_summary, hide_index=True)
+            st.download_button(
+                label="Download Call Log (CSV)",
+                data=llm_telemetry.to_csv(telemetry_run),
+                file_name="llm_calls.csv",
+                mime="text/csv",
+                key="download_llm_telemetry"
+            )
+            if st.button("Reset Telemetry", key="reset_llm_telemetry"):
+                llm_telemetry.reset()
+                st.rerun()
 
 # Display Results from Session State
 if st.session_state.toc_data is not None:
@@ -129,20 +213,16 @@ if st.session_state.toc_data is not None:
     st.dataframe(st.session_state.toc_data)
 
     # 6. Download Button
-    output = io.BytesIO()
-    with pd.ExcelWriter(output, engine='openpyxl') as writer:
-        st.session_state.toc_data.to_excel(writer, index=False, sheet_name='ToC')
-    
     # Format filename: toc_2526.xlsx
-    y1 = academic_year.split('-')[0][-2:]
-    y2 = academic_year.split('-')[1][-2:]
-    filename = f"toc_{y1}{y2}.xlsx"
+    y1y2 = catalog_report.year_suffix(academic_year)
+    filename = f"toc_{y1y2}.xlsx"
 
     st.download_button(
         label="Download Excel File",
-        data=output.getvalue(),
+        data=excel_export.download_data(st.session_state.toc_data, 'ToC'),
         file_name=filename,
-        mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+        mime=excel_export.XLSX_MIME,
+        on_click="ignore"
     )
 
     # ----------------------------------------
@@ -240,15 +320,12 @@ if st.session_state.toc_data is not None:
 
     with b_col2:
         if st.session_state.missing_programs_list:
-            output_missing = io.BytesIO()
-            with pd.ExcelWriter(output_missing, engine='openpyxl') as writer:
-                pd.DataFrame(st.session_state.missing_programs_list).to_excel(writer, index=False, sheet_name='ToC')
-            
             st.download_button(
                 label="Download Supplemental List",
-                data=output_missing.getvalue(),
-                file_name=f"toc_supplemental_{y1}{y2}.xlsx",
-                mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+                data=excel_export.download_data(pd.DataFrame(st.session_state.missing_programs_list), 'ToC'),
+                file_name=f"toc_supplemental_{y1y2}.xlsx",
+                mime=excel_export.XLSX_MIME,
+                on_click="ignore",
                 use_container_width=True
             )
         else:
@@ -327,15 +404,12 @@ if st.session_state.toc_data is not None:
                 st.success(f"Merged successfully! Total programs: {len(df_merged)}")
                 
                 # Download Button for Merged File
-                output_merged = io.BytesIO()
-                with pd.ExcelWriter(output_merged, engine='openpyxl') as writer:
-                    df_merged.to_excel(writer, index=False, sheet_name='ToC')
-                
                 st.download_button(
                     label="Download Merged ToC",
-                    data=output_merged.getvalue(),
-                    file_name=f"toc_{y1}{y2}_merged.xlsx",
-                    mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+                    data=excel_export.download_data(df_merged, 'ToC'),
+                    file_name=f"toc_{y1y2}_merged.xlsx",
+                    mime=excel_export.XLSX_MIME,
+                    on_click="ignore"
                 )
                 
             except Exception as e:
@@ -368,47 +442,11 @@ if st.session_state.toc_data is not None:
                 df_truth = pd.read_excel(truth_file)
                 df_test = pd.read_excel(test_file)
 
-                # Normalize column names: Allow "Program Name" as alias for "Program"
-                if 'Program Name' in df_truth.columns:
-                    df_truth = df_truth.rename(columns={'Program Name': 'Program'})
-                if 'Program Name' in df_test.columns:
-                    df_test = df_test.rename(columns={'Program Name': 'Program'})
-
-                required_cols = ['Program', 'Page Number', 'Catalog Name']
-                
-                # Check if columns exist
-                if not all(col in df_truth.columns for col in required_cols):
-                    st.error(f"Truth file is missing one of the required columns: {required_cols}")
-                elif not all(col in df_test.columns for col in required_cols):
-                    st.error(f"Test file is missing one of the required columns: {required_cols}")
-                else:
-                    # Select only relevant columns for comparison
-                    df_truth = df_truth[required_cols]
-                    df_test = df_test[required_cols]
-
-                    # Matches
-                    matches = pd.merge(df_truth, df_test, on=required_cols, how='inner')
-                    num_matches = len(matches)
-
-                    # In Truth but NOT in Test
-                    merged_truth = pd.merge(df_truth, df_test, on=required_cols, how='left', indicator=True)
-                    in_truth_not_test = merged_truth[merged_truth['_merge'] == 'left_only'].drop(columns=['_merge'])
-                    num_truth_not_test = len(in_truth_not_test)
-
-                    # In Test but NOT in Truth
-                    merged_test = pd.merge(df_truth, df_test, on=required_cols, how='right', indicator=True)
-                    in_test_not_truth = merged_test[merged_test['_merge'] == 'right_only'].drop(columns=['_merge'])
-                    num_test_not_truth = len(in_test_not_truth)
-                    
-                    # Save to Session State
-                    st.session_state.toc_truth_results = {
-                        "num_matches": num_matches,
-                        "num_truth_not_test": num_truth_not_test,
-                        "num_test_not_truth": num_test_not_truth,
-                        "in_truth_not_test": in_truth_not_test,
-                        "in_test_not_truth": in_test_not_truth
-                    }
+                # Pairs programs on Program and Catalog Name, then compares Page Number
+                st.session_state.toc_truth_results = catalog_report.evaluate_toc(df_truth, df_test)
 
+            except ValueError as e:
+                st.error(str(e))
             except Exception as e:
                 st.error(f"An error occurred during comparison: {e}")
 
@@ -419,57 +457,68 @@ if st.session_state.toc_data is not None:
         st.divider()
         st.subheader("Comparison Results")
         
-        col_res1, col_res2, col_res3 = st.columns(3)
-        col_res1.metric("Matches", results['num_matches'])
-        col_res2.metric("In Truth Only (Missing)", results['num_truth_not_test'])
-        col_res3.metric("In Test Only (Extra)", results['num_test_not_truth'])
-        
+        col_res1, col_res2, col_res3, col_res4 = st.columns(4)
+        col_res1.metric("Matches", results['matches'])
+        col_res2.metric("Wrong Page Number", results['paired'] - results['matches'])
+        col_res3.metric("In Truth Only (Missing)", len(results['in_truth_not_test']))
+        col_res4.metric("In Test Only (Extra)", len(results['in_test_not_truth']))
+        st.write(f"Precision: {results['precision']:.1%} | Recall: {results['recall']:.1%} | "
+                 f"Programs found: {results['key_recall']:.1%}")
+
         # Download Buttons for Discrepancies
         st.subheader("Download Discrepancies")
-        d_col1, d_col2 = st.columns(2)
-        
+        d_col1, d_col2, d_col3 = st.columns(3)
+
         with d_col1:
-            if results['num_truth_not_test'] > 0:
-                df_missing_truth = results['in_truth_not_test']
-                output_missing_truth = io.BytesIO()
-                with pd.ExcelWriter(output_missing_truth, engine='openpyxl') as writer:
-                    df_missing_truth.to_excel(writer, index=False, sheet_name='Missing')
-                
+            if len(results['in_truth_not_test']) > 0:
                 st.download_button(
                     label="Download Missing Programs (In Truth Only)",
-                    data=output_missing_truth.getvalue(),
+                    data=excel_export.download_data(results['in_truth_not_test'], 'Missing'),
                     file_name="missing_in_test.xlsx",
-                    mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+                    mime=excel_export.XLSX_MIME,
+                    on_click="ignore",
                     help="Download programs found in Truth file but missing from Test file."
                 )
             else:
                 st.info("No missing programs found.")
 
         with d_col2:
-            if results['num_test_not_truth'] > 0:
-                df_extra_test = results['in_test_not_truth']
-                output_extra_test = io.BytesIO()
-                with pd.ExcelWriter(output_extra_test, engine='openpyxl') as writer:
-                    df_extra_test.to_excel(writer, index=False, sheet_name='Extra')
-                
+            if len(results['in_test_not_truth']) > 0:
                 st.download_button(
                     label="Download Extra Programs (In Test Only)",
-                    data=output_extra_test.getvalue(),
+                    data=excel_export.download_data(results['in_test_not_truth'], 'Extra'),
                     file_name="extra_in_test.xlsx",
-                    mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+                    mime=excel_export.XLSX_MIME,
+                    on_click="ignore",
                     help="Download programs found in Test file but not in Truth file."
                 )
             else:
                 st.info("No extra programs found.")
 
+        with d_col3:
+            if len(results['mismatches']) > 0:
+                st.download_button(
+                    label="Download Wrong Page Numbers",
+                    data=excel_export.download_data(results['mismatches'], 'Mismatches'),
+                    file_name="mismatches_in_test.xlsx",
+                    mime=excel_export.XLSX_MIME,
+                    on_click="ignore",
+                    help="Download programs found in both files whose Page Number differs."
+                )
+            else:
+                st.info("No wrong page numbers found.")
+
         # Detailed Tables
         with st.expander("View Details"):
             st.write("In Truth but NOT in Test (Missing):")
             st.dataframe(results['in_truth_not_test'])
-            
+
             st.write("In Test but NOT in Truth (Extra):")
             st.dataframe(results['in_test_not_truth'])
-            
+
+            st.write("In both, with a different Page Number:")
+            st.dataframe(results['mismatches'])
+
         if st.button("Reset Comparison", key="reset_truth_btn_toc"):
             st.session_state.toc_truth_results = None
             st.rerun()
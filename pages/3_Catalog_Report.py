@@ -3,8 +3,16 @@ import pandas as pd
 import os
 from dotenv import load_dotenv
 import google.generativeai as genai
-import io
 from utils import llm_parser
+from utils import page_cache
+from utils import parallel_extract
+from utils import llm_cache
+from utils import llm_clients
+from utils import llm_telemetry
+from utils import llm_dispatch
+from utils import fingerprint_store
+from utils import catalog_report
+from utils import excel_export
 
 # Load environment variables
 load_dotenv()
@@ -29,10 +37,88 @@ Uses the ToC generated in the last step to find key program data. This is is a n
 # Sidebar Model Selection
 model_choice = st.sidebar.radio(
     "Select Model",
-    options=["Gemini 1.5 Flash", "Gemini 2.5 Pro", "Gemini 3 Pro", "ChatGPT 5 mini"],
+    options=catalog_report.MODEL_CHOICES,
     index=0
 )
 
+# Sidebar PDF Extraction Workers (1 = serial)
+extract_workers = st.sidebar.number_input(
+    "PDF Extraction Workers",
+    min_value=1,
+    max_value=os.cpu_count() or 1,
+    value=min(parallel_extract.get_default_workers(), os.cpu_count() or 1),
+    help="Number of processes used to extract PDF text. 1 extracts pages serially."
+)
+
+# Sidebar Concurrency and Rate Limits (shared by all sessions using the same API key)
+provider, api_model_name = llm_parser.resolve_model(model_choice)
+default_rpm, default_tpm = llm_dispatch.get_limits(provider, api_model_name)
+max_in_flight = st.sidebar.number_input("Max In-Flight Requests", min_value=1, max_value=256, value=llm_dispatch.DEFAULT_MAX_IN_FLIGHT)
+rpm_limit = st.sidebar.number_input("Requests per Minute", min_value=1, value=default_rpm, key=f"rpm_{api_model_name}")
+tpm_limit = st.sidebar.number_input("Tokens per Minute", min_value=1000, value=default_tpm, step=1000, key=f"tpm_{api_model_name}")
+if (rpm_limit, tpm_limit) != (default_rpm, default_tpm):
+    llm_dispatch.configure_limits(provider, api_model_name, rpm_limit, tpm_limit)
+# Sidebar LLM Response Cache
+bypass_llm_cache = st.sidebar.checkbox(
+    "Bypass LLM Cache",
+    value=False,
+    help="Always send prompts to the model, even if an identical request was answered before."
+)
+
+# Lazy extraction only parses the pages the ToC points at
+lazy_extraction = st.sidebar.checkbox(
+    "Lazy Page Extraction",
+    value=True,
+    help="Extract catalog pages on demand instead of pre-loading every page."
+)
+
+# Section index sends each program's own text to the LLM exactly once
+use_section_index = st.sidebar.checkbox(
+    "Use Program Section Index",
+    value=True,
+    help="Split the catalog at program headings instead of growing a 1-4 page window."
+)
+
+# Batching packs several program sections into one JSON-mode request
+batch_programs = st.sidebar.checkbox(
+    "Batch Programs",
+    value=False,
+    help="Send several program sections per request (uses the section index). Programs missing from a batch response are re-sent individually."
+)
+batch_token_budget = llm_parser.get_batch_token_budget()
+if batch_programs:
+    batch_token_budget = st.sidebar.number_input("Batch Token Budget", min_value=1000, value=batch_token_budget, step=1000)
+
+# Programs that state an explicit credit hour total skip the LLM
+credit_hours_fast_path = st.sidebar.checkbox(
+    "Credit Hours Fast Path",
+    value=True,
+    help="Read explicit totals such as \"TOTAL DEGREE HOURS: 120\" directly and only ask the LLM about fields the text leaves ambiguous."
+)
+
+# Programs whose text has not changed since an earlier run (any catalog or
+# year) reuse that run's results
+reuse_unchanged = st.sidebar.checkbox(
+    "Reuse Unchanged Programs",
+    value=True,
+    help="Fingerprint each program's text (ignoring years, headers and page numbers) and reuse the stored result when it matches an earlier run. Turn off to re-analyze everything."
+)
+
+# Cheap-first cascade: the fast model answers first, the selected model only
+# re-checks results that look wrong (plus a small audit sample)
+cascade = st.sidebar.checkbox(
+    "Cheap-First Cascade",
+    value=False,
+    help=f"Send each program to {llm_parser.CASCADE_FAST_MODEL} first and escalate to the selected model when the result is Unknown, implausible, or disagrees in a sampled audit."
+)
+cascade_audit_rate = llm_parser.DEFAULT_CASCADE_AUDIT_RATE
+if cascade:
+    cascade_audit_rate = st.sidebar.number_input(
+        "Cascade Audit Rate (%)", min_value=0.0, max_value=100.0, value=llm_parser.DEFAULT_CASCADE_AUDIT_RATE * 100, step=1.0
+    ) / 100
+    if model_choice == llm_parser.CASCADE_FAST_MODEL:
+        st.sidebar.warning("Select a stronger model to escalate to.")
+
 # ... (lines 36-230 omitted for brevity in instruction, but I will target specific blocks if possible or use multi_replace)
 
 
@@ -42,23 +128,12 @@ model_choice = st.sidebar.radio(
 # Academic Year Selector
 academic_year = st.selectbox(
     "Academic Year",
-    options=["2024-2025", "2025-2026"],
+    options=list(catalog_report.REPORT_PAGE_RANGES),
     index=1  # Default to 2025-2026
 )
 
 # Default Page Numbers based on Academic Year
-# Default Page Numbers based on Academic Year
-if academic_year == "2024-2025":
-    ug_default_min = 141
-    ug_default_max = 1477
-    gr_default_min = 132
-    gr_default_max = 981
-else:
-    # Defaults for 2025-2026
-    ug_default_min = 155
-    ug_default_max = 1474
-    gr_default_min = 152
-    gr_default_max = 1038
+ug_default_min, ug_default_max, gr_default_min, gr_default_max = catalog_report.REPORT_PAGE_RANGES[academic_year]
 
 # File Uploaders
 st.subheader("1. Upload ToC File (Required)")
@@ -78,130 +153,15 @@ with col2:
     gr_min_page = st.number_input("Min Page", min_value=0, value=gr_default_min, key="gr_min_full")
     gr_max_page = st.number_input("Max Page", min_value=0, value=gr_default_max, key="gr_max_full")
 
-import concurrent.futures
-
-# ... (imports)
+# Finished programs are journaled to disk as they complete; Resume picks up a
+# run with the same inputs where it stopped
+generate_col, resume_col = st.columns(2)
+with generate_col:
+    generate_clicked = st.button("Generate Report")
+with resume_col:
+    resume_clicked = st.button("Resume", help="Continue the last run with these files and settings, skipping programs that already finished.")
 
-
-
-def get_page_offset(page_text, expected_page_num):
-    """
-    Attempts to find the printed page number in the text and calculates the offset
-    relative to the PDF page index.
-    Returns the calculated offset (PDF Index - Printed Page) or None if not found.
-    """
-    import re
-    # Pattern 1: "131 | Page" or "Page 131" (2025-2026 Format)
-    match = re.search(r'(\d+)\s*\|\s*Page', page_text)
-    if match:
-        return int(match.group(1))
-    
-    # Pattern 2: "2024-2025 USF ... Catalog \n 137" (2024-2025 Format)
-    # Look for the catalog header followed by a number (allowing for newlines or spaces).
-    match2 = re.search(r'2024-2025 USF (?:Undergraduate|Graduate) Catalog\s+(\d+)', page_text)
-    if match2:
-        return int(match2.group(1))
-        
-    return None
-
-# Helper function for parallel processing
-def process_single_program(row, ug_pages, gr_pages, ug_min, ug_max, gr_min, gr_max, academic_year, model_choice):
-    try:
-        program_name = row['Program']
-        page_num = int(row['Page Number'])
-        catalog_name = row['Catalog Name']
-        
-        # Determine which PDF pages to use and apply Page Range Filter
-        pages_text = []
-        cat_type = 'ug'
-        should_process = False
-
-        if "Undergraduate" in catalog_name:
-            pages_text = ug_pages
-            cat_type = 'ug'
-            if ug_min <= page_num <= ug_max:
-                should_process = True
-        elif "Graduate" in catalog_name:
-            pages_text = gr_pages
-            cat_type = 'gr'
-            if gr_min <= page_num <= gr_max:
-                should_process = True
-        
-        if pages_text and should_process:
-            # Smart Page Navigation
-            # 1. Try the naive index (Page Num - 1)
-            # 2. Check if the printed page number matches
-            # 3. If not, calculate offset and adjust
-            
-            naive_idx = max(0, page_num - 1)
-            current_idx = naive_idx
-            
-            # Check bounds
-            if current_idx < len(pages_text):
-                page_content = pages_text[current_idx]
-                found_printed_page = get_page_offset(page_content, page_num)
-                
-                if found_printed_page is not None:
-                    # Calculate offset: How many pages do we need to shift?
-                    # If we are at PDF Index 152 (Naive) and found Printed Page 131.
-                    # We want Printed Page 153.
-                    # Difference in printed pages = Target (153) - Found (131) = 22.
-                    # So we need to shift forward by 22 pages.
-                    shift = page_num - found_printed_page
-                    current_idx = naive_idx + shift
-                    # print(f"Adjusting page for {program_name}: Naive {naive_idx} (Printed {found_printed_page}) -> Target {page_num} (New Index {current_idx})")
-            
-            # Ensure new index is valid
-            start_idx = max(0, min(current_idx, len(pages_text) - 1))
-            
-            max_pages = 4  # Maximum pages to search
-            
-            details = None
-            for num_pages in range(1, max_pages + 1):
-                end_idx = min(len(pages_text), start_idx + num_pages)
-                program_text = "".join(pages_text[start_idx:end_idx])
-                
-                details = llm_parser.parse_program_details(program_text, program_name, "Derived from Program Name", cat_type, academic_year, model_choice)
-                
-                # If we found credit hours, stop searching
-                credit_hours = details.get("Total_Credit_Hours", "Unknown")
-                if credit_hours != "Unknown":
-                    break
-            
-        if details:
-            return {
-                "Program Name": program_name,
-                "Accredited": details.get("Accredited", "Yes"),
-                "Educational Objective": details.get("Educational_Objective", "Unknown"),
-                "Concentrations": details.get("Concentrations", "No"),
-                "School Reported Approval Status": "",
-                "Effective Date": "",
-                "Total Credit Hours": details.get("Total_Credit_Hours", "Unknown"),
-                "Program Length Measure": "Semester",
-                "Full-Time Enrollment": "12" if "Undergraduate" in str(catalog_name) else "9",
-                "Classroom Theory Clock Hours": "",
-                "Lab or Shop Clock Hours": "",
-                "Total Clock Hours in Program": "",
-                "Catalog Name": catalog_name,
-                "Page Number": page_num,
-                "License Prep": details.get("License_Prep", "No"),
-                "Modality": details.get("Modality", "Resident"),
-                "Contracted Program": "No",
-                "Enrollment Limit": "",
-                "Comments": "",
-                "FOR SAA INTERNAL USE ONLY": ""
-            }
-        else:
-            print(f"Skipping {program_name}: pages_text empty={not bool(pages_text)}, should_process={should_process} (Page {page_num}, Range {ug_min}-{ug_max} or {gr_min}-{gr_max})")
-
-    except Exception as e:
-        print(f"Error processing {row.get('Program', 'Unknown')}: {e}")
-        import traceback
-        traceback.print_exc()
-        return None
-    return None
-
-if st.button("Generate Report"):
+if generate_clicked or resume_clicked:
     if not toc_file:
         st.error("Please upload the ToC Excel File.")
     elif not ug_file and not gr_file:
@@ -213,82 +173,115 @@ if st.button("Generate Report"):
                 df_toc = pd.read_excel(toc_file)
                 
                 # Validate ToC Columns
-                required_cols = ['Program', 'Page Number', 'Catalog Name']
+                required_cols = catalog_report.TOC_COLUMNS
                 if not all(col in df_toc.columns for col in required_cols):
                     st.error(f"ToC file is missing required columns: {required_cols}")
                     st.stop()
 
-                # Pre-load PDFs
-                ug_pages = []
-                gr_pages = []
-                
-                if ug_file:
-                    ug_pages = llm_parser.extract_all_pages(ug_file)
-                if gr_file:
-                    gr_pages = llm_parser.extract_all_pages(gr_file)
-
-                processed_data = []
-                
                 # Progress Bar
                 progress_bar = st.progress(0)
-                total_programs = len(df_toc)
-                
-                # Parallel Processing
-                # Using ThreadPoolExecutor because the bottleneck is I/O (Network calls to Gemini API)
-                with concurrent.futures.ThreadPoolExecutor(max_workers=10) as executor:
-                    futures = []
-                    for index, row in df_toc.iterrows():
-                        futures.append(executor.submit(process_single_program, row, ug_pages, gr_pages, ug_min_page, ug_max_page, gr_min_page, gr_max_page, academic_year, model_choice))
-                    
-                    for i, future in enumerate(concurrent.futures.as_completed(futures)):
-                        result = future.result()
-                        if result:
-                            processed_data.append(result)
-                        progress_bar.progress((i + 1) / total_programs)
-
-                # Create DataFrame
-                df_final = pd.DataFrame(processed_data)
-                
+
+                df_final, summary = catalog_report.run_catalog_report(
+                    toc_file, ug_file, gr_file, academic_year, model_choice,
+                    (ug_min_page, ug_max_page), (gr_min_page, gr_max_page),
+                    lazy=lazy_extraction, extract_workers=extract_workers, use_sections=use_section_index,
+                    batch_programs=batch_programs, batch_token_budget=batch_token_budget,
+                    use_cache=not bypass_llm_cache, fast_path=credit_hours_fast_path, reuse=reuse_unchanged,
+                    cascade=cascade, audit_rate=cascade_audit_rate, max_in_flight=max_in_flight,
+                    resume=resume_clicked, on_progress=lambda done, total: progress_bar.progress(done / total)
+                )
+                st.session_state.llm_run_id = summary["run_id"]
+                if resume_clicked:
+                    st.info(f"Resuming: {summary['resumed']} programs already finished.")
+
                 if not df_final.empty:
-                    # Sort Data: Undergraduate first, then Graduate. Within each, sort by Page Number.
-                    # Create a temporary column for sorting order
-                    df_final['SortOrder'] = df_final['Catalog Name'].apply(lambda x: 0 if "Undergraduate" in str(x) else 1)
-                    
-                    # Sort by SortOrder and Page Number
-                    df_final = df_final.sort_values(by=['SortOrder', 'Page Number'], ascending=[True, True])
-                    
-                    # Explicitly order columns (excluding SortOrder)
-                    cols = ["Program Name", "Accredited", "Educational Objective", "Concentrations", "School Reported Approval Status", "Effective Date", "Total Credit Hours", "Program Length Measure", "Full-Time Enrollment", "Classroom Theory Clock Hours", "Lab or Shop Clock Hours", "Total Clock Hours in Program", "Catalog Name", "Page Number", "License Prep", "Modality", "Contracted Program", "Enrollment Limit", "Comments", "FOR SAA INTERNAL USE ONLY"]
-                    df_final = df_final[cols]
-                    
                     # Save to Session State
                     st.session_state.catalog_report_data = df_final
                     st.success(f"Processed {len(df_final)} programs!")
+                    for level, message in catalog_report.summary_messages(summary):
+                        getattr(st, level)(message)
                 else:
                     st.warning("No programs found matching the criteria.")
 
             except Exception as e:
                 st.error(f"An error occurred: {e}")
 
+# Cache Status
+cache_stats = page_cache.get_stats()
+with st.sidebar.expander("Page Cache"):
+    st.write(f"Hits: {cache_stats['hits']} | Misses: {cache_stats['misses']}")
+    st.write(f"Entries: {cache_stats['entries']} ({cache_stats['size_mb']} MB)")
+    if st.button("Clear Page Cache", key="clear_page_cache"):
+        page_cache.clear()
+        page_cache.reset_stats()
+        st.rerun()
+
+llm_cache_stats = llm_cache.get_stats()
+with st.sidebar.expander("LLM Cache"):
+    st.write(f"Hits: {llm_cache_stats['hits']} | Misses: {llm_cache_stats['misses']}")
+    st.write(f"Entries: {llm_cache_stats['entries']} ({llm_cache_stats['size_mb']} MB)")
+    if st.button("Clear LLM Cache", key="clear_llm_cache"):
+        llm_cache.clear()
+        llm_cache.reset_stats()
+        st.rerun()
+
+fingerprint_stats = fingerprint_store.get_stats()
+with st.sidebar.expander("Program Fingerprints"):
+    st.write(f"Reused: {fingerprint_stats['hits']} | Analyzed: {fingerprint_stats['misses']}")
+    st.write(f"Stored programs: {fingerprint_stats['entries']}")
+    if st.button("Clear Program Fingerprints", key="clear_fingerprints"):
+        fingerprint_store.clear()
+        fingerprint_store.reset_stats()
+        st.rerun()
+
+client_stats = llm_clients.get_stats()
+with st.sidebar.expander("LLM Clients"):
+    st.write(f"Clients built: {client_stats['builds']} | Shared: {client_stats['registry_hits']} ({client_stats['registry_hit_rate']:.0%})")
+    if client_stats["http_requests"]:
+        st.write(f"OpenAI connections opened: {client_stats['connections_opened']} | Reused: {client_stats['connections_reused']} ({client_stats['connection_reuse_rate']:.0%})")
+    for client_name, count in client_stats["clients"].items():
+        st.write(f"{client_name}: {count} requests")
+
+with st.sidebar.expander("LLM Telemetry"):
+    # The last run started from this session, unless every run is asked for
+    telemetry_all_runs = st.checkbox("All runs in this process", value=False, key="telemetry_all_runs")
+    telemetry_run = None if telemetry_all_runs else st.session_state.get("llm_run_id")
+    if telemetry_run is None and not telemetry_all_runs:
+        st.write("No run in this session yet.")
+    else:
+        telemetry_summary = llm_telemetry.summarize(telemetry_run)
+        if telemetry_summary.empty:
+            st.write("No LLM calls yet.")
+        else:
+            st.write(f"Calls: {int(telemetry_summary['calls'].sum())} | "
+                     f"Tokens: {int(telemetry_summary['prompt_tokens'].sum() + telemetry_summary['completion_tokens'].sum()):,} | "
+                     f"Est. cost: ${telemetry_summary['cost_usd'].sum():.2f}")
+            st.dataframe(telemetry_summary, hide_index=True)
+            st.download_button(
+                label="Download Call Log (CSV)",
+                data=llm_telemetry.to_csv(telemetry_run),
+                file_name="llm_calls.csv",
+                mime="text/csv",
+                key="download_llm_telemetry"
+            )
+            if st.button("Reset Telemetry", key="reset_llm_telemetry"):
+                llm_telemetry.reset()
+                st.rerun()
+
 # Display Results from Session State
 if st.session_state.catalog_report_data is not None:
     st.dataframe(st.session_state.catalog_report_data)
 
     # Download Button
-    output = io.BytesIO()
-    with pd.ExcelWriter(output, engine='openpyxl') as writer:
-        st.session_state.catalog_report_data.to_excel(writer, index=False, sheet_name='CatalogReport')
-    
     # Format filename
-    y1 = academic_year.split('-')[0][-2:]
-    y2 = academic_year.split('-')[1][-2:]
-    filename = f"catalog_report_{y1}{y2}.xlsx"
+    filename = f"catalog_report_{catalog_report.year_suffix(academic_year)}.xlsx"
 
     st.download_button(
         label="Download Excel File",
-        data=output.getvalue(),
+        data=excel_export.download_data(st.session_state.catalog_report_data, 'CatalogReport'),
         file_name=filename,
-        mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+        mime=excel_export.XLSX_MIME,
+        on_click="ignore"
     )
 
     # ---------------------------------------------------------------------
@@ -318,50 +311,11 @@ if st.session_state.catalog_report_data is not None:
                 df_truth = pd.read_excel(truth_file)
                 df_test = pd.read_excel(test_file)
 
-                # Normalize column names
-                required_cols = ['Program Name', 'Accredited', 'Educational Objective', 'Concentrations', 'School Reported Approval Status', 'Effective Date', 'Total Credit Hours', 'Program Length Measure', 'Full-Time Enrollment', 'Classroom Theory Clock Hours', 'Lab or Shop Clock Hours', 'Total Clock Hours in Program', 'Catalog Name', 'Page Number', 'License Prep', 'Modality', 'Contracted Program', 'Enrollment Limit', 'Comments', 'FOR SAA INTERNAL USE ONLY']
-                
-                # Check if columns exist
-                if not all(col in df_truth.columns for col in required_cols):
-                    st.error(f"Truth file is missing one of the required columns: {required_cols}")
-                elif not all(col in df_test.columns for col in required_cols):
-                    st.error(f"Test file is missing one of the required columns: {required_cols}")
-                else:
-                    # Select only relevant columns for comparison
-                    df_truth = df_truth[required_cols]
-                    df_test = df_test[required_cols]
-
-                    
-                    # Normalize ALL required columns to string to avoid type mismatches during merge
-                    # (e.g. invalid 'Contracted Program' as float vs string)
-                    for col in required_cols:
-                        df_truth[col] = df_truth[col].astype(str).str.strip().str.replace(r'\.0$', '', regex=True)
-                        df_test[col] = df_test[col].astype(str).str.strip().str.replace(r'\.0$', '', regex=True)
-
-
-                    # Matches
-                    matches = pd.merge(df_truth, df_test, on=required_cols, how='inner')
-                    num_matches = len(matches)
-
-                    # In Truth but NOT in Test
-                    merged_truth = pd.merge(df_truth, df_test, on=required_cols, how='left', indicator=True)
-                    in_truth_not_test = merged_truth[merged_truth['_merge'] == 'left_only'].drop(columns=['_merge'])
-                    num_truth_not_test = len(in_truth_not_test)
-
-                    # In Test but NOT in Truth
-                    merged_test = pd.merge(df_truth, df_test, on=required_cols, how='right', indicator=True)
-                    in_test_not_truth = merged_test[merged_test['_merge'] == 'right_only'].drop(columns=['_merge'])
-                    num_test_not_truth = len(in_test_not_truth)
-                    
-                    # Save to Session State
-                    st.session_state.cat_report_truth_results = {
-                        "num_matches": num_matches,
-                        "num_truth_not_test": num_truth_not_test,
-                        "num_test_not_truth": num_test_not_truth,
-                        "in_truth_not_test": in_truth_not_test,
-                        "in_test_not_truth": in_test_not_truth
-                    }
+                # Pairs programs on Program Name and Catalog Name, then compares every other column
+                st.session_state.cat_report_truth_results = catalog_report.evaluate_report(df_truth, df_test)
 
+            except ValueError as e:
+                st.error(str(e))
             except Exception as e:
                 st.error(f"An error occurred during comparison: {e}")
 
@@ -371,23 +325,47 @@ if st.session_state.catalog_report_data is not None:
         
         st.subheader("Comparison Results")
         
-        m_col1, m_col2, m_col3 = st.columns(3)
-        m_col1.metric("Matching Programs", results["num_matches"])
-        m_col2.metric("Missing from Test", results["num_truth_not_test"], delta=-results["num_truth_not_test"] if results["num_truth_not_test"] > 0 else 0, delta_color="inverse")
-        m_col3.metric("Extra in Test", results["num_test_not_truth"], delta=results["num_test_not_truth"] if results["num_test_not_truth"] > 0 else 0, delta_color="off")
+        num_missing = len(results["in_truth_not_test"])
+        num_extra = len(results["in_test_not_truth"])
+        m_col1, m_col2, m_col3, m_col4 = st.columns(4)
+        m_col1.metric("Matching Programs", results["matches"])
+        m_col2.metric("Programs with Wrong Fields", results["paired"] - results["matches"])
+        m_col3.metric("Missing from Test", num_missing, delta=-num_missing if num_missing > 0 else 0, delta_color="inverse")
+        m_col4.metric("Extra in Test", num_extra, delta=num_extra if num_extra > 0 else 0, delta_color="off")
+
+        p_col1, p_col2, p_col3 = st.columns(3)
+        p_col1.metric("Precision", f"{results['precision']:.1%}", help="Fully matching programs / programs in the Test File.")
+        p_col2.metric("Recall", f"{results['recall']:.1%}", help="Fully matching programs / programs in the Truth File.")
+        p_col3.metric("Programs Found", f"{results['key_recall']:.1%}", help="Truth programs found in the Test File, right or wrong.")
+
+        st.write("Field accuracy (programs in both files):")
+        st.dataframe(results["field_accuracy"], hide_index=True, column_config={"Accuracy": st.column_config.NumberColumn(format="percent")})
+
+        if len(results["mismatches"]) > 0:
+            st.warning(f"Found {len(results['mismatches'])} wrong fields in {results['paired'] - results['matches']} programs:")
+            st.dataframe(results["mismatches"], hide_index=True)
+            st.download_button(
+                label="Download Wrong Fields",
+                data=excel_export.download_data(results["mismatches"], 'Mismatches'),
+                file_name="mismatches_in_test.xlsx",
+                mime=excel_export.XLSX_MIME,
+                on_click="ignore"
+            )
+        else:
+            st.success("Every field of the programs in both files matches!")
 
-        if results["num_truth_not_test"] > 0:
-            st.warning(f"Found {results['num_truth_not_test']} programs in Truth File that are MISSING from Test File:")
+        if num_missing > 0:
+            st.warning(f"Found {num_missing} programs in Truth File that are MISSING from Test File:")
             st.dataframe(results["in_truth_not_test"])
         else:
             st.success("No programs missing from Test File!")
 
-        if results["num_test_not_truth"] > 0:
-            st.info(f"Found {results['num_test_not_truth']} programs in Test File that are NOT in Truth File (New or Incorrect):")
+        if num_extra > 0:
+            st.info(f"Found {num_extra} programs in Test File that are NOT in Truth File (New or Incorrect):")
             st.dataframe(results["in_test_not_truth"])
         else:
             st.success("No extra programs in Test File!")
-            
+
         if st.button("Reset Comparison", key="reset_truth_btn"):
             st.session_state.cat_report_truth_results = None
             st.rerun()
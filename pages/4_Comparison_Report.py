@@ -1,6 +1,6 @@
 import streamlit as st
 import pandas as pd
-import io
+from utils import comparison, excel_export, history_store, name_matching
 
 # Initialize Session State
 if 'comparison_results' not in st.session_state:
@@ -9,8 +9,9 @@ if 'comparison_results' not in st.session_state:
 st.title("Comparison Report")
 
 st.markdown("""
-This page allows you to compare two years' of Catalog Reports.
-Please upload the Excel files for the two years you wish to compare.
+This page allows you to compare Catalog Reports across academic years.
+Upload the Excel report for each year once: it is added to the catalog history,
+and later comparisons can pick the year without uploading it again.
 """)
 
 # Term Selection
@@ -18,136 +19,99 @@ term = st.selectbox("Select Term", ["Fall", "Spring", "Summer"])
 
 col1, col2 = st.columns(2)
 
-year_options = ["2024-2025", "2025-2026"]
+year_options = history_store.year_options()
+stored_years = history_store.years()
+default_year2 = stored_years[-1] if stored_years else history_store.current_year()
+year2_index = year_options.index(default_year2)
 
 with col1:
     st.subheader("Year 1")
-    year1 = st.selectbox("Select Year 1", options=year_options, index=0, key="year1")
-    file1 = st.file_uploader("Upload Year 1 Report", type=["xlsx"], key="file1")
+    year1 = st.selectbox("Select Year 1", options=year_options, index=max(year2_index - 1, 0), key="year1")
+    file1 = st.file_uploader("Upload Year 1 Report", type=["xlsx"], key="file1", help="Optional when the year is already in the catalog history.")
 
 with col2:
     st.subheader("Year 2")
-    year2 = st.selectbox("Select Year 2", options=year_options, index=1, key="year2")
-    file2 = st.file_uploader("Upload Year 2 Report", type=["xlsx"], key="file2")
+    year2 = st.selectbox("Select Year 2", options=year_options, index=year2_index, key="year2")
+    file2 = st.file_uploader("Upload Year 2 Report", type=["xlsx"], key="file2", help="Optional when the year is already in the catalog history.")
+
+fuzzy = st.checkbox("Match Renamed Programs", value=True, help="Pair programs whose names changed between years (punctuation, word order, small edits) instead of listing them as New and Likely Removed. Match Score and Match Reason show how each program was paired.")
+min_score = st.slider("Minimum Match Score", min_value=0.5, max_value=1.0, value=name_matching.DEFAULT_MIN_SCORE, step=0.01, disabled=not fuzzy)
+
+
+def year_mismatch(year, df, source):
+    # A report whose Catalog Name names another year would be stored, and
+    # compared, as the wrong year
+    detected = history_store.detect_academic_year(df)
+    if detected and detected != year:
+        return f"{source} names {detected} in its Catalog Name column, not {year}."
+    return None
+
 
 if st.button("Compare Years"):
-    if file1 and file2:
+    missing = [year for year, uploaded in ((year1, file1), (year2, file2)) if uploaded is None and year not in stored_years]
+    if year1 == year2:
+        st.error("Please select two different years.")
+    elif missing:
+        st.error(f"Please upload the report for {', '.join(missing)} (not in the catalog history yet).")
+    else:
         try:
-            df1 = pd.read_excel(file1)
-            df2 = pd.read_excel(file2)
-            
-            # Key columns for matching
-            key_cols = ['Program Name']
-            
-            # Verify keys exist
-            if not all(k in df1.columns for k in key_cols) or not all(k in df2.columns for k in key_cols):
-                 st.error(f"Both files must contain columns: {key_cols}")
+            uploads = {year: (pd.read_excel(uploaded), uploaded.name) for year, uploaded in ((year1, file1), (year2, file2)) if uploaded is not None}
+            mismatches = [m for year, (df, source) in uploads.items() if (m := year_mismatch(year, df, source))]
+            if mismatches:
+                st.error(" ".join(mismatches) + " Nothing was stored: select the year each report names, or upload the report for the selected year.")
             else:
-                # Merge
-                # Suffixes: _y1 for Year 1, _y2 for Year 2
-                merged = pd.merge(df1, df2, on=key_cols, how='outer', suffixes=('_y1', '_y2'), indicator=True)
-                
-                final_rows = []
-                
-                for index, row in merged.iterrows():
-                    status = ""
-                    effective_date = ""
-                    
-                    changed_cols_list = []
-                    previous_values_list = []
-                    
-                    # Logic
-                    if row['_merge'] == 'both':
-                        # Check for changes in other columns
-                        # We need to compare all columns that are present in both (excluding keys)
-                        # Get common columns from original dfs
-                        # EXCLUDE 'Catalog Name' and 'Page Number' from content comparison as they will always differ or are irrelevant for approval status
-                        common_cols = [c for c in df1.columns if c in df2.columns and c not in key_cols and c != 'Catalog Name' and c != 'Page Number']
-                        
-                        for col in common_cols:
-                            val1 = row[f"{col}_y1"]
-                            val2 = row[f"{col}_y2"]
-                            
-                            # Handle NaNs
-                            if pd.isna(val1) and pd.isna(val2):
-                                continue
-                            if str(val1).strip() != str(val2).strip():
-                                changed_cols_list.append(f"{col}: {val2}")
-                                previous_values_list.append(f"{col}: {val1}")
-                        
-                        if changed_cols_list:
-                            status = "Changed - Verify"
-                        else:
-                            status = "Still Approved"
-                            
-                    elif row['_merge'] == 'right_only': # In Year 2 only
-                        status = "New"
-                        effective_date = f"{term} {year2}"
-                        
-                    elif row['_merge'] == 'left_only': # In Year 1 only
-                        status = "Likely Removed - Verify"
-                    
-                    # Construct Result Row
-                    # Use Year 2 data if available, else Year 1
-                    result_row = {}
-                    
-                    # Add Keys
-                    for k in key_cols:
-                        result_row[k] = row[k]
-                        
-                    # Add Calculated Fields
-                    # Add Calculated Fields
-                    result_row['School Reported Approval Status'] = status
-                    result_row['Effective Date'] = effective_date
-                    result_row['Changed Columns'] = ", ".join(changed_cols_list)
-                    result_row['Previous Values'] = "; ".join(previous_values_list)
-                    
-                    # Add other columns (preferring Year 2)
-                    # We'll take the union of columns from both
-                    all_cols = set(df1.columns) | set(df2.columns)
-                    for col in all_cols:
-                        if col in key_cols: continue
-                        
-                        # If it's a calculated field we just set, skip (though they likely aren't in source)
-                        if col in ['School Reported Approval Status', 'Effective Date', 'Changed Columns', 'Previous Values']: continue
-
-                        val = None
-                        if row['_merge'] == 'both':
-                            val = row[f"{col}_y2"] # Default to latest
-                        elif row['_merge'] == 'right_only':
-                            val = row.get(col, row.get(f"{col}_y2")) # Might be just col if not in df1
-                            # Because of suffix, it will be col_y2 if in both, but since it's outer join...
-                            # Actually pandas adds suffixes to overlapping columns. Non-overlapping stay as is.
-                            # Let's handle this carefully.
-                            if f"{col}_y2" in row:
-                                val = row[f"{col}_y2"]
-                            elif col in row:
-                                val = row[col]
-                        elif row['_merge'] == 'left_only':
-                            if f"{col}_y1" in row:
-                                val = row[f"{col}_y1"]
-                            elif col in row:
-                                val = row[col]
-                                
-                        result_row[col] = val
-
-                    final_rows.append(result_row)
-                
-                df_result = pd.DataFrame(final_rows)
-                
-                # Ensure specific column order if possible, or at least put Keys and Status first
-                first_cols = ['Program Name', 'Catalog Name', 'School Reported Approval Status', 'Effective Date']
-                other_cols = [c for c in df_result.columns if c not in first_cols]
-                df_result = df_result[first_cols + other_cols]
-                
+                # Uploaded reports replace that year in the history; either way
+                # the comparison reads the stored years, so every year is
+                # normalized alike
+                for year, (df, source) in uploads.items():
+                    history_store.ingest(df, year, source=source)
+                df1 = history_store.load_year(year1)
+                df2 = history_store.load_year(year2)
+                df_result = comparison.compare_reports(df1, df2, term, year2, fuzzy=fuzzy, min_score=min_score)
+
                 st.session_state.comparison_results = df_result
                 st.success(f"Comparison complete! Processed {len(df_result)} programs.")
 
         except Exception as e:
             st.error(f"Error during comparison: {e}")
-            
+
+# Catalog History
+with st.expander("Catalog History"):
+    stored_years = history_store.years()
+    if not stored_years:
+        st.info("No years stored yet. Reports uploaded above are added here.")
     else:
-        st.error("Please upload both files.")
+        st.dataframe(history_store.summary(), hide_index=True, use_container_width=True)
+
+        st.markdown("**Timeline**: compare each selected year with the next.")
+        timeline_years = st.multiselect("Years", options=stored_years, default=stored_years, key="timeline_years")
+        if st.button("Build Timeline", disabled=len(timeline_years) < 2):
+            st.session_state.timeline_results = history_store.timeline(timeline_years, term, fuzzy=fuzzy, min_score=min_score)
+        if st.session_state.get('timeline_results') is not None:
+            timeline_df = st.session_state.timeline_results
+            counts = timeline_df.groupby(['Academic Year', 'School Reported Approval Status']).size().unstack(fill_value=0)
+            st.dataframe(counts, use_container_width=True)
+            st.dataframe(timeline_df, hide_index=True, use_container_width=True)
+
+        st.markdown("**Program**: every change to one program across the stored years.")
+        program_query = st.text_input("Program Name", key="history_program")
+        if program_query:
+            st.dataframe(history_store.program_history(program_query), hide_index=True, use_container_width=True)
+            st.dataframe(history_store.changes(program=program_query), hide_index=True, use_container_width=True)
+
+        st.markdown("**Column**: every program whose value in a column changed since a year.")
+        qcol1, qcol2 = st.columns(2)
+        with qcol1:
+            column_query = st.selectbox("Column", options=history_store.fields(), key="history_column")
+        with qcol2:
+            since_query = st.selectbox("Changed Since", options=stored_years, key="history_since")
+        if column_query:
+            st.dataframe(history_store.changes(field=column_query, since=since_query), hide_index=True, use_container_width=True)
+
+        remove = st.selectbox("Remove Year", options=[""] + stored_years, key="history_remove")
+        if remove and st.button(f"Remove {remove} from History"):
+            history_store.remove_year(remove)
+            st.rerun()
 
 # Display Results
 if st.session_state.comparison_results is not None:
@@ -168,7 +132,7 @@ if st.session_state.comparison_results is not None:
 
 
     
-    # Download Buttons
+    # Download Buttons (workbooks are written when clicked)
     col_dl1, col_dl2, col_dl3 = st.columns(3)
 
     # Abbreviate years for filename: 2024-2025 -> 2425
@@ -176,58 +140,49 @@ if st.session_state.comparison_results is not None:
     y2_short = year2.split('-')[0][-2:] + year2.split('-')[1][-2:]
 
     # Full Report
-    output_full = io.BytesIO()
-    with pd.ExcelWriter(output_full, engine='openpyxl') as writer:
-        st.session_state.comparison_results.to_excel(writer, index=False, sheet_name='Comparison')
-    
     with col_dl1:
         st.download_button(
             label="Download Full Comp Report",
-            data=output_full.getvalue(),
+            data=excel_export.download_data(st.session_state.comparison_results, 'Comparison'),
             file_name=f"comp_report_{y1_short}_{y2_short}_FULL.xlsx",
-            mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+            mime=excel_export.XLSX_MIME,
+            on_click="ignore",
             key="download_full"
         )
 
     # Changes Only Report
     # Filter for non-"Still Approved"
     changes_df = st.session_state.comparison_results[
-        st.session_state.comparison_results['School Reported Approval Status'] != 'Still Approved'
+        st.session_state.comparison_results['School Reported Approval Status'] != comparison.STATUS_APPROVED
     ]
     
-    output_changes = io.BytesIO()
-    with pd.ExcelWriter(output_changes, engine='openpyxl') as writer:
-        changes_df.to_excel(writer, index=False, sheet_name='Changes')
-        
     with col_dl2:
         st.download_button(
             label="Download Changes Only Comp Report",
-            data=output_changes.getvalue(),
+            data=excel_export.download_data(changes_df, 'Changes'),
             file_name=f"comp_report_{y1_short}_{y2_short}_CHANGES.xlsx",
-            mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+            mime=excel_export.XLSX_MIME,
+            on_click="ignore",
             key="download_changes"
         )
 
     # Evaluate Changes Report
     # Filter for "Changed - Verify"
     evaluate_df = st.session_state.comparison_results[
-        st.session_state.comparison_results['School Reported Approval Status'] == 'Changed - Verify'
+        st.session_state.comparison_results['School Reported Approval Status'] == comparison.STATUS_CHANGED
     ]
     # Select specific columns
     # Ensure columns exist before selecting to avoid errors
-    eval_cols = ['Program Name', 'Catalog Name', 'Page Number', 'Changed Columns', 'Previous Values']
+    eval_cols = ['Program Name', 'Catalog Name', 'Page Number', 'Changed Columns', 'Previous Values', 'Match Score', 'Match Reason']
     evaluate_df = evaluate_df[[c for c in eval_cols if c in evaluate_df.columns]]
     
-    output_evaluate = io.BytesIO()
-    with pd.ExcelWriter(output_evaluate, engine='openpyxl') as writer:
-        evaluate_df.to_excel(writer, index=False, sheet_name='Evaluate')
-        
     with col_dl3:
         st.download_button(
             label="Evaluate Changes",
-            data=output_evaluate.getvalue(),
+            data=excel_export.download_data(evaluate_df, 'Evaluate'),
             file_name=f"comp_report_{y1_short}_{y2_short}_EVALUATE.xlsx",
-            mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+            mime=excel_export.XLSX_MIME,
+            on_click="ignore",
             key="download_evaluate"
         )
     
@@ -0,0 +1,80 @@
+import json
+from utils import llm_parser, llm_telemetry
+
+def details(hours, objective="Bachelor", modality="Resident"):
+    return {"Accredited": "Yes", "Educational_Objective": objective, "Concentrations": "No",
+            "Total_Credit_Hours": hours, "License_Prep": "No", "Modality": modality}
+
+def test_plausibility():
+    print("Testing cascade plausibility checks...")
+
+    assert llm_parser.check_plausibility(details("120"), "History B.A.") is None
+    assert llm_parser.check_plausibility(details("Unknown"), "History B.A.") == "unknown"
+    assert llm_parser.check_plausibility(details("36"), "History B.A.") == "implausible"
+    # Minors and undergraduate certificates are reported as Bachelor but have their own ranges
+    assert llm_parser.check_plausibility(details("18"), "Art Minor") is None
+    assert llm_parser.check_plausibility(details("12"), "Event Management Certificate") is None
+    assert llm_parser.check_plausibility(details("15", "Grad Cert"), "Data Analysis Graduate Certificate") is None
+    assert llm_parser.check_plausibility(details("300", "Masters"), "Biology, M.S.") == "implausible"
+
+    print("Cascade plausibility checks passed!")
+
+def test_escalation():
+    print("Testing cheap-first cascade...")
+
+    fast_model = llm_parser.resolve_model(llm_parser.CASCADE_FAST_MODEL)[1]
+    answers = {"Gemini 1.5 Flash": details("36"), "Gemini 2.5 Pro": details("120")}
+    calls = []
+
+    def fake_call_llm(prompt, model_choice, use_cache=True, response_schema=None, **kwargs):
+        calls.append(model_choice)
+        return json.dumps(answers[model_choice])
+
+    original = llm_parser.call_llm
+    llm_parser.call_llm = fake_call_llm
+    llm_parser.reset_cascade_stats()
+    try:
+        # Implausible fast answer: escalated
+        fast = llm_parser.parse_program_details("text", "History B.A.", "B.A.", "ug", model_choice="Gemini 1.5 Flash")
+        final = llm_parser.escalate_details(fast, "text", "History B.A.", "B.A.", "ug", strong_model="Gemini 2.5 Pro", audit_rate=0.0)
+        assert final["Total_Credit_Hours"] == "120" and calls == ["Gemini 1.5 Flash", "Gemini 2.5 Pro"]
+
+        # Plausible fast answer: kept without a second call...
+        calls.clear()
+        answers["Gemini 1.5 Flash"] = details("120")
+        final = llm_parser.escalate_details(details("120"), "text", "History B.A.", "B.A.", "ug", strong_model="Gemini 2.5 Pro", audit_rate=0.0)
+        assert final["Total_Credit_Hours"] == "120" and calls == []
+
+        # ...unless audited, where a disagreement takes the strong answer
+        answers["Gemini 2.5 Pro"] = details("120", modality="Both")
+        final = llm_parser.escalate_details(details("120"), "text", "History B.A.", "B.A.", "ug", strong_model="Gemini 2.5 Pro", audit_rate=1.0)
+        assert final["Modality"] == "Both" and calls == ["Gemini 2.5 Pro"]
+
+        # Batches review each result against the escalation model
+        calls.clear()
+        programs = [{"text": "text", "program_name": "History B.A.", "credential": "B.A.", "catalog_type": "ug"}]
+        answers["Gemini 1.5 Flash"] = details("Unknown")
+        results = llm_parser.parse_program_details_batch(programs, model_choice="Gemini 1.5 Flash", escalate_model="Gemini 2.5 Pro", audit_rate=0.0)
+        assert results[0]["Total_Credit_Hours"] == "120" and calls == ["Gemini 1.5 Flash", "Gemini 2.5 Pro"]
+    finally:
+        llm_parser.call_llm = original
+
+    stats = llm_parser.get_cascade_stats()
+    assert stats == {"programs": 4, "escalated": 3, "unknown": 1, "implausible": 1, "audited": 1, "disagreed": 1}
+
+    # Savings: fast calls repriced at the strong model's prices
+    records = [
+        {"model": fast_model, "cache_hit": False, "prompt_tokens": 1000, "completion_tokens": 100, "latency_s": 1.0,
+         "cost_usd": llm_telemetry.estimate_cost(fast_model, 1000, 100)},
+        {"model": "gemini-2.5-pro", "cache_hit": False, "prompt_tokens": 1000, "completion_tokens": 100, "latency_s": 4.0,
+         "cost_usd": llm_telemetry.estimate_cost("gemini-2.5-pro", 1000, 100)},
+    ]
+    savings = llm_telemetry.estimate_cascade_savings(records * 1 + records[:1] * 3, fast_model, "gemini-2.5-pro")
+    assert savings["all_strong_cost_usd"] > savings["actual_cost_usd"] and savings["cost_saved_usd"] > 0
+    assert savings["all_strong_latency_s"] == 16.0 and savings["latency_saved_s"] == 8.0
+
+    print("Cheap-first cascade passed!")
+
+if __name__ == "__main__":
+    test_plausibility()
+    test_escalation()
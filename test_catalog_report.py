@@ -0,0 +1,69 @@
+import io
+import os
+import tempfile
+import contextlib
+import pandas as pd
+from utils import page_cache, llm_parser, catalog_report
+
+MIN_DIR = os.path.join("z_extra", "2526", "min")
+FULL_DIR = os.path.join("z_extra", "2526", "full")
+
+DETAILS = '{"Accredited": "Yes", "Educational_Objective": "Bachelor", "Concentrations": "No", "Total_Credit_Hours": "120", "License_Prep": "No", "Modality": "Resident"}'
+
+def test_headless_report():
+    print("Testing headless ToC and Catalog Report commands...")
+
+    original_call_llm = llm_parser.call_llm
+    calls = []
+
+    def fake_call_llm(prompt, model_choice="Gemini 2.5 Pro", json_mode=False, use_cache=True, response_schema=None, stream=False):
+        calls.append(prompt)
+        # ToC lines the rules could not classify get no answer
+        return DETAILS if response_schema else ""
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        toc_out = os.path.join(tmp_dir, "toc.xlsx")
+        report_out = os.path.join(tmp_dir, "report.xlsx")
+        cache_dir = os.path.join(tmp_dir, "cache")
+        try:
+            llm_parser.call_llm = fake_call_llm
+
+            log = io.StringIO()
+            with contextlib.redirect_stdout(log):
+                code = catalog_report.main(["toc", "--ug-toc", os.path.join(FULL_DIR, "toc_ug_2526.pdf"), "--gr-toc", os.path.join(FULL_DIR, "toc_gr_2526.pdf"),
+                                            "--toc-out", toc_out, "--cache-dir", cache_dir])
+            assert code == 0
+            df_toc = pd.read_excel(toc_out)
+            assert list(df_toc.columns) == catalog_report.TOC_COLUMNS
+            assert len(df_toc) > 300, len(df_toc)
+            assert "Wrote" in log.getvalue()
+
+            with contextlib.redirect_stdout(io.StringIO()):
+                code = catalog_report.main(["report", "--toc", os.path.join(MIN_DIR, "toc_truth_min.xlsx"),
+                                            "--ug", os.path.join(MIN_DIR, "ug_cat_min_2526.pdf"), "--gr", os.path.join(MIN_DIR, "gr_cat_min_2526.pdf"),
+                                            "--report-out", report_out, "--cache-dir", cache_dir, "--workers", "4", "--no-fast-path"])
+            assert code == 0
+            df_report = pd.read_excel(report_out)
+            assert list(df_report.columns) == catalog_report.REPORT_COLUMNS
+            assert len(df_report) == 27
+            # Undergraduate first, each catalog by page
+            assert "Undergraduate" in df_report["Catalog Name"].iloc[0]
+            assert "Graduate" in df_report["Catalog Name"].iloc[-1]
+            assert (df_report["Total Credit Hours"] == 120).all()
+
+            # Resume with the same inputs finds every program in the journal
+            report_calls = len(calls)
+            with contextlib.redirect_stdout(io.StringIO()):
+                catalog_report.main(["report", "--toc", os.path.join(MIN_DIR, "toc_truth_min.xlsx"),
+                                     "--ug", os.path.join(MIN_DIR, "ug_cat_min_2526.pdf"), "--gr", os.path.join(MIN_DIR, "gr_cat_min_2526.pdf"),
+                                     "--report-out", report_out, "--cache-dir", cache_dir, "--no-fast-path", "--resume"])
+            assert len(calls) == report_calls
+            assert len(pd.read_excel(report_out)) == 27
+        finally:
+            llm_parser.call_llm = original_call_llm
+            os.environ.pop(page_cache.CACHE_ROOT_ENV, None)
+
+    print("Headless commands passed!")
+
+if __name__ == "__main__":
+    test_headless_report()
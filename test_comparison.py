@@ -0,0 +1,136 @@
+import time
+import numpy as np
+import pandas as pd
+from utils import comparison
+
+TRUTH_2425 = "z_extra/2425/full/truth_cat_full_2425.xlsx"
+
+def legacy_compare(df1, df2, term, year2):
+    # The row-by-row comparison the Comparison Report used before the engine
+    key_cols = ['Program Name']
+    merged = pd.merge(df1, df2, on=key_cols, how='outer', suffixes=('_y1', '_y2'), indicator=True)
+    final_rows = []
+    for index, row in merged.iterrows():
+        status = ""
+        effective_date = ""
+        changed_cols_list = []
+        previous_values_list = []
+        if row['_merge'] == 'both':
+            common_cols = [c for c in df1.columns if c in df2.columns and c not in key_cols and c != 'Catalog Name' and c != 'Page Number']
+            for col in common_cols:
+                val1 = row[f"{col}_y1"]
+                val2 = row[f"{col}_y2"]
+                if pd.isna(val1) and pd.isna(val2):
+                    continue
+                if str(val1).strip() != str(val2).strip():
+                    changed_cols_list.append(f"{col}: {val2}")
+                    previous_values_list.append(f"{col}: {val1}")
+            status = "Changed - Verify" if changed_cols_list else "Still Approved"
+        elif row['_merge'] == 'right_only':
+            status = "New"
+            effective_date = f"{term} {year2}"
+        elif row['_merge'] == 'left_only':
+            status = "Likely Removed - Verify"
+        result_row = {k: row[k] for k in key_cols}
+        result_row['School Reported Approval Status'] = status
+        result_row['Effective Date'] = effective_date
+        result_row['Changed Columns'] = ", ".join(changed_cols_list)
+        result_row['Previous Values'] = "; ".join(previous_values_list)
+        for col in set(df1.columns) | set(df2.columns):
+            if col in key_cols or col in ['School Reported Approval Status', 'Effective Date', 'Changed Columns', 'Previous Values']:
+                continue
+            if row['_merge'] == 'left_only':
+                val = row[f"{col}_y1"] if f"{col}_y1" in row else row[col]
+            else:
+                val = row[f"{col}_y2"] if f"{col}_y2" in row else row[col]
+            result_row[col] = val
+        final_rows.append(result_row)
+    df_result = pd.DataFrame(final_rows)
+    first_cols = ['Program Name', 'Catalog Name', 'School Reported Approval Status', 'Effective Date']
+    return df_result[first_cols + [c for c in df_result.columns if c not in first_cols]]
+
+def next_year(df, seed=0):
+    # A plausible following year: some programs dropped, some added, some edited
+    rng = np.random.default_rng(seed)
+    df2 = df.drop(index=rng.choice(df.index, size=len(df) // 20, replace=False)).copy()
+    added = df.sample(n=len(df) // 25, random_state=seed).copy()
+    added['Program Name'] = added['Program Name'] + " (New)"
+    df2 = pd.concat([df2, added], ignore_index=True)
+    edits = rng.choice(df2.index, size=len(df2) // 10, replace=False)
+    df2.loc[edits[::3], 'Total Credit Hours'] = 999
+    df2.loc[edits[1::3], 'Modality'] = "Distant "  # trailing space only: not a change
+    df2['Comments'] = df2['Comments'].astype(object)
+    df2.loc[edits[2::3], 'Comments'] = "Updated"
+    df2['Catalog Name'] = df2['Catalog Name'].str.replace("2024-2025", "2025-2026")
+    df2['Page Number'] = df2['Page Number'] + 7
+    return df2
+
+def assert_same(expected, actual):
+    # The old loop ordered the copied columns by set iteration
+    assert list(expected.columns[:4]) == list(actual.columns[:4])
+    assert set(expected.columns) == set(actual.columns)
+    pd.testing.assert_frame_equal(expected.reset_index(drop=True), actual[expected.columns].reset_index(drop=True), check_dtype=False)
+
+def synthetic_reports(rows, seed=0):
+    rng = np.random.default_rng(seed)
+    names = np.array([f"Program {i}" for i in range(rows)])
+    df1 = pd.DataFrame({
+        "Program Name": names,
+        "Accredited": rng.choice(["Yes", "No"], rows),
+        "Educational Objective": rng.choice(["Bachelor", "Masters", "Doctorate", "Minor"], rows),
+        "Concentrations": rng.choice(["Yes", "No"], rows),
+        "Total Credit Hours": rng.choice([18, 30, 60, 120], rows),
+        "Full-Time Enrollment": rng.choice([9, 12], rows),
+        "Catalog Name": "USF Undergraduate 2024-2025",
+        "Page Number": rng.integers(100, 1500, rows),
+        "License Prep": rng.choice(["Yes", "No", None], rows),
+        "Modality": rng.choice(["Resident", "Distant", "Blended"], rows),
+        "Comments": rng.choice([np.nan, 1.5], rows),
+    })
+    df2 = df1.sample(frac=0.97, random_state=seed).copy()
+    df2 = pd.concat([df2, df1.iloc[: rows // 50].assign(**{"Program Name": lambda d: d["Program Name"] + " B"})], ignore_index=True)
+    flip = rng.random(len(df2)) < 0.1
+    df2.loc[flip, "Modality"] = "Distant"
+    df2.loc[rng.random(len(df2)) < 0.05, "Total Credit Hours"] = 121
+    df2["Catalog Name"] = "USF Undergraduate 2025-2026"
+    return df1, df2
+
+def test_matches_legacy_on_report_pair():
+    print("Testing comparison engine against the row loop (catalog report pair)...")
+    df1 = pd.read_excel(TRUTH_2425)
+    df2 = next_year(df1)
+    expected = legacy_compare(df1, df2, "Fall", "2025-2026")
+    actual = comparison.compare_reports(df1, df2, "Fall", "2025-2026")
+    assert_same(expected, actual)
+
+    counts = actual['School Reported Approval Status'].value_counts()
+    assert counts[comparison.STATUS_NEW] == len(df1) // 25
+    assert counts[comparison.STATUS_REMOVED] == len(df1) // 20
+    assert comparison.STATUS_CHANGED in counts and comparison.STATUS_APPROVED in counts
+    print("Report pair comparison passed!")
+
+def test_matches_legacy_on_synthetic():
+    print("Testing comparison engine against the row loop (synthetic)...")
+    df1, df2 = synthetic_reports(2000)
+    assert_same(legacy_compare(df1, df2, "Spring", "2025-2026"), comparison.compare_reports(df1, df2, "Spring", "2025-2026"))
+
+    # Identical reports: everything still approved
+    result = comparison.compare_reports(df1, df1.copy(), "Fall", "2025-2026")
+    assert (result['School Reported Approval Status'] == comparison.STATUS_APPROVED).all()
+    assert (result['Changed Columns'] == "").all()
+    print("Synthetic comparison passed!")
+
+def benchmark(rows=50000):
+    df1, df2 = synthetic_reports(rows)
+    start = time.perf_counter()
+    comparison.compare_reports(df1, df2, "Fall", "2025-2026")
+    engine_s = time.perf_counter() - start
+    start = time.perf_counter()
+    legacy_compare(df1, df2, "Fall", "2025-2026")
+    legacy_s = time.perf_counter() - start
+    print(f"{rows} rows: engine {engine_s:.2f}s, row loop {legacy_s:.2f}s ({legacy_s / engine_s:.0f}x)")
+
+if __name__ == "__main__":
+    test_matches_legacy_on_report_pair()
+    test_matches_legacy_on_synthetic()
+    benchmark()
@@ -0,0 +1,70 @@
+from utils import detail_rules
+from utils import llm_parser
+
+def test_credit_hours():
+    print("Testing credit hour extraction...")
+
+    ug = "MAJOR CORE COURSES: 8 COURSES; 24 CREDIT HOURS\n• COP 3514 - Program Design Credit Hours: 3\nTOTAL DEGREE HOURS: 120\n"
+    assert detail_rules.find_total_credit_hours(ug) == "120"
+    assert detail_rules.find_total_credit_hours("TOTAL MINOR HOURS: 18", "2024-2025") == "18"
+    assert detail_rules.find_total_credit_hours("Curriculum Requirements (12 Credit Hours)\nComplete the following (6 Credit Hours):") == "12"
+
+    # Post-bachelor totals win over post-master totals
+    gr = "Total Minimum Hours - 72 hours post-bachelor's\nTotal Minimum Hours - 42 hours post-master's\n"
+    assert detail_rules.find_total_credit_hours(gr) == "72"
+
+    # Course credits alone, combined-degree tables and conflicting totals stay ambiguous
+    assert detail_rules.find_total_credit_hours("• ENC 1101 Composition Credit Hours: 3") is None
+    assert detail_rules.find_total_credit_hours("Total hours combined: 150 Credit Hours") is None
+    assert detail_rules.find_total_credit_hours("TOTAL DEGREE HOURS: 120\nTOTAL DEGREE HOURS: 128") is None
+
+    # Sentence forms are only listed for the 2025-2026 format
+    sentence = "The program requires 36 total credit hours."
+    assert detail_rules.find_total_credit_hours(sentence, "2025-2026") == "36"
+    assert detail_rules.find_total_credit_hours(sentence, "2024-2025") is None
+
+    print("Credit hour extraction passed!")
+
+def test_local_resolution():
+    print("Testing fast path resolution...")
+
+    text = "Some description.\nTOTAL DEGREE HOURS: 120\n"
+    resolved = llm_parser.resolve_details_locally(text, "History B.A.", llm_parser.DERIVED_CREDENTIAL, "ug")
+    assert resolved == {"Total_Credit_Hours": "120", "Educational_Objective": "Bachelor", "Concentrations": "No",
+                        "Accredited": "Yes", "License_Prep": "No", "Modality": "Resident"}
+
+    # Licensure and online wording leave those fields to the LLM
+    text = "Offered fully online. Prepares students for the NCLEX licensure exam.\nTOTAL DEGREE HOURS: 120"
+    resolved = llm_parser.resolve_details_locally(text, "Nursing B.S.N.", llm_parser.DERIVED_CREDENTIAL, "ug")
+    assert "License_Prep" not in resolved and "Modality" not in resolved
+    assert resolved["Total_Credit_Hours"] == "120"
+
+    # No explicit total: nothing is resolved
+    assert llm_parser.resolve_details_locally("No totals here.", "History B.A.", "B.A.", "ug") == {}
+
+    # Only the ambiguous fields come from the LLM
+    original = llm_parser.call_llm
+    calls = []
+    llm_parser.call_llm = lambda *a, **k: calls.append(a[0]) or '{"Accredited": "Yes", "Educational_Objective": "Masters", "Concentrations": "No", "Total_Credit_Hours": "99", "License_Prep": "Yes", "Modality": "Distant"}'
+    try:
+        details = llm_parser.parse_program_details(text, "Nursing B.S.N.", llm_parser.DERIVED_CREDENTIAL, "ug", fast_path=True)
+        assert details["Total_Credit_Hours"] == "120" and details["Educational_Objective"] == "Bachelor"
+        assert details["License_Prep"] == "Yes" and details["Modality"] == "Distant"
+        assert len(calls) == 1
+
+        calls.clear()
+        details = llm_parser.parse_program_details("TOTAL MINOR HOURS: 18", "Art Minor", llm_parser.DERIVED_CREDENTIAL, "ug", fast_path=True)
+        assert details["Total_Credit_Hours"] == "18"
+        assert calls == []
+    finally:
+        llm_parser.call_llm = original
+
+    # Helpers read past PDF ligatures and "undergraduate"
+    assert llm_parser.get_educational_objective("Japanese Certiﬁcate", "ug") == "Certificate"
+    assert llm_parser.get_educational_objective("Undergraduate Business Certificate", "ug") == "Certificate"
+
+    print("Fast path resolution passed!")
+
+if __name__ == "__main__":
+    test_credit_hours()
+    test_local_resolution()
@@ -0,0 +1,124 @@
+import os
+import tempfile
+import time
+import pandas as pd
+from utils import catalog_report, evaluation
+from test_comparison import TRUTH_2425, next_year
+
+TOC_TRUTH = "z_extra/2526/min/toc_truth_min.xlsx"
+
+def legacy_evaluate(df_truth, df_test, required_cols):
+    # The three merges the truth comparisons used before the shared engine
+    df_truth = df_truth[required_cols].copy()
+    df_test = df_test[required_cols].copy()
+    for col in required_cols:
+        df_truth[col] = df_truth[col].astype(str).str.strip().str.replace(r'\.0$', '', regex=True)
+        df_test[col] = df_test[col].astype(str).str.strip().str.replace(r'\.0$', '', regex=True)
+    matches = pd.merge(df_truth, df_test, on=required_cols, how='inner')
+    merged_truth = pd.merge(df_truth, df_test, on=required_cols, how='left', indicator=True)
+    merged_test = pd.merge(df_truth, df_test, on=required_cols, how='right', indicator=True)
+    return len(matches), (merged_truth['_merge'] == 'left_only').sum(), (merged_test['_merge'] == 'right_only').sum()
+
+def report_pair():
+    # A generated report: the truth with programs dropped, added and edited
+    truth = pd.read_excel(TRUTH_2425)
+    test = next_year(truth)
+    test['Catalog Name'] = test['Catalog Name'].str.replace("2025-2026", "2024-2025")
+    test['Page Number'] = test['Page Number'] - 7
+    return truth, test
+
+def test_evaluate_report():
+    print("Testing Catalog Report evaluation...")
+    truth, test = report_pair()
+    results = catalog_report.evaluate_report(truth, test)
+
+    # Whole-row matches agree with the old merges
+    matches, _, _ = legacy_evaluate(truth, test, catalog_report.REPORT_COLUMNS)
+    assert results['matches'] == matches
+    assert results['truth_rows'] == len(truth) and results['test_rows'] == len(test)
+    assert len(results['in_truth_not_test']) == len(truth) // 20
+    assert len(results['in_test_not_truth']) == len(truth) // 25
+    assert results['paired'] == len(truth) - len(truth) // 20
+    assert results['precision'] == matches / len(test) and results['recall'] == matches / len(truth)
+
+    # Only the edited columns lose accuracy; a trailing space is not an edit
+    accuracy = results['field_accuracy'].set_index('Column')
+    wrong = accuracy.loc[accuracy['Wrong'] > 0].index.tolist()
+    assert set(wrong) <= {'Total Credit Hours', 'Modality', 'Comments'} and 'Total Credit Hours' in wrong
+    assert accuracy.loc['Page Number', 'Accuracy'] == 1.0
+    mismatches = results['mismatches']
+    assert len(mismatches) == accuracy['Wrong'].sum()
+    assert (mismatches.loc[mismatches['Column'] == 'Total Credit Hours', 'Test'] == "999").all()
+    assert list(mismatches.columns) == catalog_report.REPORT_KEY_COLS + ['Column', 'Truth', 'Test']
+
+    # Identical files
+    same = catalog_report.evaluate_report(truth, truth.copy())
+    assert same['matches'] == len(truth) and same['precision'] == 1.0 and same['mismatches'].empty
+    print("Catalog Report evaluation passed!")
+
+def test_evaluate_toc():
+    print("Testing ToC evaluation...")
+    truth = pd.read_excel(TOC_TRUTH)
+    test = truth.rename(columns={'Program': 'Program Name'}).copy()
+    # Reformatted names still pair; a wrong page number is one wrong field
+    test.loc[0, 'Program Name'] = "  computer science MINOR "
+    test.loc[2, 'Program Name'] = test.loc[2, 'Program Name'].replace(",", "")
+    test.loc[1, 'Page Number'] = 999
+    test = pd.concat([test.drop(index=3), pd.DataFrame([{'Program Name': "Underwater Basket Weaving Minor", 'Page Number': 1, 'Catalog Name': truth.loc[0, 'Catalog Name']}])], ignore_index=True)
+
+    results = catalog_report.evaluate_toc(truth, test)
+    assert results['paired'] == len(truth) - 1
+    assert results['matches'] == len(truth) - 2
+    assert results['in_truth_not_test']['Program'].tolist() == [truth.loc[3, 'Program']]
+    assert results['in_test_not_truth']['Program'].tolist() == ["Underwater Basket Weaving Minor"]
+    assert results['mismatches'][['Program', 'Column', 'Truth', 'Test']].values.tolist() == [[truth.loc[1, 'Program'], 'Page Number', str(truth.loc[1, 'Page Number']), "999"]]
+    # The old merges counted the wrong page and each renamed program twice
+    assert legacy_evaluate(truth, test.rename(columns={'Program Name': 'Program'}), catalog_report.TOC_COLUMNS)[1] == 4
+
+    # A program listed twice pairs once per listing
+    doubled = pd.concat([truth, truth.iloc[[5]]], ignore_index=True)
+    results = catalog_report.evaluate_toc(doubled, truth)
+    assert results['paired'] == len(truth) and len(results['in_truth_not_test']) == 1
+
+    try:
+        catalog_report.evaluate_toc(truth, test.drop(columns=['Page Number']))
+        assert False, "missing column should raise"
+    except ValueError as e:
+        assert "Test file" in str(e) and "Page Number" in str(e)
+    print("ToC evaluation passed!")
+
+def test_evaluate_cli():
+    print("Testing evaluate command...")
+    truth, test = report_pair()
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        test_path = os.path.join(tmp_dir, "catalog_report_2425.xlsx")
+        out_path = os.path.join(tmp_dir, "evaluation.xlsx")
+        test.to_excel(test_path, index=False)
+        assert catalog_report.main(["evaluate", "--truth", TRUTH_2425, "--test", test_path, "--out", out_path]) == 0
+        sheets = pd.read_excel(out_path, sheet_name=None)
+        assert list(sheets) == ['Field Accuracy', 'Mismatches', 'Missing', 'Extra']
+        assert len(sheets['Missing']) == len(truth) // 20
+        assert sheets['Field Accuracy']['Column'].tolist() == catalog_report.REPORT_COLUMNS[1:12] + catalog_report.REPORT_COLUMNS[13:]
+    print("Evaluate command passed!")
+
+def benchmark(copies=153):
+    # About 100k rows: the truth report repeated under distinct names
+    truth = pd.read_excel(TRUTH_2425)
+    big = pd.concat([truth.assign(**{'Program Name': truth['Program Name'] + f" {i}"}) for i in range(copies)], ignore_index=True)
+    test = big.sample(frac=0.98, random_state=0).copy()
+    test.loc[test.sample(frac=0.05, random_state=1).index, 'Total Credit Hours'] = 999
+    start = time.perf_counter()
+    results = catalog_report.evaluate_report(big, test)
+    engine_s = time.perf_counter() - start
+    start = time.perf_counter()
+    legacy_evaluate(big, test, catalog_report.REPORT_COLUMNS)
+    legacy_s = time.perf_counter() - start
+    print(f"{len(big)} rows: evaluation {engine_s:.2f}s (three merges {legacy_s:.2f}s)")
+    for line in evaluation.summary_lines(results)[:3]:
+        print(line)
+
+if __name__ == "__main__":
+    test_evaluate_report()
+    test_evaluate_toc()
+    test_evaluate_cli()
+    benchmark()
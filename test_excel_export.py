@@ -0,0 +1,91 @@
+import io
+import time
+import pandas as pd
+from utils import comparison, excel_export
+from test_comparison import TRUTH_2425, synthetic_reports
+
+def read_back(data):
+    return pd.read_excel(io.BytesIO(data))
+
+def test_excel_export():
+    print("Testing Excel export...")
+    excel_export.clear_cache()
+    excel_export.reset_stats()
+    df = pd.read_excel(TRUTH_2425)
+
+    # Both backends write the same sheet
+    pandas_bytes = excel_export._write_pandas(df, 'CatalogReport')
+    streamed_bytes = excel_export._write_streaming(df, 'CatalogReport')
+    pd.testing.assert_frame_equal(read_back(pandas_bytes), read_back(streamed_bytes))
+    pd.testing.assert_frame_equal(read_back(streamed_bytes), df)
+    assert pd.ExcelFile(io.BytesIO(streamed_bytes)).sheet_names == ['CatalogReport']
+
+    # Identical content is written once
+    first = excel_export.to_excel_bytes(df, 'CatalogReport')
+    again = excel_export.to_excel_bytes(df.copy(), 'CatalogReport')
+    assert first is again
+    stats = excel_export.get_stats()
+    assert stats["misses"] == 1 and stats["hits"] == 1 and stats["entries"] == 1
+
+    # Any edit, another sheet name or a value's type is new content
+    edited = df.copy()
+    edited.loc[3, 'Modality'] = "Blended"
+    assert excel_export.frame_hash(edited) != excel_export.frame_hash(df)
+    assert excel_export.frame_hash(df[df.columns[::-1]]) != excel_export.frame_hash(df)
+    assert excel_export.frame_hash(pd.DataFrame({'a': [12, 'x']})) != excel_export.frame_hash(pd.DataFrame({'a': ['12', 'x']}))
+    excel_export.to_excel_bytes(df, 'Other')
+    assert excel_export.get_stats()["misses"] == 2
+
+    # download_data writes nothing until called
+    lazy = excel_export.download_data(edited, 'CatalogReport')
+    assert excel_export.get_stats()["misses"] == 2
+    assert read_back(lazy()).loc[3, 'Modality'] == "Blended"
+    assert excel_export.get_stats()["misses"] == 3
+    print("Excel export passed!")
+
+def test_streaming_and_eviction():
+    print("Testing streamed export and cache limit...")
+    excel_export.clear_cache()
+    excel_export.reset_stats()
+    df1, df2 = synthetic_reports(400)
+    result = comparison.compare_reports(df1, df2, "Fall", "2025-2026")
+
+    original_cells, original_bytes = excel_export.STREAMING_MIN_CELLS, excel_export.MAX_CACHE_BYTES
+    try:
+        excel_export.STREAMING_MIN_CELLS = 1000
+        data = excel_export.to_excel_bytes(result, 'Comparison')
+        assert excel_export.get_stats()["streamed"] == 1
+        back = read_back(data)
+        assert list(back.columns) == list(result.columns) and len(back) == len(result)
+        assert back['Total Credit Hours'].tolist() == result['Total Credit Hours'].tolist()
+        assert back['Comments'].isna().sum() == result['Comments'].isna().sum()
+
+        # Least recently used workbooks go first once over the limit
+        excel_export.MAX_CACHE_BYTES = len(data) + 1
+        excel_export.to_excel_bytes(result.head(10), 'Comparison')
+        stats = excel_export.get_stats()
+        assert stats["entries"] == 1 and stats["bytes"] < len(data)
+    finally:
+        excel_export.STREAMING_MIN_CELLS, excel_export.MAX_CACHE_BYTES = original_cells, original_bytes
+        excel_export.clear_cache()
+    print("Streamed export passed!")
+
+def benchmark(rows=50000):
+    df1, df2 = synthetic_reports(rows)
+    result = comparison.compare_reports(df1, df2, "Fall", "2025-2026")
+    excel_export.clear_cache()
+    start = time.perf_counter()
+    excel_export._write_pandas(result, 'Comparison')
+    pandas_s = time.perf_counter() - start
+    start = time.perf_counter()
+    excel_export.to_excel_bytes(result, 'Comparison')
+    streamed_s = time.perf_counter() - start
+    start = time.perf_counter()
+    excel_export.to_excel_bytes(result, 'Comparison')
+    cached_s = time.perf_counter() - start
+    print(f"{result.size} cells: pandas/openpyxl {pandas_s:.1f}s, write-only {streamed_s:.1f}s, cached {cached_s:.2f}s")
+
+if __name__ == "__main__":
+    test_excel_export()
+    test_streaming_and_eviction()
+    benchmark()
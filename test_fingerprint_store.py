@@ -0,0 +1,87 @@
+import os
+import tempfile
+from utils import page_cache, fingerprint_store, llm_parser
+
+PROGRAM_2425 = """USF Undergraduate Catalog 2024-2025
+History B.A.
+The major requires 120 credit hours.
+312
+"""
+
+PROGRAM_2526 = """USF Undergraduate Catalog 2025-2026
+History  B.A.
+The major requires 120 credit hours.
+298
+"""
+
+PROGRAM_2627 = PROGRAM_2526.replace("2025-2026", "2026-2027").replace("298", "305")
+
+def test_fingerprint_store():
+    print("Testing program fingerprint reuse...")
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        os.environ[page_cache.CACHE_ROOT_ENV] = tmp_dir
+        original_call_llm = llm_parser.call_llm
+        calls = []
+
+        def fake_call_llm(prompt, model_choice="Gemini 2.5 Pro", json_mode=False, use_cache=True, response_schema=None, stream=False):
+            calls.append(prompt)
+            return '{"Accredited": "Yes", "Educational_Objective": "Bachelor", "Concentrations": "No", "Total_Credit_Hours": "120", "License_Prep": "No", "Modality": "Resident"}'
+
+        try:
+            llm_parser.call_llm = fake_call_llm
+            fingerprint_store.reset_stats()
+
+            # A new year's header, page number and spacing keep the fingerprint
+            fp = fingerprint_store.fingerprint(PROGRAM_2425, "History B.A.", "Undergraduate")
+            assert fp == fingerprint_store.fingerprint(PROGRAM_2526, "History B.A.", "Undergraduate")
+            # Changed requirements, another catalog, model or criteria do not
+            assert fp != fingerprint_store.fingerprint(PROGRAM_2526.replace("120", "121"), "History B.A.", "Undergraduate")
+            assert fp != fingerprint_store.fingerprint(PROGRAM_2425, "History B.A.", "Graduate")
+            assert fp != fingerprint_store.fingerprint(PROGRAM_2425, "History B.A.", "Undergraduate", "gemini-2.5-pro")
+            assert fp != fingerprint_store.fingerprint(PROGRAM_2425, "History B.A.", "Undergraduate", "", "other rules")
+
+            first = llm_parser.parse_program_details(PROGRAM_2526, "History B.A.", "B.A.", "Undergraduate", "2025-2026", reuse=True)
+            assert len(calls) == 1
+            second = llm_parser.parse_program_details(PROGRAM_2627, "History B.A.", "B.A.", "Undergraduate", "2026-2027", reuse=True)
+            assert len(calls) == 1, "Unchanged program should not reach the LLM"
+            assert second == first
+
+            # Another year's criteria, another model and changed text are analyzed again
+            llm_parser.parse_program_details(PROGRAM_2425, "History B.A.", "B.A.", "Undergraduate", "2024-2025", reuse=True)
+            llm_parser.parse_program_details(PROGRAM_2627, "History B.A.", "B.A.", "Undergraduate", "2026-2027", "Gemini 3 Pro", reuse=True)
+            llm_parser.parse_program_details(PROGRAM_2526.replace("120", "121"), "History B.A.", "B.A.", "Undergraduate", "2025-2026", reuse=True)
+            assert len(calls) == 4
+            # So is everything without reuse or without the cache
+            llm_parser.parse_program_details(PROGRAM_2526, "History B.A.", "B.A.", "Undergraduate", "2025-2026")
+            llm_parser.parse_program_details(PROGRAM_2526, "History B.A.", "B.A.", "Undergraduate", "2025-2026", use_cache=False, reuse=True)
+            assert len(calls) == 6
+
+            # The cascade's fast stage reads the strong model's answers and stores none of its own
+            llm_parser.parse_program_details(PROGRAM_2526, "History B.A.", "B.A.", "Undergraduate", "2025-2026", llm_parser.CASCADE_FAST_MODEL,
+                                             reuse=True, reuse_model="Gemini 2.5 Pro")
+            assert len(calls) == 6
+            art = llm_parser.parse_program_details(PROGRAM_2526.replace("History", "Art"), "Art B.A.", "B.A.", "Undergraduate", "2025-2026",
+                                                   llm_parser.CASCADE_FAST_MODEL, reuse=True, reuse_model="Gemini 2.5 Pro")
+            assert len(calls) == 7
+            assert fingerprint_store.get_stats()["entries"] == 4
+            # Once it passes review, the next run's fast stage reuses it
+            llm_parser.escalate_details(art, PROGRAM_2526.replace("History", "Art"), "Art B.A.", "B.A.", "Undergraduate", "2025-2026",
+                                        "Gemini 2.5 Pro", audit_rate=0.0, reuse=True)
+            assert len(calls) == 7
+            again = llm_parser.parse_program_details(PROGRAM_2526.replace("History", "Art"), "Art B.A.", "B.A.", "Undergraduate", "2025-2026",
+                                                     llm_parser.CASCADE_FAST_MODEL, reuse=True, reuse_model="Gemini 2.5 Pro")
+            assert len(calls) == 7 and again == art
+
+            stats = fingerprint_store.get_stats()
+            assert stats["hits"] == 3 and stats["entries"] == 5
+            fingerprint_store.clear()
+            assert fingerprint_store.get_stats()["entries"] == 0
+        finally:
+            llm_parser.call_llm = original_call_llm
+            del os.environ[page_cache.CACHE_ROOT_ENV]
+
+    print("Program fingerprint reuse passed!")
+
+if __name__ == "__main__":
+    test_fingerprint_store()
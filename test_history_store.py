@@ -0,0 +1,141 @@
+import datetime
+import os
+import tempfile
+import time
+import numpy as np
+import pandas as pd
+from utils import comparison, history_store, page_cache
+from test_comparison import TRUTH_2425, next_year
+
+def three_years():
+    df1 = pd.read_excel(TRUTH_2425)
+    df2 = next_year(df1)
+    df3 = next_year(df2.assign(**{'Catalog Name': df2['Catalog Name'].str.replace("2025-2026", "2026-2027")}), seed=1)
+    return df1, df2, df3
+
+def test_history_store():
+    print("Testing catalog history store...")
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        os.environ[page_cache.CACHE_ROOT_ENV] = tmp_dir
+        try:
+            df1, df2, df3 = three_years()
+            assert history_store.detect_academic_year(df1) == "2024-2025"
+            assert history_store.detect_academic_year(df3) == "2026-2027"
+
+            for year, df in [("2025-2026", df2), ("2024-2025", df1), ("2026-2027", df3)]:
+                assert history_store.ingest(df, year, source=f"{year}.xlsx") == len(df)
+            assert history_store.years() == ["2024-2025", "2025-2026", "2026-2027"]
+            assert history_store.summary()['Programs'].tolist() == [len(df1), len(df2), len(df3)]
+
+            # Round trip keeps rows, columns and values; 12.0 reads back as 12
+            loaded = history_store.load_year("2024-2025")
+            assert list(loaded.columns) == list(df1.columns)
+            assert loaded['Program Name'].tolist() == df1['Program Name'].tolist()
+            assert loaded['Page Number'].tolist() == df1['Page Number'].tolist()
+            assert history_store.canonical_value(12.0) == 12 and history_store.canonical_value(" Yes ") == "Yes"
+            assert history_store.canonical_value(np.nan) is None
+
+            # Re-ingesting a year replaces it
+            history_store.ingest(df1.head(10), "2024-2025")
+            assert len(history_store.load_year("2024-2025")) == 10
+            history_store.ingest(df1, "2024-2025")
+
+            # Credit hours changed since 2024-2025: the programs next_year edited
+            edited = df2.loc[df2['Total Credit Hours'] == 999, 'Program Name']
+            kept = edited[edited.isin(df1['Program Name'])]
+            changed = history_store.changes(field="Total Credit Hours", since="2024-2025")
+            first_step = changed[changed['Academic Year'] == "2025-2026"]
+            assert set(first_step['Program Name']) == set(kept)
+            assert (first_step['Value'].astype(str) == "999").all()
+            # Changes since the last year are only the third year's edits
+            later = history_store.changes(field="Total Credit Hours", since="2025-2026")
+            assert set(later['Academic Year']) <= {"2026-2027"}
+            assert len(later) == len(changed[changed['Academic Year'] == "2026-2027"])
+
+            # One program across all years
+            program = kept.iloc[0]
+            history = history_store.program_history(program)
+            assert history['Academic Year'].tolist()[:2] == ["2024-2025", "2025-2026"]
+            program_changes = history_store.changes(program=program)
+            assert "Total Credit Hours" in program_changes['Column'].tolist()
+            # Catalog Name and Page Number change every year and are skipped
+            assert not program_changes['Column'].isin(comparison.IGNORED_COLS).any()
+            assert "Total Credit Hours" in history_store.fields() and "Page Number" not in history_store.fields()
+
+            # The timeline is the pairwise comparisons, stacked
+            timeline = history_store.timeline()
+            assert set(timeline['Academic Year']) == {"2025-2026", "2026-2027"}
+            pair = comparison.compare_reports(history_store.load_year("2024-2025"), history_store.load_year("2025-2026"), "Fall", "2025-2026")
+            first = timeline[timeline['Academic Year'] == "2025-2026"]
+            assert first['School Reported Approval Status'].value_counts().equals(pair['School Reported Approval Status'].value_counts())
+
+            history_store.remove_year("2026-2027")
+            assert history_store.years() == ["2024-2025", "2025-2026"]
+            try:
+                history_store.load_year("2026-2027")
+                assert False, "removed year should not load"
+            except KeyError:
+                pass
+        finally:
+            del os.environ[page_cache.CACHE_ROOT_ENV]
+    print("Catalog history store passed!")
+
+def test_numeric_text():
+    print("Testing numbers stored as text...")
+    assert history_store.canonical_value("12") == 12 == history_store.canonical_value(" 12.0 ")
+    assert history_store.canonical_value("12.5") == 12.5
+    assert history_store.canonical_value("0101") == "0101" and history_store.canonical_value("12 hours") == "12 hours"
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        os.environ[page_cache.CACHE_ROOT_ENV] = tmp_dir
+        try:
+            # One year read as numbers, the next as text: nothing changed
+            history_store.ingest(pd.DataFrame({'Program Name': ["History B.A."], 'Total Credit Hours': [120]}), "2024-2025")
+            history_store.ingest(pd.DataFrame({'Program Name': ["History B.A."], 'Total Credit Hours': ["120"]}), "2025-2026")
+            assert history_store.changes(field="Total Credit Hours").empty
+        finally:
+            del os.environ[page_cache.CACHE_ROOT_ENV]
+    print("Numbers stored as text passed!")
+
+def test_year_options():
+    print("Testing year options...")
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        os.environ[page_cache.CACHE_ROOT_ENV] = tmp_dir
+        try:
+            assert history_store.current_year(datetime.date(2025, 10, 1)) == "2025-2026"
+            assert history_store.current_year(datetime.date(2026, 3, 1)) == "2025-2026"
+            assert history_store.following_year("2025-2026") == "2026-2027"
+            assert history_store.year_options(datetime.date(2025, 10, 1)) == ["2023-2024", "2024-2025", "2025-2026", "2026-2027"]
+            # Stored years are always offered
+            history_store.ingest(pd.DataFrame({'Program Name': ["History B.A."]}), "2019-2020")
+            assert history_store.year_options(datetime.date(2025, 10, 1))[0] == "2019-2020"
+        finally:
+            del os.environ[page_cache.CACHE_ROOT_ENV]
+    print("Year options passed!")
+
+def benchmark(years=10):
+    # Ingest once, then query across every year
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        os.environ[page_cache.CACHE_ROOT_ENV] = tmp_dir
+        try:
+            df = pd.read_excel(TRUTH_2425)
+            start = time.perf_counter()
+            for i in range(years):
+                history_store.ingest(df, f"{2015 + i}-{2016 + i}")
+                df = next_year(df, seed=i)
+            ingest_s = time.perf_counter() - start
+            start = time.perf_counter()
+            changed = history_store.changes(field="Total Credit Hours", since="2015-2016")
+            field_s = time.perf_counter() - start
+            start = time.perf_counter()
+            history_store.changes(program=changed['Program Name'].iloc[0])
+            program_s = time.perf_counter() - start
+            print(f"{years} years: ingest {ingest_s:.2f}s, credit hour changes {field_s * 1000:.0f}ms ({len(changed)} rows), one program {program_s * 1000:.1f}ms")
+        finally:
+            del os.environ[page_cache.CACHE_ROOT_ENV]
+
+if __name__ == "__main__":
+    test_history_store()
+    test_numeric_text()
+    test_year_options()
+    benchmark()
@@ -0,0 +1,62 @@
+import json
+from utils import llm_parser
+
+def make_program(name, size=40):
+    return {"text": "x" * size, "program_name": name, "credential": "Derived from Program Name", "catalog_type": "ug"}
+
+def details(hours):
+    return {"Accredited": "Yes", "Educational_Objective": "Bachelor", "Concentrations": "No",
+            "Total_Credit_Hours": hours, "License_Prep": "No", "Modality": "Resident"}
+
+def test_plan_batches():
+    print("Testing token-budget batch planning...")
+
+    # 400 chars ~ 100 tokens each: three fit in a 300 token budget
+    programs = [make_program(f"P{i}", 400) for i in range(7)]
+    batches = llm_parser.plan_detail_batches(programs, token_budget=300)
+    assert [len(b) for b in batches] == [3, 3, 1]
+
+    # Oversized programs get a batch of their own; max_programs caps the rest
+    programs = [make_program("Big", 4000)] + [make_program(f"P{i}") for i in range(5)]
+    batches = llm_parser.plan_detail_batches(programs, token_budget=300, max_programs=2)
+    assert [len(b) for b in batches] == [1, 2, 2, 1]
+
+    print("Batch planning passed!")
+
+def test_batch_fallback():
+    print("Testing batched details with per-program fallback...")
+
+    programs = [make_program("History B.A."), make_program("Biology B.S."), make_program("Art Minor")]
+    calls = []
+
+    def fake_call_llm(prompt, model_choice, json_mode=False, use_cache=True, response_schema=None):
+        calls.append(prompt)
+        if "PROGRAM 1" in prompt:
+            # Batch response: keyed by name, out of order, one program missing
+            return json.dumps({"programs": [
+                dict(details("60"), Index=2, Program="Biology B.S."),
+                dict(details("120"), Index=1, Program="History B.A."),
+            ]})
+        return json.dumps(details("18"))
+
+    original = llm_parser.call_llm
+    llm_parser.call_llm = fake_call_llm
+    try:
+        results = llm_parser.parse_program_details_batch(programs, "2025-2026", "Gemini 2.5 Pro")
+        assert [r["Total_Credit_Hours"] for r in results] == ["120", "60", "18"]
+        assert len(calls) == 2  # one batch plus one fallback for "Art Minor"
+
+        # A malformed batch response falls back for every program
+        calls.clear()
+        llm_parser.call_llm = lambda *a, **k: calls.append(a[0]) or ("not json" if len(calls) == 1 else json.dumps(details("30")))
+        results = llm_parser.parse_program_details_batch(programs, "2025-2026", "Gemini 2.5 Pro")
+        assert [r["Total_Credit_Hours"] for r in results] == ["30", "30", "30"]
+        assert len(calls) == 4
+    finally:
+        llm_parser.call_llm = original
+
+    print("Batch fallback passed!")
+
+if __name__ == "__main__":
+    test_plan_batches()
+    test_batch_fallback()
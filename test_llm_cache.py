@@ -0,0 +1,107 @@
+import os
+import tempfile
+import time
+from utils import llm_cache, llm_parser, llm_transport, page_cache
+
+def test_llm_cache():
+    print("Testing LLM response cache...")
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        os.environ[page_cache.CACHE_ROOT_ENV] = tmp_dir
+        try:
+            llm_cache.reset_stats()
+
+            key = llm_cache.make_key("gemini-2.0-flash", "prompt", json_mode=True)
+            # Anything that changes the answer changes the key
+            assert key != llm_cache.make_key("gemini-2.5-pro", "prompt", json_mode=True)
+            assert key != llm_cache.make_key("gemini-2.0-flash", "prompt", json_mode=False)
+            assert key != llm_cache.make_key("gemini-2.0-flash", "prompt", True, {"temperature": 0})
+
+            assert llm_cache.get(key) is None
+            llm_cache.put(key, "gemini-2.0-flash", '{"Total_Credit_Hours": "120"}')
+            assert llm_cache.get(key) == '{"Total_Credit_Hours": "120"}'
+
+            # call_llm answers identical requests from the cache without a network call
+            provider, model_name = llm_parser.resolve_model("Gemini 1.5 Flash")
+            prompt_key = llm_cache.make_key(model_name, "cached prompt", True, {"response_mime_type": "application/json"})
+            llm_cache.put(prompt_key, model_name, '{"Accredited": "Yes"}')
+            assert llm_parser.call_llm("cached prompt", "Gemini 1.5 Flash", json_mode=True) == '{"Accredited": "Yes"}'
+
+            stats = llm_cache.get_stats()
+            print(f"  Stats: {stats}")
+            assert stats["hits"] == 2
+            assert stats["misses"] == 1
+            assert stats["entries"] == 2
+
+            # Expired entries are not served
+            os.environ[llm_cache.LLM_CACHE_TTL_HOURS_ENV] = "0"
+            time.sleep(0.01)
+            assert llm_cache.get(key) is None
+            del os.environ[llm_cache.LLM_CACHE_TTL_HOURS_ENV]
+
+            # Size-based eviction drops the least recently used entry first
+            llm_cache.clear()
+            for i in range(3):
+                llm_cache.put(f"k{i}", "m", "x" * 1000)
+                time.sleep(0.01)
+            llm_cache.get("k0")  # k0 becomes most recently used
+            removed = llm_cache.evict(max_mb=2000 / (1024 * 1024))
+            print(f"  Evicted {removed} entries")
+            assert removed == 1
+            assert llm_cache.get("k1") is None
+            assert llm_cache.get("k0") is not None
+        finally:
+            del os.environ[page_cache.CACHE_ROOT_ENV]
+
+    print("LLM cache logic passed!")
+
+class QueuedTransport:
+    # Serves canned answers in order and counts the calls that reach it
+    def __init__(self, answers):
+        self.answers = list(answers)
+        self.calls = 0
+
+    def complete(self, model_name, prompt, json_mode, live_call):
+        self.calls += 1
+        return self.answers.pop(0)
+
+    def stream(self, model_name, prompt, json_mode, live_stream):
+        yield self.complete(model_name, prompt, json_mode, None)
+
+def test_malformed_not_cached():
+    print("Testing malformed responses are not replayed...")
+    good = '{"Accredited": "Yes", "Educational_Objective": "Bachelor", "Concentrations": "No", "Total_Credit_Hours": "120", "License_Prep": "No", "Modality": "Resident"}'
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        os.environ[page_cache.CACHE_ROOT_ENV] = tmp_dir
+        try:
+            # A truncated details answer is dropped, so the next run asks again
+            transport = QueuedTransport(['{"Accredited": "Yes", "Educational_Obj', good])
+            llm_transport.set_transport(transport)
+            args = ("History text", "History B.A.", "B.A.", "ug", "2025-2026", "Gemini 1.5 Flash")
+            assert llm_parser.parse_program_details(*args)["Total_Credit_Hours"] == "Unknown"
+            assert llm_parser.parse_program_details(*args)["Total_Credit_Hours"] == "120"
+            assert llm_parser.parse_program_details(*args)["Total_Credit_Hours"] == "120"
+            assert transport.calls == 2
+
+            # Same for a ToC answer without a single program line, streamed or not
+            program_line = "History B.A. | History | B.A. | 200"
+            transport = QueuedTransport(["I'm sorry, the text", program_line, "Sorry", program_line])
+            llm_transport.set_transport(transport)
+            toc_args = ("History B.A. ..... 200", "USF Undergraduate 2025-2026", "2025-2026", "Gemini 1.5 Flash")
+            assert llm_parser.parse_catalog_toc(*toc_args) == []
+            assert len(llm_parser.parse_catalog_toc(*toc_args)) == 1
+            stream_args = ("History B.A. ..... 200\n", "USF Undergraduate 2025-2026", "2025-2026", "Gemini 1.5 Flash")
+            assert list(llm_parser.stream_catalog_toc(*stream_args)) == []
+            assert len(list(llm_parser.stream_catalog_toc(*stream_args))) == 1
+            assert len(list(llm_parser.stream_catalog_toc(*stream_args))) == 1
+            assert transport.calls == 4
+        finally:
+            llm_transport.set_transport(None)
+            del os.environ[page_cache.CACHE_ROOT_ENV]
+
+    print("Malformed responses passed!")
+
+if __name__ == "__main__":
+    test_llm_cache()
+    test_malformed_not_cached()
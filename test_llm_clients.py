@@ -0,0 +1,74 @@
+import concurrent.futures
+import http.server
+import threading
+from utils import llm_clients
+
+def test_llm_clients():
+    print("Testing pooled LLM clients...")
+    llm_clients.reset()
+
+    # One client per provider and model, shared across threads
+    with concurrent.futures.ThreadPoolExecutor(max_workers=10) as executor:
+        models = list(executor.map(lambda _: llm_clients.get_gemini_model("gemini-2.0-flash"), range(50)))
+    assert all(m is models[0] for m in models)
+
+    other = llm_clients.get_gemini_model("gemini-2.5-pro")
+    assert other is not models[0]
+
+    openai_client = llm_clients.get_openai_client("gpt-4o-mini", api_key="test-key")
+    assert llm_clients.get_openai_client("gpt-4o-mini", api_key="test-key") is openai_client
+    # A different API key gets its own client
+    assert llm_clients.get_openai_client("gpt-4o-mini", api_key="other-key") is not openai_client
+
+    stats = llm_clients.get_stats()
+    print(f"  Stats: {stats}")
+    assert stats["builds"] == 4
+    assert stats["registry_hits"] == 50
+    assert stats["clients"]["gemini:gemini-2.0-flash"] == 50
+    assert "test-key" not in str(stats)
+
+    llm_clients.reset()
+    print("LLM client pooling passed!")
+
+class KeepAliveHandler(http.server.BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header("Content-Length", "2")
+        self.end_headers()
+        self.wfile.write(b"ok")
+
+    def log_message(self, *args):
+        pass
+
+def test_connection_reuse():
+    print("Testing HTTP connection reuse counts...")
+    llm_clients.reset()
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), KeepAliveHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        url = f"http://127.0.0.1:{server.server_address[1]}/"
+        # The first request opens a connection, the rest reuse it
+        with llm_clients.build_http_client() as client:
+            for _ in range(4):
+                assert client.get(url).text == "ok"
+        stats = llm_clients.get_stats()
+        print(f"  Opened: {stats['connections_opened']}, reused: {stats['connections_reused']}")
+        assert stats["http_requests"] == 4
+        assert stats["connections_opened"] == 1 and stats["connections_reused"] == 3
+        assert stats["connection_reuse_rate"] == 0.75
+
+        # A new pool has to connect again
+        with llm_clients.build_http_client() as client:
+            client.get(url)
+        assert llm_clients.get_stats()["connections_opened"] == 2
+    finally:
+        server.shutdown()
+        server.server_close()
+        llm_clients.reset()
+    print("Connection reuse counts passed!")
+
+if __name__ == "__main__":
+    test_llm_clients()
+    test_connection_reuse()
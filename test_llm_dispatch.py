@@ -0,0 +1,112 @@
+import threading
+import time
+import google.api_core.exceptions
+from tenacity import wait_none
+from utils import llm_dispatch, llm_parser
+
+def test_rate_limiter():
+    print("Testing token bucket rate limiter...")
+
+    # 60 requests per minute: a few seconds' burst, then one per second,
+    # so the first minute stays close to the quota
+    limiter = llm_dispatch.RateLimiter(rpm=60, tpm=1000000)
+    burst = llm_dispatch.BURST_SECONDS
+    waits = [limiter._reserve(10) for _ in range(60)]
+    assert all(w == 0 for w in waits[:burst])
+    assert 0.9 < waits[burst] <= 1.0
+    assert 1.9 < waits[burst + 1] <= 2.0
+    assert 59 - burst < waits[-1] <= 60 - burst
+
+    # Token budget limits large prompts even when requests are available,
+    # and a prompt larger than the burst is counted in full
+    limiter = llm_dispatch.RateLimiter(rpm=1000, tpm=60000)
+    assert limiter._reserve(1000 * burst) == 0
+    assert 0.9 < limiter._reserve(1000) <= 1.0
+    assert 20.9 < limiter._reserve(20000) <= 21.0
+
+    # Limiters are shared per model and API key
+    a = llm_dispatch.get_limiter("gemini", "test-model", api_key="key-1")
+    assert llm_dispatch.get_limiter("gemini", "test-model", api_key="key-1") is a
+    assert llm_dispatch.get_limiter("gemini", "test-model", api_key="key-2") is not a
+    llm_dispatch.configure_limits("gemini", "test-model", 10, 5000, api_key="key-1")
+    assert llm_dispatch.get_limits("gemini", "test-model", api_key="key-1") == (10, 5000)
+
+    print("Rate limiter logic passed!")
+
+def test_retry_quota():
+    print("Testing rate limits on retried requests...")
+
+    class Model:
+        attempts = 0
+
+        def generate_content(self, prompt, generation_config=None):
+            Model.attempts += 1
+            if Model.attempts < 3:
+                raise google.api_core.exceptions.ResourceExhausted("quota")
+            return "ok"
+
+    # Every retry waits for quota again; the first attempt is call_llm's
+    limiter = llm_dispatch.get_limiter("gemini", "test-retry-model")
+    before = limiter.total_requests
+    generate = llm_parser._generate_with_retry.retry_with(wait=wait_none())
+    assert generate("test-retry-model", Model(), "prompt", {}) == "ok"
+    assert Model.attempts == 3
+    assert limiter.total_requests - before == 2
+
+    print("Retry quota passed!")
+
+def test_dispatch():
+    print("Testing async dispatcher...")
+
+    lock = threading.Lock()
+    state = {"in_flight": 0, "peak": 0}
+
+    def job(i):
+        with lock:
+            state["in_flight"] += 1
+            state["peak"] = max(state["peak"], state["in_flight"])
+        time.sleep(0.01)
+        with lock:
+            state["in_flight"] -= 1
+        if i == 3:
+            raise ValueError("boom")
+        return i * 2
+
+    progress = []
+    results = llm_dispatch.dispatch(job, [(i,) for i in range(40)], max_in_flight=8,
+                                    on_result=lambda done, total, r: progress.append(done))
+    print(f"  Peak in-flight: {state['peak']}")
+
+    # Results come back in job order; a failing job yields None
+    assert results[:3] == [0, 2, 4]
+    assert results[3] is None
+    assert results[39] == 78
+    assert state["peak"] <= 8
+    assert progress == list(range(1, 41))
+
+    print("Dispatcher logic passed!")
+
+def test_iter_concurrently():
+    print("Testing concurrent stream draining...")
+
+    def stream(name, count, fail_after=None):
+        for i in range(count):
+            if fail_after is not None and i == fail_after:
+                raise ValueError("stream dropped")
+            time.sleep(0.005)
+            yield f"{name}{i}"
+
+    items = list(llm_dispatch.iter_concurrently([stream("a", 5), stream("b", 5, fail_after=3)]))
+
+    # Items arrive tagged with their stream; a failing stream keeps what it produced
+    assert sorted(item for i, item in items if i == 0) == ["a0", "a1", "a2", "a3", "a4"]
+    assert [item for i, item in items if i == 1] == ["b0", "b1", "b2"]
+    assert list(llm_dispatch.iter_concurrently([])) == []
+
+    print("Concurrent stream draining passed!")
+
+if __name__ == "__main__":
+    test_rate_limiter()
+    test_retry_quota()
+    test_dispatch()
+    test_iter_concurrently()
@@ -0,0 +1,85 @@
+import os
+import tempfile
+from utils import llm_cache, llm_dispatch, llm_parser, llm_telemetry, llm_transport, page_cache
+
+def fetch_details():
+    return llm_parser.call_llm("prompt A", "Gemini 1.5 Flash")
+
+def test_call_records():
+    print("Testing per-call LLM telemetry...")
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        os.environ[page_cache.CACHE_ROOT_ENV] = tmp_dir
+        _, model_name = llm_parser.resolve_model("Gemini 1.5 Flash")
+        path = os.path.join(tmp_dir, "calls.jsonl")
+        llm_transport.RecordTransport(path).complete(model_name, "prompt A", False, lambda: "answer " * 40)
+
+        llm_transport.set_transport(llm_transport.ReplayTransport(path))
+        llm_telemetry.reset()
+        try:
+            fetch_details()  # sent (replayed)
+            fetch_details()  # served from the response cache
+            llm_parser.call_llm("unrecorded", "Gemini 1.5 Flash", use_cache=False)
+        finally:
+            llm_transport.set_transport(None)
+            del os.environ[page_cache.CACHE_ROOT_ENV]
+
+        sent, cached, failed = llm_telemetry.get_records()
+        assert sent["caller"] == "fetch_details" and sent["model"] == model_name
+        assert not sent["cache_hit"] and sent["ok"] and sent["completion_tokens"] == len("answer " * 40) // 4
+        assert sent["tokens_estimated"] and sent["cost_usd"] > 0
+        assert cached["cache_hit"] and cached["cost_usd"] == 0.0 and cached["finish_reason"] == "CACHED"
+        assert not failed["ok"] and failed["finish_reason"] == "ERROR"
+
+        summary = llm_telemetry.summarize()
+        row = summary.iloc[0]
+        assert row["calls"] == 3 and row["cache_hits"] == 1 and row["failures"] == 1
+        csv = llm_telemetry.to_csv().decode("utf-8")
+        assert csv.splitlines()[0].split(",") == llm_telemetry.RECORD_FIELDS and len(csv.splitlines()) == 4
+
+    # Provider usage and tenacity retries are attributed to the current call
+    llm_telemetry.begin_call()
+    llm_telemetry.note_response(100, 20, "STOP")
+    llm_telemetry.count_retry()
+    record = llm_telemetry.end_call("gemini-2.5-pro", "p", "r", 1.5, "test")
+    assert (record["prompt_tokens"], record["completion_tokens"], record["retries"]) == (100, 20, 1)
+    assert record["finish_reason"] == "STOP" and not record["tokens_estimated"]
+
+    llm_telemetry.reset()
+    assert llm_telemetry.summarize().empty
+    print("Per-call LLM telemetry passed!")
+
+def test_run_scope():
+    print("Testing telemetry run scoping...")
+    llm_telemetry.reset()
+
+    def call(i):
+        llm_telemetry.begin_call()
+        return llm_telemetry.end_call("gemini-2.5-pro", "p", "r", 0.1, "test")
+
+    # Calls on dispatcher and stream worker threads carry the run id
+    with llm_telemetry.run_scope("report") as run_id:
+        assert llm_telemetry.current_run() == run_id
+        llm_dispatch.dispatch(call, [(i,) for i in range(5)])
+        list(llm_dispatch.iter_concurrently([(call(i) for i in range(3))]))
+    assert llm_telemetry.current_run() is None
+    call(0)  # outside any run
+
+    @llm_telemetry.scoped_run("toc")
+    def other_run():
+        call(0)
+        return llm_telemetry.current_run()
+    other_id = other_run()
+
+    assert len(llm_telemetry.get_records(run_id)) == 8
+    assert llm_telemetry.summarize(run_id).iloc[0]["calls"] == 8
+    assert len(llm_telemetry.get_records(other_id)) == 1 and other_id.startswith("toc-")
+    assert len(llm_telemetry.get_records()) == 10
+    assert len(llm_telemetry.to_csv(other_id).decode("utf-8").splitlines()) == 2
+
+    llm_telemetry.reset()
+    print("Telemetry run scoping passed!")
+
+if __name__ == "__main__":
+    test_call_records()
+    test_run_scope()
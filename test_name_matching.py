@@ -0,0 +1,133 @@
+import random
+import time
+import pandas as pd
+from utils import comparison, name_matching
+
+TRUTH_2425 = "z_extra/2425/full/truth_cat_full_2425.xlsx"
+
+def all_pairs(names1, names2, min_score=name_matching.DEFAULT_MIN_SCORE):
+    # Scores every pair, then assigns like match_names does
+    left = [name_matching._Name(n) for n in dict.fromkeys(names1)]
+    right = [name_matching._Name(n) for n in dict.fromkeys(names2)]
+    scored = []
+    for i, l in enumerate(left):
+        for j, r in enumerate(right):
+            score, reason = name_matching._score(l, r)
+            if score >= min_score:
+                scored.append((score, l.name, r.name, i, j, reason))
+    scored.sort(key=lambda s: (-s[0], s[1], s[2]))
+    used_left, used_right, matches = set(), set(), []
+    for score, name1, name2, i, j, reason in scored:
+        if i in used_left or j in used_right:
+            continue
+        used_left.add(i)
+        used_right.add(j)
+        matches.append((name1, name2, round(score, 4), reason))
+    return matches
+
+def synthetic_names(count, seed=0):
+    # Three words from real program names plus a credential, and a next year
+    # with one letter dropped or a doubled space in each name
+    rng = random.Random(seed)
+    truth = pd.read_excel(TRUTH_2425)
+    words = sorted({w.strip(",.") for n in truth['Program Name'] for w in n.split() if w.isalpha()})
+    credentials = ["B.S.", "B.A.", "M.S.", "M.A.", "Ph.D.", "Minor", "Graduate Certificate", ""]
+    names1 = list(dict.fromkeys(" ".join(rng.sample(words, 3)) + " " + rng.choice(credentials) for _ in range(count)))
+    names1 = [n.strip() for n in names1]
+    names2 = []
+    for name in names1:
+        if rng.random() < 0.5:
+            i = rng.randrange(len(name))
+            names2.append(name[:i] + name[i + 1:])
+        else:
+            names2.append(name.replace(" ", "  ", 1))
+    return names1, names2
+
+def test_score_names():
+    print("Testing name scores...")
+    assert name_matching.score_names("Behavioral & Community Sciences, B.S.", "Behavioral and Community Sciences B.S.") == (1.0, "same name after normalizing")
+    assert name_matching.score_names("Public Health, M.P.H.", "Health, Public, M.P.H.")[1] == "same words, reordered"
+    assert name_matching.score_names("Bio Chemistry, B.S.", "Biochemistry, B.S.")[1] == "same words, spaced differently"
+    score, reason = name_matching.score_names("Mechanical Engineering, B.S.M.E.", "Mechanical Engineerng, B.S.M.E.")
+    assert score >= name_matching.DEFAULT_MIN_SCORE and reason == "similar name"
+
+    # A credential can't change between years, but can be left off
+    assert name_matching.score_names("Accounting, M.Acc.", "Accounting, B.S.") == (0.0, "different credential")
+    score, reason = name_matching.score_names("Accounting, M.Acc.", "Accounting")
+    assert score == name_matching.CREDENTIAL_MISSING_PENALTY and reason.endswith("credential in one year only")
+    print("Name scores passed!")
+
+def test_match_names():
+    print("Testing name matching...")
+    names1 = ["Art History, B.A.", "Art History, M.A.", "Chemistry, B.S.", "Music"]
+    names2 = ["Art  History, M.A.", "History of Art, B.A.", "Chemistry, B.A.", "Dance"]
+    matches = name_matching.match_names(names1, names2)
+    assert [(m[0], m[1]) for m in matches] == [("Art History, M.A.", "Art  History, M.A.")]
+
+    # One to one: the closer name wins, the other stays unmatched
+    matches = name_matching.match_names(["Data Science, M.S."], ["Data Science, M.S", "Data Sciences, M.S."])
+    assert [(m[0], m[1]) for m in matches] == [("Data Science, M.S.", "Data Science, M.S")]
+
+    # A long name whose credential block holds only short names
+    names2 = ['Education & Social Physics, Ph.D.', 'Chemistry Physics Health', 'Data, B.S.']
+    assert name_matching.match_names(['Chemistry Health Education, B.S.'], names2) == all_pairs(['Chemistry Health Education, B.S.'], names2)
+
+    # Every real program name still pairs with itself after punctuation edits
+    names = list(pd.read_excel(TRUTH_2425)['Program Name'].dropna().unique())
+    edited = [n.replace(" and ", " & ").replace(",", "") for n in names]
+    matches = name_matching.match_names(names, edited)
+    assert {(m[0], m[1]) for m in matches} == set(zip(names, edited))
+    print("Name matching passed!")
+
+def test_match_names_same_as_all_pairs():
+    print("Testing indexed matching against all pairs...")
+    names1, names2 = synthetic_names(1500)
+    assert name_matching.match_names(names1, names2) == all_pairs(names1, names2)
+    assert name_matching.match_names(names1, names2, 0.7) == all_pairs(names1, names2, 0.7)
+    assert name_matching.match_names(names1, names2, 0.95) == all_pairs(names1, names2, 0.95)
+    print("Indexed matching passed!")
+
+def test_compare_reports_fuzzy():
+    print("Testing fuzzy comparison...")
+    df1 = pd.read_excel(TRUTH_2425)
+    df2 = df1.copy()
+    renamed = df1['Program Name'].iloc[0]
+    df2.loc[0, 'Program Name'] = renamed.replace(",", "") + " "
+    added = df1.iloc[[2]].assign(**{'Program Name': "Quantum Basket Weaving, B.S."})
+    df2 = pd.concat([df2.drop(index=1), added], ignore_index=True)
+
+    exact = comparison.compare_reports(df1, df2, "Fall", "2025-2026")
+    assert 'Match Score' not in exact.columns
+    assert (exact['School Reported Approval Status'] == comparison.STATUS_NEW).sum() == 2
+
+    result = comparison.compare_reports(df1, df2, "Fall", "2025-2026", fuzzy=True)
+    counts = result['School Reported Approval Status'].value_counts()
+    assert counts[comparison.STATUS_NEW] == 1
+    assert counts[comparison.STATUS_REMOVED] == 1
+    assert counts[comparison.STATUS_CHANGED] == 1
+
+    row = result[result['School Reported Approval Status'] == comparison.STATUS_CHANGED].iloc[0]
+    assert row['Program Name'] == df2.loc[0, 'Program Name']
+    assert row['Changed Columns'] == f"Program Name: {df2.loc[0, 'Program Name']}"
+    assert row['Previous Values'] == f"Program Name: {renamed}"
+    assert row['Match Score'] == 1.0 and row['Match Reason'] == "same name after normalizing"
+
+    approved = result[result['School Reported Approval Status'] == comparison.STATUS_APPROVED]
+    assert (approved['Match Reason'] == "exact name").all()
+    assert result[result['School Reported Approval Status'] == comparison.STATUS_REMOVED]['Match Score'].isna().all()
+    print("Fuzzy comparison passed!")
+
+def benchmark(count=20000):
+    names1, names2 = synthetic_names(count)
+    start = time.perf_counter()
+    matches = name_matching.match_names(names1, names2)
+    elapsed = time.perf_counter() - start
+    correct = sum(dict(zip(names1, names2))[m[0]] == m[1] for m in matches)
+    print(f"{len(names1)} names: {len(matches)} matched ({correct} to their own edit) in {elapsed:.2f}s")
+
+if __name__ == "__main__":
+    test_score_names()
+    test_match_names()
+    test_match_names_same_as_all_pairs()
+    test_compare_reports_fuzzy()
+    benchmark()
@@ -0,0 +1,47 @@
+import os
+import tempfile
+from utils import page_cache
+
+def test_page_cache():
+    print("Testing page cache...")
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        os.environ[page_cache.CACHE_ROOT_ENV] = tmp_dir
+        try:
+            page_cache.reset_stats()
+
+            pdf_hash = page_cache.hash_pdf_bytes(b"%PDF-1.4 fake catalog")
+            key = page_cache.make_cache_key(pdf_hash)
+
+            # Different extraction modes must not share an entry
+            assert key != page_cache.make_cache_key(pdf_hash, extraction_mode="layout")
+
+            # Miss, then hit after saving
+            assert page_cache.load_pages(key) is None
+            pages = ["Page one text", "Page two text", ""]
+            page_cache.save_pages(key, pages)
+            assert page_cache.load_pages(key) == pages
+
+            stats = page_cache.get_stats()
+            print(f"  Stats: {stats}")
+            assert stats["hits"] == 1
+            assert stats["misses"] == 1
+            assert stats["entries"] == 1
+
+            # Eviction removes the least recently used entry first
+            other_key = page_cache.make_cache_key(page_cache.hash_pdf_bytes(b"other"))
+            page_cache.save_pages(other_key, ["x" * 1000])
+            old_path = os.path.join(tmp_dir, "pages", f"{key}.json.gz")
+            os.utime(old_path, (0, 0))
+
+            removed = page_cache.evict(max_mb=0.0001)
+            print(f"  Evicted {removed} entries")
+            assert page_cache.load_pages(key) is None
+            assert page_cache.load_pages(other_key) is not None or removed == 2
+        finally:
+            del os.environ[page_cache.CACHE_ROOT_ENV]
+
+    print("Page cache logic passed!")
+
+if __name__ == "__main__":
+    test_page_cache()
@@ -0,0 +1,114 @@
+import os
+import tempfile
+from utils import page_cache, page_index
+
+def test_page_index():
+    print("Testing printed page index...")
+
+    # Printed page formats for each catalog
+    assert page_index.find_printed_page(" \n39 | Page  \n \nDOCTORATE DEGREES") == 39
+    assert page_index.find_printed_page("2024-2025 USF Graduate Catalog \n100 \n \n9. Deliberations") == 100
+    assert page_index.find_printed_page("ADMISSIONS \n \nUNIVERSITY OF SOUTH FLORIDA 2024-2025 UNDERGRADUATE CATALOG \n61 \n") == 61
+    assert page_index.find_printed_page("UNIVERSITY OF SOUTH FLORIDA 2025-2026 UNDERGRADUATE CATALOG \n200 \n") == 200
+    assert page_index.find_printed_page("Cover page with no number") is None
+
+    # Front matter (2 unnumbered pages), then an offset change partway
+    # through the book (an unnumbered insert after printed page 4)
+    pages = [
+        "Cover",
+        "Contents",
+        "1 | Page",
+        "2 | Page",
+        "3 | Page",
+        "4 | Page",
+        "Full page photo",
+        "5 | Page",
+        "6 | Page",
+    ]
+    page_map = page_index.build_page_map(pages)
+    print(f"  Missing printed numbers on PDF indices: {page_map['missing']}")
+    assert page_map["missing"] == [0, 1, 6]
+
+    assert page_index.resolve_page_index(page_map, 1) == 2
+    assert page_index.resolve_page_index(page_map, 4) == 5
+    # After the insert the offset is different
+    assert page_index.resolve_page_index(page_map, 5) == 7
+    assert page_index.resolve_page_index(page_map, 6) == 8
+    assert page_index.resolve_page_index(page_map, 50) is None
+    assert page_index.resolve_page_index(None, 1) is None
+
+    # Probing without a map uses the naive page's printed number
+    assert page_index.probe_page_index(pages, 3) == 4
+
+    print("Page index logic passed!")
+
+def test_page_map_range():
+    print("Testing page maps over a page range...")
+    # 3 unnumbered front pages, then printed pages 1-40
+    pages = ["Cover", "Contents", "Index"] + [f"{n} | Page" for n in range(1, 41)]
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        os.environ[page_cache.CACHE_ROOT_ENV] = tmp_dir
+        try:
+            seen = []
+
+            class Recording(list):
+                def __getitem__(self, index):
+                    seen.append(index)
+                    return list.__getitem__(self, index)
+
+            # Only the range is scanned, and the saved map is reused
+            page_map = page_index.get_page_map(Recording(pages), "key", index_range=(10, 25))
+            assert page_map["scanned"] == [10, 25] and min(seen) == 10 and max(seen) == 24
+            assert page_index.resolve_page_index(page_map, 15) == 17
+            seen.clear()
+            assert page_index.get_page_map(Recording(pages), "key", index_range=(12, 20)) == page_map
+            assert not seen
+
+            # A wider range rebuilds over both ranges
+            wider = page_index.get_page_map(Recording(pages), "key", index_range=(20, 40))
+            assert wider["scanned"] == [10, 40] and page_index.resolve_page_index(wider, 30) == 32
+            assert page_cache.load_page_map("key")["scanned"] == [10, 40]
+        finally:
+            del os.environ[page_cache.CACHE_ROOT_ENV]
+    print("Page map range passed!")
+
+def test_probed_page_map():
+    print("Testing probed page maps...")
+    # 3 unnumbered front pages, printed pages 1-20, an unnumbered insert, 21-40
+    pages = ["Cover", "Contents", "Index"] + [f"{n} | Page" for n in range(1, 21)] + ["Full page photo"] + [f"{n} | Page" for n in range(21, 41)]
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        os.environ[page_cache.CACHE_ROOT_ENV] = tmp_dir
+        try:
+            seen = set()
+
+            class Recording(list):
+                def __getitem__(self, index):
+                    seen.add(index)
+                    return list.__getitem__(self, index)
+
+            # Only the pages around the requested printed pages are read
+            page_map = page_index.get_probed_page_map(Recording(pages), [5, 30], "key")
+            assert page_map["printed_to_index"] == {5: 7, 30: 33}
+            assert len(seen) <= 4, seen
+            assert page_index.resolve_page_index(page_map, 30) == 33
+
+            # The saved map is reused and extended with new pages only
+            seen.clear()
+            page_map = page_index.get_probed_page_map(Recording(pages), [5, 30, 12], "key")
+            assert page_map["printed_to_index"] == {5: 7, 30: 33, 12: 14}
+            assert 7 not in seen and 33 not in seen
+            assert page_cache.load_page_map("key")["printed_to_index"] == page_map["printed_to_index"]
+
+            # A later range build keeps the probed pages
+            page_map = page_index.get_page_map(pages, "key", index_range=(3, 10))
+            assert page_map["scanned"] == [3, 10] and page_map["printed_to_index"][30] == 33
+        finally:
+            del os.environ[page_cache.CACHE_ROOT_ENV]
+    print("Probed page map passed!")
+
+if __name__ == "__main__":
+    test_page_index()
+    test_page_map_range()
+    test_probed_page_map()
@@ -0,0 +1,87 @@
+import concurrent.futures
+import os
+import tempfile
+from pypdf import PdfWriter
+from utils import llm_parser, page_cache, page_store
+
+def _make_pdf(num_pages):
+    writer = PdfWriter()
+    for _ in range(num_pages):
+        writer.add_blank_page(width=200, height=200)
+    path = tempfile.NamedTemporaryFile(suffix=".pdf", delete=False).name
+    with open(path, "wb") as f:
+        writer.write(f)
+    return path
+
+def test_lazy_page_store():
+    print("Testing lazy page store...")
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        os.environ[page_cache.CACHE_ROOT_ENV] = tmp_dir
+        pdf_path = _make_pdf(10)
+        try:
+            store = page_store.LazyPageStore(pdf_path)
+            assert len(store) == 10
+            assert store.extracted_count == 0
+
+            # Only the indexed pages are extracted
+            window = store[3:6]
+            assert len(window) == 3
+            assert store.extracted_count == 3
+
+            # Concurrent access from worker threads extracts each page once
+            with concurrent.futures.ThreadPoolExecutor(max_workers=8) as executor:
+                results = list(executor.map(lambda i: store[i % 10], range(100)))
+            assert len(results) == 100
+            assert store.is_complete
+            print(f"  Extracted {store.extracted_count} of {len(store)} pages")
+
+            # A complete store is written to the page cache and reused
+            store.save_to_cache()
+            cached_store = page_store.LazyPageStore(pdf_path)
+            assert cached_store.is_complete
+            assert list(cached_store) == list(store)
+        finally:
+            os.remove(pdf_path)
+            del os.environ[page_cache.CACHE_ROOT_ENV]
+
+    print("Lazy page store logic passed!")
+
+def test_partial_cache():
+    print("Testing partial page cache entries...")
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        os.environ[page_cache.CACHE_ROOT_ENV] = tmp_dir
+        pdf_path = _make_pdf(10)
+        try:
+            # A lazy run caches the pages it touched, with gaps for the rest
+            store = page_store.LazyPageStore(pdf_path)
+            store[2:4]
+            store.save_to_cache()
+            cached = page_cache.load_pages(store.cache_key)
+            assert [i for i, p in enumerate(cached) if p is not None] == [2, 3]
+
+            # The next run starts from those pages; two runs' pages merge
+            second = page_store.LazyPageStore(pdf_path)
+            assert second.extracted_count == 2 and not second.is_complete
+            other = page_store.LazyPageStore(pdf_path)
+            second[7]
+            other[0]
+            second.save_to_cache()
+            other.save_to_cache()
+            cached = page_cache.load_pages(store.cache_key)
+            assert [i for i, p in enumerate(cached) if p is not None] == [0, 2, 3, 7]
+
+            # Full extraction fills the gaps and completes the entry
+            pages = llm_parser.extract_all_pages(pdf_path)
+            assert len(pages) == 10 and None not in pages
+            assert page_store.LazyPageStore(pdf_path).is_complete
+        finally:
+            os.remove(pdf_path)
+            del os.environ[page_cache.CACHE_ROOT_ENV]
+
+    print("Partial page cache entries passed!")
+
+if __name__ == "__main__":
+    test_lazy_page_store()
+    test_partial_cache()
@@ -0,0 +1,38 @@
+import time
+from utils import page_cache, parallel_extract
+
+CATALOG_PDF = "z_extra/2526/min/ug_cat_min_2526.pdf"
+
+def test_parallel_extract():
+    print("Testing parallel page extraction...")
+    pdf_bytes = page_cache.read_pdf_bytes(CATALOG_PDF)
+
+    # The whole catalog through the process pool matches the serial path
+    serial = parallel_extract.extract_pages_parallel(pdf_bytes, workers=1)
+    assert len(serial) >= parallel_extract.MIN_PAGES_FOR_PARALLEL
+    assert parallel_extract.extract_pages_parallel(pdf_bytes, workers=4) == serial
+
+    # Sub-ranges that do not split evenly, one running past the last page
+    for start, end in [(13, 61), (len(serial) - 27, len(serial) + 10)]:
+        expected = serial[start:end]
+        assert parallel_extract.extract_pages_parallel(pdf_bytes, start, end, workers=4) == expected
+
+    # Ranges too short for the pool take the serial shortcut
+    assert parallel_extract.extract_pages_parallel(pdf_bytes, 5, 9, workers=4) == serial[5:9]
+    assert parallel_extract.split_range(10, 13, 8) == [(10, 11), (11, 12), (12, 13)]
+    print(f"  {len(serial)} pages identical with 1 and 4 workers")
+    print("Parallel page extraction passed!")
+
+def benchmark(workers=4):
+    pdf_bytes = page_cache.read_pdf_bytes(CATALOG_PDF)
+    start = time.perf_counter()
+    parallel_extract.extract_pages_parallel(pdf_bytes, workers=1)
+    serial_s = time.perf_counter() - start
+    start = time.perf_counter()
+    parallel_extract.extract_pages_parallel(pdf_bytes, workers=workers)
+    parallel_s = time.perf_counter() - start
+    print(f"Serial {serial_s:.1f}s, {workers} workers {parallel_s:.1f}s")
+
+if __name__ == "__main__":
+    test_parallel_extract()
+    benchmark()
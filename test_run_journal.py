@@ -0,0 +1,46 @@
+import os
+import tempfile
+from utils import page_cache, run_journal
+
+def row(program, page):
+    return {"Program Name": program, "Catalog Name": "USF Undergraduate 2025-2026", "Page Number": page, "Total Credit Hours": "120"}
+
+def test_run_journal():
+    print("Testing checkpoint journal...")
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        os.environ[page_cache.CACHE_ROOT_ENV] = tmp_dir
+        try:
+            key = run_journal.make_run_key(b"toc", ["ug-hash", "gr-hash"], "2025-2026", "Gemini 2.5 Pro")
+            # Any input change starts a different journal
+            assert key != run_journal.make_run_key(b"toc", ["ug-hash", "gr-hash"], "2025-2026", "Gemini 3 Pro")
+            assert key != run_journal.make_run_key(b"toc2", ["ug-hash", "gr-hash"], "2025-2026", "Gemini 2.5 Pro")
+            assert key != run_journal.make_run_key(b"toc", ["ug-hash"], "2025-2026", "Gemini 2.5 Pro", {"cascade": True})
+
+            journal = run_journal.RunJournal(key)
+            assert journal.load() == {}
+            journal.append(row("History B.A.", 300))
+            journal.append(row("Art Minor", 150))
+
+            # A crash mid-write leaves a partial line, which is ignored
+            with open(journal.path, "a", encoding="utf-8") as f:
+                f.write('{"key": "USF Undergraduate 2025-2026|Biology B.S.|2')
+
+            # A new journal object (e.g. after a rerun) sees the finished rows
+            # and keeps appending after the broken line
+            run_journal.RunJournal(key).append(row("Chemistry B.S.", 400))
+            done = run_journal.RunJournal(key).load()
+            assert set(done) == {run_journal.make_row_key("USF Undergraduate 2025-2026", "History B.A.", 300.0),
+                                 run_journal.make_row_key("USF Undergraduate 2025-2026", "Art Minor", 150),
+                                 run_journal.make_row_key("USF Undergraduate 2025-2026", "Chemistry B.S.", 400)}
+            assert done[run_journal.make_row_key("USF Undergraduate 2025-2026", "History B.A.", 300)]["Total Credit Hours"] == "120"
+
+            journal.clear()
+            assert len(journal) == 0
+        finally:
+            del os.environ[page_cache.CACHE_ROOT_ENV]
+
+    print("Checkpoint journal passed!")
+
+if __name__ == "__main__":
+    test_run_journal()
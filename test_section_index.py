@@ -0,0 +1,48 @@
+from utils import section_index
+
+def test_section_index():
+    print("Testing program section index...")
+
+    # Headings can be split by pypdf ("C omputer S cience") or wrapped
+    assert section_index.find_heading("Header\nC omputer S cience, M .S .C .S . \nBody", "Computer Science, M.S.C.S.") == 7
+    assert section_index.find_heading("Header\nAging\nSciences Minor\n", "Aging Sciences Minor") == 7
+    assert section_index.find_heading("No heading here", "Aging Sciences Minor") is None
+    # A heading at the start of a line beats a mention inside a paragraph
+    text = "See the Aging Sciences B.S. for details.\nAging Sciences B.S.\nTOTAL DEGREE HOURS: 120"
+    assert section_index.find_heading(text, "Aging Sciences B.S.") == text.index("\nAging") + 1
+
+    pages = [
+        "Header 1\nHistory Minor\nTOTAL MINOR HOURS: 15\nHistory B.A.\nTOTAL DEGREE HOURS: 120\n",
+        "Header 2\nHistory B.A. continued\n",
+        "Header 3\nMath Minor\nTOTAL MINOR HOURS: 18\n",
+        "Header 4\nMath Minor continued\n",
+    ]
+    entries = [
+        {"key": "math", "program": "Math Minor", "start_idx": 2},
+        {"key": "history_minor", "program": "History Minor", "start_idx": 0},
+        {"key": "history_ba", "program": "History B.A.", "start_idx": 0},
+    ]
+    sections = section_index.build_section_index(entries, pages)
+    for key, text in sections.items():
+        print(f"  {key}: {text!r}")
+
+    # Two programs on the same page are split at the second heading
+    assert sections["history_minor"] == "History Minor\nTOTAL MINOR HOURS: 15\n"
+    # A section continues across pages up to the next heading
+    assert sections["history_ba"] == "History B.A.\nTOTAL DEGREE HOURS: 120\nHeader 2\nHistory B.A. continued\nHeader 3\n"
+    # The last section is capped at the page limit
+    assert sections["math"] == "Math Minor\nTOTAL MINOR HOURS: 18\nHeader 4\nMath Minor continued\n"
+
+    # A program without a findable heading gets no section, and does not
+    # take over the previous program's text
+    lost = entries + [{"key": "lost", "program": "Physics B.S.", "start_idx": 1}]
+    assert section_index.locate_program(pages, "Physics B.S.", 1) is None
+    assert "lost" not in section_index.build_section_index(lost, pages)
+
+    capped = section_index.build_section_index(entries, pages, max_pages=1)
+    assert capped["history_ba"] == "History B.A.\nTOTAL DEGREE HOURS: 120\n"
+
+    print("Section index logic passed!")
+
+if __name__ == "__main__":
+    test_section_index()
@@ -0,0 +1,61 @@
+import json
+from utils import json_repair
+from utils import llm_parser
+
+VALID = {"Accredited": "Yes", "Educational_Objective": "Masters", "Concentrations": "No",
+         "Total_Credit_Hours": "36", "License_Prep": "No", "Modality": "Both"}
+
+def test_json_repair():
+    print("Testing JSON repair...")
+
+    assert json_repair.loads('{"a": 1}') == ({"a": 1}, False)
+    # Code fences, chatter, trailing commas, smart quotes, single quotes, truncation
+    assert json_repair.loads('```json\n{"a": 1,}\n```') == ({"a": 1}, True)
+    assert json_repair.loads('Here you go: {"a": "x"} Hope that helps!') == ({"a": "x"}, True)
+    assert json_repair.loads('{“a”: “x”}') == ({"a": "x"}, True)
+    assert json_repair.loads("{'a': True, 'b': None}") == ({"a": True, "b": None}, True)
+    assert json_repair.loads('{"programs": [{"a": "x"}, {"a": "y"') == ({"programs": [{"a": "x"}, {"a": "y"}]}, True)
+    for bad in ("", None, "no json here"):
+        try:
+            json_repair.loads(bad)
+            assert False, "expected ValueError"
+        except ValueError:
+            pass
+
+    print("JSON repair passed!")
+
+def test_details_schema():
+    print("Testing schema-constrained details...")
+
+    assert llm_parser.DETAIL_SCHEMA["required"] == llm_parser.DETAIL_KEYS
+    assert llm_parser.DETAIL_SCHEMA["properties"]["Modality"]["enum"] == ["Resident", "Distant", "Both"]
+    assert "additionalProperties" not in json.dumps(llm_parser._gemini_schema(llm_parser.BATCH_DETAIL_SCHEMA))
+
+    assert llm_parser.parse_details_response(json.dumps(VALID)) == (VALID, "ok")
+
+    # Near misses are normalized onto the typed model
+    loose = '{"accredited": true, "Educational Objective": "masters", "Concentrations": "no", "Total_Credit_Hours": 36, "License_Prep": "No", "Modality": "BOTH",}'
+    assert llm_parser.parse_details_response(loose) == (VALID, "repaired")
+
+    details, status = llm_parser.parse_details_response('{"Accredited": "Yes", "Modality": "Online"}')
+    assert status == "malformed" and details == {"Accredited": "Yes"}
+    assert llm_parser.parse_details_response("")[1] == "malformed"
+
+    # The schema goes to call_llm and malformed responses are counted
+    seen = []
+    original = llm_parser.call_llm
+    llm_parser.call_llm = lambda prompt, model_choice, use_cache=True, response_schema=None, **k: seen.append(response_schema) or "not json"
+    llm_parser.reset_detail_response_stats()
+    try:
+        details = llm_parser.parse_program_details("text", "History B.A.", "B.A.", "ug")
+    finally:
+        llm_parser.call_llm = original
+    assert seen == [llm_parser.DETAIL_SCHEMA]
+    assert details["Total_Credit_Hours"] == "Unknown" and details["Educational_Objective"] == "Bachelor"
+    assert llm_parser.get_detail_response_stats() == {"responses": 1, "repaired": 0, "malformed": 1}
+
+    print("Schema-constrained details passed!")
+
+if __name__ == "__main__":
+    test_json_repair()
+    test_details_schema()
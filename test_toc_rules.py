@@ -0,0 +1,142 @@
+from utils import toc_rules
+from utils import llm_parser
+from utils import catalog_report
+
+SAMPLE_TOC = """2025-2026 USF UNDERGRADUATE CATALOG
+College of Arts and Sciences .................................................. 150
+Addictions Studies Minor ......................................................... 155
+Anthropology B.A. ................................................................ 160
+Criminology B.A., with Cybercrime Concentration ........................... 200
+Public Administration, M.P.A.......................................................... 210
+Exploratory Curriculum: Arts and Humanities
+Pathway .............................................................................. 805
+Smart City Technology Graduate Certificate (XSCT)
+........................................................................................... 820
+B.S. in Biomedical Sciences ....................................................... 830
+Anthropology, M.A. and Public Health, M.P.H. ............................. 840
+Other Information - Departmental Minor ...................................... 850
+iv
+"""
+
+def test_split_and_classify():
+    print("Testing rule-based ToC parsing...")
+
+    programs, ambiguous = toc_rules.parse_toc_text(SAMPLE_TOC, "Undergraduate Catalog")
+    rows = [(p["program_name"], p["credential"], p["page_number"]) for p in programs]
+    assert rows == [
+        ("Addictions Studies", "Minor", 155),
+        ("Anthropology", "B.A.", 160),
+        ("Criminology", "B.A., with Cybercrime Concentration", 200),
+        ("Public Administration", "M.P.A.", 210),
+        ("Exploratory Curriculum: Arts and Humanities Pathway", "N/A", 805),
+        ("Smart City Technology", "Graduate Certificate", 820),
+    ]
+    assert programs[3]["original_text"] == "Public Administration, M.P.A."
+    assert ambiguous == [("Other Information - Departmental Minor", 850)]
+
+    print("Rule-based ToC parsing passed!")
+
+def test_llm_fallback():
+    print("Testing LLM fallback for ambiguous lines...")
+
+    calls = []
+    def fake_parse_catalog_toc(text, catalog_name, academic_year, model_choice, use_cache, start_point=True):
+        calls.append(text)
+        return [{"original_text": "Departmental", "program_name": "Departmental", "credential": "Minor",
+                 "page_number": 850, "catalog_name": catalog_name}]
+
+    original = llm_parser.parse_catalog_toc
+    llm_parser.parse_catalog_toc = fake_parse_catalog_toc
+    try:
+        programs = llm_parser.parse_catalog_toc_rules(SAMPLE_TOC, "Undergraduate Catalog")
+        assert len(calls) == 1 and "Other Information - Departmental Minor" in calls[0]
+        assert len(programs) == 7 and programs[-1]["page_number"] == 850
+
+        # With the fallback off the ambiguous line is dropped and no LLM call is made
+        calls.clear()
+        programs = llm_parser.parse_catalog_toc_rules(SAMPLE_TOC, "Undergraduate Catalog", llm_fallback=False)
+        assert calls == [] and len(programs) == 6
+    finally:
+        llm_parser.parse_catalog_toc = original
+
+    print("LLM fallback passed!")
+
+def test_chunked_parsing():
+    print("Testing chunked LLM ToC parsing...")
+
+    pages = ["Front matter\nAccountancy and Analytics, M.S. .... 10\n", "Biology, Ph.D. .... 20\n", "Chemistry, M.S. .... 30\n"]
+    assert llm_parser.chunk_toc_pages(pages, chunk_pages=2, overlap_pages=1) == ["".join(pages), pages[2]]
+    assert llm_parser.trim_toc_pages(pages, "USF Graduate 2024-2025", "2024-2025")[0].startswith("Accountancy")
+    assert llm_parser.trim_toc_pages(pages, "USF Graduate 2025-2026", "2025-2026") == pages
+
+    calls = []
+    def fake_parse_catalog_toc(text, catalog_name, academic_year, model_choice, use_cache, start_point):
+        calls.append((text, start_point))
+        programs, _ = toc_rules.parse_toc_text(text, catalog_name, academic_year)
+        return programs
+
+    original = llm_parser.parse_catalog_toc
+    llm_parser.parse_catalog_toc = fake_parse_catalog_toc
+    try:
+        programs = llm_parser.parse_catalog_toc_chunked(pages, "USF Graduate 2024-2025", "2024-2025", chunk_pages=1, overlap_pages=1)
+    finally:
+        llm_parser.parse_catalog_toc = original
+
+    # Three chunks, no start point instruction, overlap duplicates removed
+    assert len(calls) == 3 and not any(start for _, start in calls)
+    assert [p["page_number"] for p in programs] == [10, 20, 30]
+
+    print("Chunked LLM ToC parsing passed!")
+
+def test_streaming_parse():
+    print("Testing streamed ToC rows...")
+
+    response = "Biology, Ph.D. | Biology | Ph.D. | 231\nnot a program\nAdvertising, M.S. | Advertising | M.S. | 215"
+    fragments = [response[i:i + 7] for i in range(0, len(response), 7)]
+
+    def fake_call_llm(prompt, model_choice, json_mode=False, use_cache=True, stream=False):
+        assert stream
+        return iter(fragments)
+
+    original = llm_parser.call_llm
+    llm_parser.call_llm = fake_call_llm
+    try:
+        rows = list(llm_parser.stream_catalog_toc("text", "USF Graduate 2025-2026"))
+    finally:
+        llm_parser.call_llm = original
+
+    assert [(r["program_name"], r["page_number"]) for r in rows] == [("Biology", 231), ("Advertising", 215)]
+    assert llm_parser.parse_toc_line("USF Graduate Catalog | USF Graduate | Catalog | 1", "GR") is None
+
+    print("Streamed ToC rows passed!")
+
+def test_stream_breaks_off():
+    print("Testing a ToC stream that breaks off...")
+    pages = ["Biology page", "Advertising page"]
+
+    def fake_call_llm(prompt, model_choice, json_mode=False, use_cache=True, stream=False):
+        # The last chunk's stream delivers one line, then the connection drops
+        if "Biology page" not in prompt:
+            yield "Advertising, M.S. | Advertising | M.S. | 215\nArt"
+            raise llm_parser.LLMStreamError("connection reset")
+        yield "Biology, Ph.D. | Biology | Ph.D. | 231"
+
+    original = llm_parser.call_llm
+    llm_parser.call_llm = fake_call_llm
+    try:
+        df_toc, counts = catalog_report.generate_toc([], pages, "2025-2026", "Gemini 2.5 Pro", (0, 1000), (0, 1000),
+                                                     parser="llm", chunk_pages=1)
+    finally:
+        llm_parser.call_llm = original
+
+    # Rows that arrived before the break are kept, and the ToC is flagged
+    assert sorted(df_toc["Program"]) == ["Advertising, M.S.", "Biology, Ph.D."]
+    assert counts["partial"] and counts["failed_chunks"] == (0, 1)
+    print("Broken-off ToC stream passed!")
+
+if __name__ == "__main__":
+    test_split_and_classify()
+    test_llm_fallback()
+    test_chunked_parsing()
+    test_streaming_parse()
+    test_stream_breaks_off()
@@ -0,0 +1,716 @@
+import argparse
+import io
+import os
+import sys
+import time
+
+import pandas as pd
+
+from utils import evaluation
+from utils import fingerprint_store
+from utils import llm_dispatch
+from utils import llm_parser
+from utils import llm_telemetry
+from utils import page_cache
+from utils import page_index
+from utils import page_store
+from utils import run_journal
+from utils import section_index
+
+# The ToC -> Catalog Report pipeline without Streamlit. The ToC Generator and
+# Catalog Report pages call into this module, and it can be run headless:
+#   python -m utils.catalog_report toc    --ug-toc UG.pdf --gr-toc GR.pdf
+#   python -m utils.catalog_report report --toc toc_2526.xlsx --ug UG.pdf --gr GR.pdf
+#   python -m utils.catalog_report run    --ug-toc ... --gr-toc ... --ug ... --gr ...
+#   python -m utils.catalog_report evaluate --truth truth.xlsx --test catalog_report_2526.xlsx
+
+TOC_COLUMNS = ['Program', 'Page Number', 'Catalog Name']
+
+REPORT_COLUMNS = ["Program Name", "Accredited", "Educational Objective", "Concentrations", "School Reported Approval Status", "Effective Date", "Total Credit Hours", "Program Length Measure", "Full-Time Enrollment", "Classroom Theory Clock Hours", "Lab or Shop Clock Hours", "Total Clock Hours in Program", "Catalog Name", "Page Number", "License Prep", "Modality", "Contracted Program", "Enrollment Limit", "Comments", "FOR SAA INTERNAL USE ONLY"]
+
+MODEL_CHOICES = ["Gemini 1.5 Flash", "Gemini 2.5 Pro", "Gemini 3 Pro", "ChatGPT 5 mini"]
+
+# Default printed page ranges of the program sections, per academic year
+# (ug_min, ug_max, gr_min, gr_max)
+TOC_PAGE_RANGES = {
+    "2024-2025": (141, 1477, 132, 981),
+    "2025-2026": (155, 1475, 150, 1038),
+}
+REPORT_PAGE_RANGES = {
+    "2024-2025": (141, 1477, 132, 981),
+    "2025-2026": (155, 1474, 152, 1038),
+}
+
+
+def catalog_names(academic_year):
+    """Returns the (undergraduate, graduate) catalog names for a year."""
+    return f"USF Undergraduate {academic_year}", f"USF Graduate {academic_year}"
+
+
+def year_suffix(academic_year):
+    """"2025-2026" -> "2526", as used in the export filenames."""
+    y1, y2 = academic_year.split('-')
+    return f"{y1[-2:]}{y2[-2:]}"
+
+
+# ---------------------------------------------------------------------------
+# ToC
+# ---------------------------------------------------------------------------
+
+def _parse_toc_stream(pages, catalog_name, academic_year, model_choice, parser, use_cache, chunk_pages, failed_chunks):
+    if parser == "llm":
+        yield from llm_parser.stream_catalog_toc_chunked(
+            pages, catalog_name, academic_year, model_choice,
+            use_cache=use_cache, chunk_pages=chunk_pages, failed_chunks=failed_chunks
+        )
+    else:
+        yield from llm_parser.parse_catalog_toc_rules(
+            "".join(pages), catalog_name, academic_year, model_choice, use_cache=use_cache
+        )
+
+
+def build_toc_frame(programs):
+    """Builds the ToC table (Program, Page Number, Catalog Name) from parsed programs."""
+    if not programs:
+        return pd.DataFrame(columns=TOC_COLUMNS)
+    df = pd.DataFrame(programs)
+    # Use the 'original_text' field which preserves the exact formatting from the catalog
+    # (e.g. "Computer Engineering B.S.C.P." vs "Artificial Intelligence, M.S.A.I.")
+    df['Program'] = df['original_text']
+    df_final = df[['Program', 'page_number', 'catalog_name']]
+    df_final.columns = TOC_COLUMNS
+    return df_final
+
+
+def finalize_toc(parsed, ug_range, gr_range):
+    """
+    Sorts the (ug, gr) lists of raw programs into ToC order, filters them
+    to the page ranges and validates credentials.
+    Returns (ToC DataFrame, counts) as described in generate_toc.
+    """
+    # Chunks stream in interleaved, so restore ToC (page) order
+    ug_programs = sorted(parsed[0], key=lambda p: p["page_number"])
+    gr_programs = sorted(parsed[1], key=lambda p: p["page_number"])
+
+    ug_filtered = llm_parser.filter_programs(ug_programs, *ug_range)
+    gr_filtered = llm_parser.filter_programs(gr_programs, *gr_range)
+
+    ug_final = llm_parser.validate_catalog_type(ug_filtered, 'ug')
+    gr_final = llm_parser.validate_catalog_type(gr_filtered, 'gr')
+
+    counts = {
+        "raw": (len(ug_programs), len(gr_programs)),
+        "filtered": (len(ug_filtered), len(gr_filtered)),
+        "validated": (len(ug_final), len(gr_final)),
+    }
+    return build_toc_frame(ug_final + gr_final), counts
+
+
+@llm_telemetry.scoped_run("toc")
+def generate_toc(ug_pages, gr_pages, academic_year, model_choice, ug_range, gr_range, parser="rules",
+                 use_cache=True, chunk_pages=llm_parser.TOC_CHUNK_PAGES, on_program=None):
+    """
+    Parses the UG and GR ToC pages concurrently, then filters them to the
+    page ranges and validates credentials. parser is "rules" (LLM only for
+    ambiguous lines) or "llm". on_program(parsed) is called with the
+    (ug, gr) lists of raw programs each time one arrives.
+    Returns (ToC DataFrame, counts) where counts holds the (ug, gr) totals
+    after each step: "raw", "filtered" and "validated", the (ug, gr)
+    number of LLM chunks whose stream broke off ("failed_chunks"),
+    "partial", True when any part of the ToC could not be parsed, and the
+    telemetry "run_id" of its LLM calls.
+    """
+    ug_catalog_name, gr_catalog_name = catalog_names(academic_year)
+    failed_chunks = ([], [])
+    streams = [
+        _parse_toc_stream(ug_pages, ug_catalog_name, academic_year, model_choice, parser, use_cache, chunk_pages, failed_chunks[0]),
+        _parse_toc_stream(gr_pages, gr_catalog_name, academic_year, model_choice, parser, use_cache, chunk_pages, failed_chunks[1]),
+    ]
+    parsed = ([], [])
+    failed_catalogs = []
+    for catalog_index, program in llm_dispatch.iter_concurrently(streams, failed=failed_catalogs):
+        parsed[catalog_index].append(program)
+        if on_program:
+            on_program(parsed)
+
+    df_toc, counts = finalize_toc(parsed, ug_range, gr_range)
+    counts["failed_chunks"] = (len(failed_chunks[0]), len(failed_chunks[1]))
+    counts["partial"] = bool(failed_catalogs or failed_chunks[0] or failed_chunks[1])
+    counts["run_id"] = llm_telemetry.current_run()
+    return df_toc, counts
+
+
+# ---------------------------------------------------------------------------
+# Catalog Report
+# ---------------------------------------------------------------------------
+
+def get_catalog_page_map(pages, pdf_hash, printed_pages=None):
+    """
+    Returns the printed page -> PDF index map for a catalog. With
+    printed_pages (the ToC rows' pages), only those pages are found, by
+    probing near each one; otherwise the whole catalog is scanned. The map
+    is saved in the page cache next to the page text and reused by later
+    runs.
+    """
+    if not pages:
+        return None
+    cache_key = pages.cache_key if isinstance(pages, page_store.LazyPageStore) else page_cache.make_cache_key(pdf_hash)
+    if printed_pages is None:
+        return page_index.get_page_map(pages, cache_key)
+    return page_index.get_probed_page_map(pages, printed_pages, cache_key)
+
+
+def toc_page_numbers(df_toc, is_ug, min_page, max_page):
+    """Returns the ToC rows' printed pages for one catalog within [min_page, max_page]."""
+    return sorted({
+        int(page_num)
+        for catalog_name, page_num in zip(df_toc['Catalog Name'], df_toc['Page Number'])
+        if ("Undergraduate" in str(catalog_name)) == is_ug and min_page <= int(page_num) <= max_page
+    })
+
+
+def build_catalog_sections(df_toc, pages, page_map, is_ug, min_page, max_page):
+    """
+    Builds the program section index for one catalog. Keys are
+    (Catalog Name, Program, Page Number) tuples.
+    """
+    if not pages:
+        return {}
+
+    entries = []
+    for _, row in df_toc.iterrows():
+        catalog_name = str(row['Catalog Name'])
+        if ("Undergraduate" in catalog_name) != is_ug:
+            continue
+        page_num = int(row['Page Number'])
+        if not min_page <= page_num <= max_page:
+            continue
+
+        start_idx = page_index.resolve_page_index(page_map, page_num)
+        if start_idx is None:
+            start_idx = page_index.probe_page_index(pages, page_num)
+        entries.append({
+            "key": (row['Catalog Name'], row['Program'], page_num),
+            "program": str(row['Program']),
+            "start_idx": start_idx
+        })
+
+    return section_index.build_section_index(entries, pages)
+
+
+def build_report_row(program_name, catalog_name, page_num, details):
+    """Builds one Catalog Report row from the details returned by the LLM."""
+    return {
+        "Program Name": program_name,
+        "Accredited": details.get("Accredited", "Yes"),
+        "Educational Objective": details.get("Educational_Objective", "Unknown"),
+        "Concentrations": details.get("Concentrations", "No"),
+        "School Reported Approval Status": "",
+        "Effective Date": "",
+        "Total Credit Hours": details.get("Total_Credit_Hours", "Unknown"),
+        "Program Length Measure": "Semester",
+        "Full-Time Enrollment": "12" if "Undergraduate" in str(catalog_name) else "9",
+        "Classroom Theory Clock Hours": "",
+        "Lab or Shop Clock Hours": "",
+        "Total Clock Hours in Program": "",
+        "Catalog Name": catalog_name,
+        "Page Number": page_num,
+        "License Prep": details.get("License_Prep", "No"),
+        "Modality": details.get("Modality", "Resident"),
+        "Contracted Program": "No",
+        "Enrollment Limit": "",
+        "Comments": "",
+        "FOR SAA INTERNAL USE ONLY": ""
+    }
+
+
+def process_program_batch(batch, academic_year, model_choice, use_cache=True, fast_path=False, escalate_model=None, audit_rate=0.0, reuse=False):
+    """
+    Analyzes a batch of sectioned programs in one request. Each batch item
+    carries the ToC fields next to the parse_program_details_batch inputs.
+    Returns the report rows for the batch.
+    """
+    details_list = llm_parser.parse_program_details_batch(batch, academic_year, model_choice, use_cache=use_cache, fast_path=fast_path,
+                                                          escalate_model=escalate_model, audit_rate=audit_rate, reuse=reuse)
+    return [
+        build_report_row(item["program_name"], item["catalog_name"], item["page_num"], details)
+        for item, details in zip(batch, details_list) if details
+    ]
+
+
+# Helper function for parallel processing
+def process_single_program(row, ug_pages, gr_pages, ug_min, ug_max, gr_min, gr_max, academic_year, model_choice, ug_map=None, gr_map=None, sections=None, use_cache=True, fast_path=False, escalate_model=None, audit_rate=0.0, reuse=False):
+    try:
+        program_name = row['Program']
+        page_num = int(row['Page Number'])
+        catalog_name = row['Catalog Name']
+
+        # Determine which PDF pages to use and apply Page Range Filter
+        details = None
+        pages_text = []
+        page_map = None
+        cat_type = 'ug'
+        should_process = False
+
+        if "Undergraduate" in catalog_name:
+            pages_text = ug_pages
+            page_map = ug_map
+            cat_type = 'ug'
+            if ug_min <= page_num <= ug_max:
+                should_process = True
+        elif "Graduate" in catalog_name:
+            pages_text = gr_pages
+            page_map = gr_map
+            cat_type = 'gr'
+            if gr_min <= page_num <= gr_max:
+                should_process = True
+
+        if pages_text and should_process:
+            section_key = (catalog_name, program_name, page_num)
+            if sections and section_key in sections:
+                # The section index already holds exactly this program's text
+                program_text = sections[section_key]
+                details = llm_parser.parse_program_details(program_text, program_name, llm_parser.DERIVED_CREDENTIAL, cat_type, academic_year, model_choice, use_cache=use_cache, fast_path=fast_path,
+                                                       reuse=reuse, reuse_model=escalate_model)
+            else:
+                # Smart Page Navigation
+                # 1. Look up the printed page in the precomputed page map (O(1))
+                # 2. Otherwise read the printed page number on the naive page
+                #    (Page Num - 1) and shift by the difference
+                current_idx = page_index.resolve_page_index(page_map, page_num)
+                if current_idx is None:
+                    current_idx = page_index.probe_page_index(pages_text, page_num)
+
+                # Ensure new index is valid
+                start_idx = max(0, min(current_idx, len(pages_text) - 1))
+
+                max_pages = 4  # Maximum pages to search
+
+                for num_pages in range(1, max_pages + 1):
+                    end_idx = min(len(pages_text), start_idx + num_pages)
+                    program_text = "".join(pages_text[start_idx:end_idx])
+
+                    details = llm_parser.parse_program_details(program_text, program_name, llm_parser.DERIVED_CREDENTIAL, cat_type, academic_year, model_choice, use_cache=use_cache, fast_path=fast_path,
+                                                               reuse=reuse, reuse_model=escalate_model)
+
+                    # If we found credit hours, stop searching
+                    credit_hours = details.get("Total_Credit_Hours", "Unknown")
+                    if credit_hours != "Unknown":
+                        break
+
+            # Cascade: second opinion from the stronger model when needed
+            if escalate_model:
+                details = llm_parser.escalate_details(details, program_text, program_name, llm_parser.DERIVED_CREDENTIAL, cat_type, academic_year,
+                                                      escalate_model, use_cache=use_cache, fast_path=fast_path, audit_rate=audit_rate, reuse=reuse)
+
+        if details:
+            return build_report_row(program_name, catalog_name, page_num, details)
+        else:
+            print(f"Skipping {program_name}: pages_text empty={not bool(pages_text)}, should_process={should_process} (Page {page_num}, Range {ug_min}-{ug_max} or {gr_min}-{gr_max})")
+
+    except Exception as e:
+        print(f"Error processing {row.get('Program', 'Unknown')}: {e}")
+        import traceback
+        traceback.print_exc()
+        return None
+    return None
+
+
+def load_catalog_pages(pdf_file, lazy=True, workers=None):
+    """
+    Returns (pages, PDF hash) for a catalog, the pages as a LazyPageStore
+    or fully extracted. Returns ([], None) when there is no file.
+    """
+    if not pdf_file:
+        return [], None
+    if lazy:
+        pages = page_store.LazyPageStore(pdf_file)
+        return pages, pages.pdf_hash
+    pdf_bytes = page_cache.read_pdf_bytes(pdf_file)
+    pdf_hash = page_cache.hash_pdf_bytes(pdf_bytes)
+    return llm_parser.extract_all_pages(pdf_bytes, workers=workers, pdf_hash=pdf_hash), pdf_hash
+
+
+def finalize_report(rows):
+    """
+    Orders report rows Undergraduate first, then Graduate, each by page,
+    with the report columns in export order. Returns an empty DataFrame
+    when there are no rows.
+    """
+    df_final = pd.DataFrame(rows)
+    if df_final.empty:
+        return df_final
+    df_final['SortOrder'] = df_final['Catalog Name'].apply(lambda x: 0 if "Undergraduate" in str(x) else 1)
+    df_final = df_final.sort_values(by=['SortOrder', 'Page Number'], ascending=[True, True])
+    return df_final[REPORT_COLUMNS]
+
+
+@llm_telemetry.scoped_run("report")
+def run_catalog_report(toc_file, ug_file, gr_file, academic_year, model_choice, ug_range, gr_range,
+                       lazy=True, extract_workers=None, use_sections=True, batch_programs=False, batch_token_budget=None,
+                       use_cache=True, fast_path=True, reuse=True, cascade=False, audit_rate=llm_parser.DEFAULT_CASCADE_AUDIT_RATE,
+                       max_in_flight=llm_dispatch.DEFAULT_MAX_IN_FLIGHT, resume=False, on_progress=None):
+    """
+    Runs the Catalog Report for a ToC file and the catalog PDFs (paths,
+    uploads or bytes; either catalog may be None). Finished programs are
+    journaled as they complete; with resume, programs already in the
+    journal for the same inputs are not analyzed again.
+    on_progress(done, total) is called after each job finishes.
+    Returns (report DataFrame, summary dict); summary["run_id"] tags the
+    run's LLM telemetry records.
+    """
+    toc_bytes = page_cache.read_pdf_bytes(toc_file)
+    df_toc = pd.read_excel(io.BytesIO(toc_bytes))
+    missing_cols = [col for col in TOC_COLUMNS if col not in df_toc.columns]
+    if missing_cols:
+        raise ValueError(f"ToC file is missing required columns: {TOC_COLUMNS}")
+
+    ug_min_page, ug_max_page = ug_range
+    gr_min_page, gr_max_page = gr_range
+
+    ug_pages, ug_hash = load_catalog_pages(ug_file, lazy, extract_workers)
+    gr_pages, gr_hash = load_catalog_pages(gr_file, lazy, extract_workers)
+
+    # Printed page -> PDF index maps for the ToC rows' pages
+    ug_map = get_catalog_page_map(ug_pages, ug_hash, toc_page_numbers(df_toc, True, ug_min_page, ug_max_page))
+    gr_map = get_catalog_page_map(gr_pages, gr_hash, toc_page_numbers(df_toc, False, gr_min_page, gr_max_page))
+
+    # Program Sections (heading to next heading)
+    sections = {}
+    if use_sections:
+        sections.update(build_catalog_sections(df_toc, ug_pages, ug_map, True, ug_min_page, ug_max_page))
+        sections.update(build_catalog_sections(df_toc, gr_pages, gr_map, False, gr_min_page, gr_max_page))
+
+    # With the cascade on, the fast model answers first and the
+    # selected model is only used for escalations
+    first_model = llm_parser.CASCADE_FAST_MODEL if cascade else model_choice
+    escalate_model = model_choice if cascade else None
+
+    # Checkpoint journal for this run's inputs
+    run_key = run_journal.make_run_key(
+        toc_bytes,
+        [h for h in (ug_hash, gr_hash) if h],
+        academic_year,
+        model_choice,
+        {"cascade": cascade, "audit_rate": audit_rate if cascade else None, "fast_path": fast_path,
+         "sections": use_sections, "batch_programs": batch_programs, "reuse": reuse,
+         "ranges": [ug_min_page, ug_max_page, gr_min_page, gr_max_page]}
+    )
+    journal = run_journal.RunJournal(run_key)
+    if resume:
+        finished = journal.load()
+    else:
+        journal.clear()
+        finished = {}
+
+    processed_data = list(finished.values())
+
+    # Batched Programs
+    # Programs with a section are packed into token-budgeted batches;
+    # everything else goes through process_single_program below.
+    batch_items = []
+    if batch_programs and sections:
+        for index, row in df_toc.iterrows():
+            if run_journal.make_row_key(row['Catalog Name'], row['Program'], row['Page Number']) in finished:
+                continue
+            section_key = (row['Catalog Name'], row['Program'], int(row['Page Number']))
+            if section_key in sections:
+                batch_items.append({
+                    "row_index": index,
+                    "text": sections[section_key],
+                    "program_name": row['Program'],
+                    "credential": llm_parser.DERIVED_CREDENTIAL,
+                    "catalog_type": 'ug' if "Undergraduate" in str(row['Catalog Name']) else 'gr',
+                    "catalog_name": row['Catalog Name'],
+                    "page_num": int(row['Page Number'])
+                })
+    batches = llm_parser.plan_detail_batches(batch_items, token_budget=batch_token_budget or llm_parser.get_batch_token_budget())
+    batch_jobs = [(batch, academic_year, first_model, use_cache, fast_path, escalate_model, audit_rate, reuse) for batch in batches]
+    batched_rows = {item["row_index"] for item in batch_items}
+
+    # Parallel Processing
+    # The dispatcher keeps up to max_in_flight programs running; the shared
+    # per-model rate limiter inside call_llm paces requests to the quota.
+    jobs = []
+    for index, row in df_toc.iterrows():
+        if index in batched_rows:
+            continue
+        if run_journal.make_row_key(row['Catalog Name'], row['Program'], row['Page Number']) in finished:
+            continue
+        jobs.append((row, ug_pages, gr_pages, ug_min_page, ug_max_page, gr_min_page, gr_max_page, academic_year, first_model, ug_map, gr_map, sections, use_cache, fast_path, escalate_model, audit_rate, reuse))
+
+    total_jobs = len(batch_jobs) + len(jobs)
+    finished_jobs = [0]
+
+    def on_result(done_count, total, result):
+        rows = result if isinstance(result, list) else [result] if result else []
+        for report_row in rows:
+            processed_data.append(report_row)
+            journal.append(report_row)
+        finished_jobs[0] += 1
+        if on_progress:
+            on_progress(finished_jobs[0], total_jobs)
+
+    batch_stats_before = llm_parser.get_batch_stats()
+    fast_path_before = llm_parser.get_fast_path_stats()
+    responses_before = llm_parser.get_detail_response_stats()
+    cascade_before = llm_parser.get_cascade_stats()
+    reuse_before = fingerprint_store.get_stats()
+    llm_dispatch.dispatch(process_program_batch, batch_jobs, max_in_flight=max_in_flight, on_result=on_result)
+    llm_dispatch.dispatch(process_single_program, jobs, max_in_flight=max_in_flight, on_result=on_result)
+
+    if batch_jobs:
+        batch_stats = llm_parser.get_batch_stats()
+        fallbacks = batch_stats["fallbacks"] - batch_stats_before["fallbacks"]
+        print(f"Batched {len(batch_items)} programs into {len(batch_jobs)} requests ({fallbacks} re-sent individually).")
+
+    response_stats = llm_parser.get_detail_response_stats()
+    repaired = response_stats["repaired"] - responses_before["repaired"]
+    malformed = response_stats["malformed"] - responses_before["malformed"]
+    print(f"Detail responses: {response_stats['responses'] - responses_before['responses']} ({repaired} repaired, {malformed} malformed).")
+
+    if lazy:
+        for pages in (ug_pages, gr_pages):
+            if pages:
+                print(f"Lazy extraction parsed {pages.extracted_count} of {len(pages)} pages.")
+                pages.save_to_cache()
+
+    fast_path_stats = llm_parser.get_fast_path_stats()
+    cascade_stats = llm_parser.get_cascade_stats()
+    summary = {
+        "run_id": llm_telemetry.current_run(),
+        "model": model_choice,
+        "resumed": len(finished),
+        "jobs": total_jobs,
+        "malformed": malformed,
+        "fast_path": fast_path,
+        "fast_path_resolved": fast_path_stats["resolved"] - fast_path_before["resolved"],
+        "fast_path_partial": fast_path_stats["partial"] - fast_path_before["partial"],
+        "reuse": reuse,
+        "reused": fingerprint_store.get_stats()["hits"] - reuse_before["hits"],
+        "cascade": {k: cascade_stats[k] - cascade_before[k] for k in cascade_stats} if cascade else None,
+    }
+    if cascade:
+        run_records = llm_telemetry.get_records(summary["run_id"])
+        summary["savings"] = llm_telemetry.estimate_cascade_savings(
+            run_records, llm_parser.resolve_model(first_model)[1], llm_parser.resolve_model(model_choice)[1]
+        )
+    return finalize_report(processed_data), summary
+
+
+def summary_messages(summary):
+    """
+    Turns a run_catalog_report summary into (level, message) pairs, level
+    being "info" or "warning".
+    """
+    messages = []
+    if summary["malformed"]:
+        messages.append(("warning", f"{summary['malformed']} program detail responses could not be read; those rows use fallback values."))
+    if summary["fast_path"]:
+        messages.append(("info", f"Fast path: {summary['fast_path_resolved']} programs resolved without an LLM call, {summary['fast_path_partial']} partially resolved."))
+    if summary["reuse"]:
+        messages.append(("info", f"Reused results for {summary['reused']} program text windows unchanged since an earlier run."))
+    if summary["cascade"]:
+        delta = summary["cascade"]
+        savings = summary["savings"]
+        model_choice = summary["model"]
+        message = (f"Cascade: {delta['escalated']} of {delta['programs']} programs escalated to {model_choice} "
+                   f"({delta['unknown']} unknown, {delta['implausible']} implausible, {delta['disagreed']} of {delta['audited']} audits disagreed). "
+                   f"Est. cost ${savings['actual_cost_usd']:.2f} vs ${savings['all_strong_cost_usd']:.2f} all-{model_choice}")
+        if savings["latency_saved_s"] is not None:
+            message += f"; ~{savings['latency_saved_s']:.0f}s of model time saved"
+        messages.append(("info", message + "."))
+    return messages
+
+
+# ---------------------------------------------------------------------------
+# Truth evaluation
+# ---------------------------------------------------------------------------
+
+# Rows of a ToC or Catalog Report are paired with the validated file on these
+TOC_KEY_COLS = ['Program', 'Catalog Name']
+REPORT_KEY_COLS = ['Program Name', 'Catalog Name']
+
+
+def evaluate_toc(df_truth, df_test):
+    """Scores a ToC against a validated ToC (see evaluation.evaluate). "Program Name" is accepted for "Program"."""
+    df_truth = df_truth.rename(columns={'Program Name': 'Program'})
+    df_test = df_test.rename(columns={'Program Name': 'Program'})
+    return evaluation.evaluate(df_truth, df_test, TOC_KEY_COLS, TOC_COLUMNS)
+
+
+def evaluate_report(df_truth, df_test):
+    """Scores a Catalog Report against a validated one (see evaluation.evaluate)."""
+    return evaluation.evaluate(df_truth, df_test, REPORT_KEY_COLS, REPORT_COLUMNS)
+
+
+# ---------------------------------------------------------------------------
+# Command line
+# ---------------------------------------------------------------------------
+
+def _page_range(value):
+    try:
+        low, high = (int(part) for part in value.split("-"))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected MIN-MAX, got '{value}'")
+    return low, high
+
+
+def _resolve_ranges(args, defaults):
+    ug_min, ug_max, gr_min, gr_max = defaults.get(args.year, (0, 100000, 0, 100000))
+    return args.ug_pages or (ug_min, ug_max), args.gr_pages or (gr_min, gr_max)
+
+
+def _log(message):
+    print(f"[{time.strftime('%H:%M:%S')}] {message}", flush=True)
+
+
+def _run_toc(args):
+    ug_range, gr_range = _resolve_ranges(args, TOC_PAGE_RANGES)
+    _log(f"Extracting ToC pages from {args.ug_toc} and {args.gr_toc}")
+    ug_pages = llm_parser.extract_all_pages(args.ug_toc, workers=args.extract_workers)
+    gr_pages = llm_parser.extract_all_pages(args.gr_toc, workers=args.extract_workers)
+
+    last_log = [0.0]
+
+    def on_program(parsed):
+        if time.monotonic() - last_log[0] > 5:
+            _log(f"Parsed {len(parsed[0]) + len(parsed[1])} ToC entries so far...")
+            last_log[0] = time.monotonic()
+
+    df_toc, counts = generate_toc(ug_pages, gr_pages, args.year, args.model, ug_range, gr_range, parser=args.parser,
+                                  use_cache=not args.no_llm_cache, chunk_pages=args.toc_chunk_pages, on_program=on_program)
+    for step in ("raw", "filtered", "validated"):
+        _log(f"{step.capitalize()}: {counts[step][0]} UG, {counts[step][1]} GR programs")
+    if counts["partial"]:
+        _log(f"Warning: the ToC is partial ({counts['failed_chunks'][0]} UG, {counts['failed_chunks'][1]} GR chunks broke off); run again to retry them")
+
+    out = args.toc_out or f"toc_{year_suffix(args.year)}.xlsx"
+    df_toc.to_excel(out, index=False, sheet_name='ToC')
+    _log(f"Wrote {len(df_toc)} ToC entries to {out}")
+    return out
+
+
+def _run_report(args, toc_file):
+    ug_range, gr_range = _resolve_ranges(args, REPORT_PAGE_RANGES)
+    _log(f"Generating Catalog Report from {toc_file} ({args.model}, {args.year})")
+    progress = {"last": 0.0}
+
+    def on_progress(done, total):
+        if done == total or time.monotonic() - progress["last"] > 10:
+            _log(f"{done}/{total} jobs finished")
+            progress["last"] = time.monotonic()
+
+    df_report, summary = run_catalog_report(
+        toc_file, args.ug, args.gr, args.year, args.model, ug_range, gr_range,
+        lazy=not args.eager, extract_workers=args.extract_workers, use_sections=not args.no_sections,
+        batch_programs=args.batch, use_cache=not args.no_llm_cache, fast_path=not args.no_fast_path,
+        reuse=not args.no_reuse, cascade=args.cascade, audit_rate=args.audit_rate,
+        max_in_flight=args.workers, resume=args.resume, on_progress=on_progress
+    )
+    if summary["resumed"]:
+        _log(f"Resumed: {summary['resumed']} programs were already finished")
+    for level, message in summary_messages(summary):
+        _log(message if level == "info" else f"WARNING: {message}")
+
+    if df_report.empty:
+        _log("No programs found matching the criteria.")
+        return 1
+    out = args.report_out or f"catalog_report_{year_suffix(args.year)}.xlsx"
+    df_report.to_excel(out, index=False, sheet_name='CatalogReport')
+    _log(f"Wrote {len(df_report)} programs to {out}")
+    return 0
+
+
+def _run_evaluate(args):
+    df_truth = pd.read_excel(args.truth)
+    df_test = pd.read_excel(args.test)
+    kind = args.kind
+    if kind == "auto":
+        kind = "report" if all(c in df_truth.columns for c in REPORT_COLUMNS) else "toc"
+    _log(f"Evaluating {args.test} against {args.truth} ({kind})")
+    results = (evaluate_report if kind == "report" else evaluate_toc)(df_truth, df_test)
+    for line in evaluation.summary_lines(results):
+        print(line)
+    if args.out:
+        with pd.ExcelWriter(args.out, engine='openpyxl') as writer:
+            results["field_accuracy"].to_excel(writer, index=False, sheet_name='Field Accuracy')
+            results["mismatches"].to_excel(writer, index=False, sheet_name='Mismatches')
+            results["in_truth_not_test"].to_excel(writer, index=False, sheet_name='Missing')
+            results["in_test_not_truth"].to_excel(writer, index=False, sheet_name='Extra')
+        _log(f"Wrote the evaluation to {args.out}")
+    return 0
+
+
+def build_arg_parser():
+    parser = argparse.ArgumentParser(description="Generate the ToC and Catalog Report without the Streamlit app.")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument("--year", default="2025-2026", help="Academic year, e.g. 2025-2026.")
+    common.add_argument("--model", default=MODEL_CHOICES[0], choices=MODEL_CHOICES)
+    common.add_argument("--ug-pages", type=_page_range, default=None, help="Printed UG page range MIN-MAX (default: the year's usual range).")
+    common.add_argument("--gr-pages", type=_page_range, default=None, help="Printed GR page range MIN-MAX (default: the year's usual range).")
+    common.add_argument("--workers", type=int, default=llm_dispatch.DEFAULT_MAX_IN_FLIGHT, help="Maximum LLM requests in flight.")
+    common.add_argument("--extract-workers", type=int, default=None, help="Processes used for PDF text extraction.")
+    common.add_argument("--cache-dir", default=None, help=f"Cache directory (default: {page_cache.CACHE_ROOT_ENV} or {page_cache.DEFAULT_CACHE_ROOT}).")
+    common.add_argument("--no-llm-cache", action="store_true", help="Always send prompts to the model.")
+
+    toc_args = argparse.ArgumentParser(add_help=False)
+    toc_args.add_argument("--ug-toc", required=True, help="Undergraduate ToC PDF.")
+    toc_args.add_argument("--gr-toc", required=True, help="Graduate ToC PDF.")
+    toc_args.add_argument("--parser", choices=["rules", "llm"], default="rules", help="ToC parser (rules send only ambiguous lines to the LLM).")
+    toc_args.add_argument("--toc-chunk-pages", type=int, default=llm_parser.TOC_CHUNK_PAGES, help="ToC pages per request for the LLM parser.")
+    toc_args.add_argument("--toc-out", default=None, help="ToC xlsx to write (default: toc_<yy><yy>.xlsx).")
+
+    report_args = argparse.ArgumentParser(add_help=False)
+    report_args.add_argument("--ug", default=None, help="Undergraduate catalog PDF.")
+    report_args.add_argument("--gr", default=None, help="Graduate catalog PDF.")
+    report_args.add_argument("--report-out", default=None, help="Catalog Report xlsx to write (default: catalog_report_<yy><yy>.xlsx).")
+    report_args.add_argument("--resume", action="store_true", help="Skip programs already finished by an earlier run with the same inputs.")
+    report_args.add_argument("--eager", action="store_true", help="Extract every catalog page up front instead of on demand.")
+    report_args.add_argument("--no-sections", action="store_true", help="Grow a 1-4 page window instead of using the program section index.")
+    report_args.add_argument("--batch", action="store_true", help="Send several program sections per request.")
+    report_args.add_argument("--no-fast-path", action="store_true", help="Send every program to the LLM, even with explicit credit hours.")
+    report_args.add_argument("--no-reuse", action="store_true", help="Re-analyze programs whose text is unchanged since an earlier run.")
+    report_args.add_argument("--cascade", action="store_true", help=f"Ask {llm_parser.CASCADE_FAST_MODEL} first and escalate to --model when needed.")
+    report_args.add_argument("--audit-rate", type=float, default=llm_parser.DEFAULT_CASCADE_AUDIT_RATE, help="Fraction of cascade results audited by --model.")
+
+    sub.add_parser("toc", parents=[common, toc_args], help="Generate the combined ToC xlsx from the ToC PDFs.")
+    report = sub.add_parser("report", parents=[common, report_args], help="Generate the Catalog Report xlsx from a ToC xlsx.")
+    report.add_argument("--toc", required=True, help="ToC xlsx (from the ToC Generator or the toc command).")
+    sub.add_parser("run", parents=[common, toc_args, report_args], help="Generate the ToC, then the Catalog Report.")
+    evaluate = sub.add_parser("evaluate", help="Score a ToC or Catalog Report xlsx against a validated one.")
+    evaluate.add_argument("--truth", required=True, help="Validated xlsx.")
+    evaluate.add_argument("--test", required=True, help="Generated xlsx to score.")
+    evaluate.add_argument("--kind", choices=["auto", "toc", "report"], default="auto", help="File type (default: a report if the truth file has every report column).")
+    evaluate.add_argument("--out", default=None, help="xlsx to write the field accuracy, mismatches, missing and extra rows to.")
+    return parser
+
+
+def main(argv=None):
+    args = build_arg_parser().parse_args(argv)
+    if args.command == "evaluate":
+        return _run_evaluate(args)
+    if args.cache_dir:
+        os.environ[page_cache.CACHE_ROOT_ENV] = args.cache_dir
+
+    if args.command in ("report", "run") and not args.ug and not args.gr:
+        print("At least one catalog PDF (--ug or --gr) is required.", file=sys.stderr)
+        return 2
+
+    if args.command == "toc":
+        _run_toc(args)
+        return 0
+    if args.command == "report":
+        return _run_report(args, args.toc)
+    return _run_report(args, _run_toc(args))
+
+
+if __name__ == "__main__":
+    import google.generativeai as genai
+    from dotenv import load_dotenv
+
+    load_dotenv()
+    genai.configure(api_key=os.getenv("GOOGLE_API_KEY"))
+    sys.exit(main())
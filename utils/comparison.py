@@ -0,0 +1,179 @@
+import numpy as np
+import pandas as pd
+from pandas.api.types import is_object_dtype, is_string_dtype
+
+from utils import name_matching
+
+# Year-over-year comparison of two Catalog Reports, matched on Program Name.
+# Everything is done with whole-column operations on the merged frame, so the
+# cost grows with the number of columns rather than rows x columns of Python.
+
+KEY_COLS = ['Program Name']
+
+# Always differ between years, so they never make a program "changed"
+IGNORED_COLS = ['Catalog Name', 'Page Number']
+
+# Filled in by the comparison rather than copied from the reports
+CALCULATED_COLS = ['School Reported Approval Status', 'Effective Date', 'Changed Columns', 'Previous Values', 'Match Score', 'Match Reason']
+
+FIRST_COLS = ['Program Name', 'Catalog Name', 'School Reported Approval Status', 'Effective Date']
+
+STATUS_CHANGED = "Changed - Verify"
+STATUS_APPROVED = "Still Approved"
+STATUS_NEW = "New"
+STATUS_REMOVED = "Likely Removed - Verify"
+
+
+def _as_text(series):
+    # str() of every value (NaN -> "nan"), as compared cell by cell
+    if is_string_dtype(series.dtype) and not is_object_dtype(series.dtype):
+        return series.fillna("nan").to_numpy(dtype=object)
+    if isinstance(series.dtype, np.dtype) and series.dtype.kind in "iuf":
+        # numpy formats ints and floats exactly like str(), NaN included
+        return series.to_numpy().astype(str).astype(object)
+    return series.map(str).to_numpy(dtype=object)
+
+
+def _changed_rows(val1, val2):
+    # Positions where the stripped str() of the values differ, skipping
+    # rows where both are missing
+    kind1 = val1.dtype.kind if isinstance(val1.dtype, np.dtype) else None
+    kind2 = val2.dtype.kind if isinstance(val2.dtype, np.dtype) else None
+    if kind1 == kind2 and kind1 in ("i", "u", "f"):
+        # Same numeric type: str() differs exactly when the values do
+        # (signbit tells "-0.0" from "0.0"), no formatting needed
+        a = val1.to_numpy()
+        b = val2.to_numpy()
+        differs = a != b
+        if kind1 == "f":
+            differs = (differs | (np.signbit(a) != np.signbit(b))) & ~(np.isnan(a) & np.isnan(b))
+        return np.flatnonzero(differs)
+
+    text1 = _as_text(val1)
+    text2 = _as_text(val2)
+    candidates = np.flatnonzero((text1 != text2) & ~(val1.isna() & val2.isna()).to_numpy())
+    if not len(candidates):
+        return candidates
+    stripped1 = pd.Series(text1[candidates], dtype=object).str.strip().to_numpy()
+    stripped2 = pd.Series(text2[candidates], dtype=object).str.strip().to_numpy()
+    return candidates[stripped1 != stripped2]
+
+
+def _append_parts(joined, rows, pieces, sep):
+    # Appends pieces to the joined strings of the given rows
+    current = joined[rows]
+    joined[rows] = np.where(current == "", pieces, current + sep + pieces)
+
+
+def _match_renamed_programs(df1, df2, min_score):
+    # Pairs Year 1 only and Year 2 only program names. Returns
+    # {Year 1 name: (Year 2 name, score, reason)}.
+    key = KEY_COLS[0]
+    names1 = df1[key].dropna().astype(str)
+    names2 = df2[key].dropna().astype(str)
+    only1 = names1[~names1.isin(names2)].unique()
+    only2 = names2[~names2.isin(names1)].unique()
+    matches = name_matching.match_names(only1, only2, min_score)
+    return {name1: (name2, score, reason) for name1, name2, score, reason in matches}
+
+
+def compare_reports(df1, df2, term, year2, fuzzy=False, min_score=name_matching.DEFAULT_MIN_SCORE):
+    """
+    Compares a Year 1 and a Year 2 Catalog Report. Programs in both years
+    are "Changed - Verify" when any shared column (other than Catalog Name
+    and Page Number) differs after stripping, otherwise "Still Approved".
+    Year 2 only programs are "New" (effective "<term> <year2>"), Year 1 only
+    programs "Likely Removed - Verify". Changed programs list the Year 2 and
+    Year 1 values of each changed column. Other columns take the Year 2
+    value when there is one.
+    With fuzzy, programs left unmatched by name are paired across years by
+    name similarity (see name_matching.match_names). A renamed program is
+    "Changed - Verify", with the rename listed first in Changed Columns.
+    Match Score and Match Reason columns record how each program was paired.
+    Raises ValueError if either report lacks the key columns.
+    """
+    if not all(k in df1.columns for k in KEY_COLS) or not all(k in df2.columns for k in KEY_COLS):
+        raise ValueError(f"Both files must contain columns: {KEY_COLS}")
+
+    # Renamed Year 1 programs take their Year 2 name so the merge pairs them
+    renamed = {}
+    if fuzzy:
+        renamed = _match_renamed_programs(df1, df2, min_score)
+        if renamed:
+            df1 = df1.copy()
+            df1[KEY_COLS[0]] = df1[KEY_COLS[0]].map(lambda name: renamed[name][0] if name in renamed else name)
+
+    # Suffixes: _y1 for Year 1, _y2 for Year 2
+    merged = pd.merge(df1, df2, on=KEY_COLS, how='outer', suffixes=('_y1', '_y2'), indicator=True)
+    index = merged.index
+    both = (merged['_merge'] == 'both').to_numpy()
+    right_only = (merged['_merge'] == 'right_only').to_numpy()
+    left_only = (merged['_merge'] == 'left_only').to_numpy()
+
+    # Change masks, one per shared column. Only programs in both years can
+    # change, and values are only stripped where they differ as-is.
+    common_cols = [c for c in df1.columns if c in df2.columns and c not in KEY_COLS and c not in IGNORED_COLS]
+    in_both = np.flatnonzero(both)
+    any_changed = np.zeros(len(merged), dtype=bool)
+    changed_columns = np.full(len(merged), "", dtype=object)
+    previous_values = np.full(len(merged), "", dtype=object)
+
+    if fuzzy:
+        # Renames count as a change; exact name matches score 1
+        previous_names = {new: old for old, (new, _, _) in renamed.items()}
+        names = merged[KEY_COLS[0]]
+        rows = np.flatnonzero(both & names.isin(list(previous_names)).to_numpy())
+        new_names = names.iloc[rows].to_numpy(dtype=object)
+        old_names = np.array([previous_names[name] for name in new_names], dtype=object)
+        any_changed[rows] = True
+        _append_parts(changed_columns, rows, np.array([f"{KEY_COLS[0]}: {name}" for name in new_names], dtype=object), ", ")
+        _append_parts(previous_values, rows, np.array([f"{KEY_COLS[0]}: {name}" for name in old_names], dtype=object), "; ")
+
+        match_score = np.where(both, 1.0, np.nan)
+        match_reason = np.where(both, "exact name", "").astype(object)
+        match_score[rows] = [renamed[name][1] for name in old_names]
+        match_reason[rows] = [renamed[name][2] for name in old_names]
+
+    for col in common_cols:
+        val1 = merged[f"{col}_y1"].iloc[in_both]
+        val2 = merged[f"{col}_y2"].iloc[in_both]
+        changed = _changed_rows(val1, val2)
+        if not len(changed):
+            continue
+        rows = in_both[changed]
+        any_changed[rows] = True
+        _append_parts(changed_columns, rows, f"{col}: " + _as_text(val2.iloc[changed]), ", ")
+        _append_parts(previous_values, rows, f"{col}: " + _as_text(val1.iloc[changed]), "; ")
+
+    status = np.select(
+        [both & any_changed, both, right_only, left_only],
+        [STATUS_CHANGED, STATUS_APPROVED, STATUS_NEW, STATUS_REMOVED],
+        default=""
+    )
+
+    result = {k: merged[k] for k in KEY_COLS}
+    result['School Reported Approval Status'] = pd.Series(status, index=index, dtype=object)
+    result['Effective Date'] = pd.Series(np.where(right_only, f"{term} {year2}", ""), index=index, dtype=object)
+    result['Changed Columns'] = pd.Series(changed_columns, index=index)
+    result['Previous Values'] = pd.Series(previous_values, index=index)
+    if fuzzy:
+        result['Match Score'] = pd.Series(match_score, index=index)
+        result['Match Reason'] = pd.Series(match_reason, index=index)
+
+    # Other columns, preferring Year 2 and falling back to Year 1 for
+    # programs that are only in Year 1
+    all_cols = list(df2.columns) + [c for c in df1.columns if c not in df2.columns]
+    for col in all_cols:
+        if col in KEY_COLS or col in CALCULATED_COLS:
+            continue
+        if col in df1.columns and col in df2.columns:
+            result[col] = merged[f"{col}_y2"].where(~left_only, merged[f"{col}_y1"])
+        else:
+            result[col] = merged[col]
+
+    df_result = pd.DataFrame(result, index=index)
+
+    # Keys and Status first
+    first_cols = [c for c in FIRST_COLS if c in df_result.columns]
+    other_cols = [c for c in df_result.columns if c not in first_cols]
+    return df_result[first_cols + other_cols]
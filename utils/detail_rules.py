@@ -0,0 +1,90 @@
+import re
+import unicodedata
+
+# Lines that state a program's official credit hour total, as printed in both
+# catalog years: "TOTAL DEGREE HOURS: 120", "TOTAL MINOR HOURS: 18",
+# "Total Minimum Hours - 72 hours post-bachelor's",
+# "Curriculum Requirements (12 Credit Hours)"
+_COMMON_TOTAL_PATTERNS = [
+    r"total\s*(?:degree|minor|certificate|program|minimum)?\s*(?:credit\s*)?hours\s*[:\-–]\s*(\d{1,3})\b",
+    r"curriculum\s*requirements\s*\(\s*(\d{1,3})\s*credit\s*hours\s*\)",
+]
+
+# The 2025-2026 catalog also phrases totals as sentences
+_TOTAL_PATTERNS_2526 = _COMMON_TOTAL_PATTERNS + [
+    r"post-?\s*bachelor['’]?s\s*minimum\s*hours\s*[:\-–]?\s*(\d{1,3})\b",
+    r"(?:program|certificate|degree)\s*requires\s*(?:a\s*(?:total|minimum)\s*of\s*)?(\d{1,3})\s*(?:total\s*)?credit\s*hours",
+]
+
+TOTAL_PATTERNS = {
+    "2024-2025": [re.compile(p, re.IGNORECASE) for p in _COMMON_TOTAL_PATTERNS],
+    "2025-2026": [re.compile(p, re.IGNORECASE) for p in _TOTAL_PATTERNS_2526],
+}
+
+# Wording that means a field needs reading in context. When none of it
+# appears, the prompt's default answer applies.
+_NOT_ACCREDITED = re.compile(r"not\s+accredited|pending\s+accreditation|accreditation\s+(?:is\s+)?pending", re.IGNORECASE)
+_LICENSURE = re.compile(r"licens|certification|certified|board\s+exam|\bCPA\b|NCLEX", re.IGNORECASE)
+_ONLINE = re.compile(r"online|on-line|hybrid|distance|both\s+formats", re.IGNORECASE)
+_CONCENTRATION = re.compile(r"concentration", re.IGNORECASE)
+
+
+def _normalize(text):
+    # pypdf keeps ligatures such as "ﬁ" in "Certiﬁcation"
+    return unicodedata.normalize("NFKC", text or "")
+
+
+def _patterns_for(academic_year):
+    if "2024-2025" in academic_year:
+        return TOTAL_PATTERNS["2024-2025"]
+    return TOTAL_PATTERNS["2025-2026"]
+
+
+def find_total_credit_hours(text, academic_year="2025-2026"):
+    """
+    Returns the program's total credit hours as a string when the text
+    states exactly one total (post-master totals are ignored when a
+    post-bachelor total is also given), or None when there is no explicit
+    total or the stated totals disagree.
+    """
+    text = _normalize(text)
+    if not text:
+        return None
+
+    values = set()
+    post_master = set()
+    for pattern in _patterns_for(academic_year):
+        for match in pattern.finditer(text):
+            value = int(match.group(1))
+            if value <= 0:
+                continue
+            following = text[match.end():match.end() + 40].lower()
+            if "post-master" in following or "post master" in following:
+                post_master.add(value)
+            else:
+                values.add(value)
+
+    if not values:
+        values = post_master
+    if len(values) != 1:
+        return None
+    return str(values.pop())
+
+
+def detect_accredited(text):
+    """Returns "Yes" unless the text mentions a missing or pending accreditation (None)."""
+    return None if _NOT_ACCREDITED.search(_normalize(text)) else "Yes"
+
+
+def detect_license_prep(text):
+    """Returns "No" when the text never mentions licensure (None otherwise)."""
+    return None if _LICENSURE.search(_normalize(text)) else "No"
+
+
+def detect_modality(text):
+    """Returns "Resident" when the text never mentions online or hybrid delivery (None otherwise)."""
+    return None if _ONLINE.search(_normalize(text)) else "Resident"
+
+
+def mentions_concentrations(text):
+    return bool(_CONCENTRATION.search(_normalize(text)))
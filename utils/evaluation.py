@@ -0,0 +1,155 @@
+import numpy as np
+import pandas as pd
+
+# Scores a generated ToC or Catalog Report against a validated ("truth")
+# file. Rows are paired by one outer join on a normalized key (program and
+# catalog names, lower-cased, punctuation dropped), then every other column
+# is compared on the paired rows. A wrong Page Number shows up as one wrong
+# field on a paired program, not as one missing and one extra program.
+
+_KEY_SEP = "\x1f"
+
+
+def normalize_values(series):
+    """Stripped str() of each value without a trailing ".0" (146.0 -> "146"); missing values are ""."""
+    text = series.astype(str).str.strip().str.replace(r"\.0$", "", regex=True)
+    return text.where(series.notna(), "")
+
+
+def normalize_keys(series):
+    """Key text: NFKC, lower-cased, "&" as "and", punctuation and extra spaces dropped."""
+    text = normalize_values(series).str.normalize("NFKC").str.lower().str.replace("&", " and ", regex=False)
+    return text.str.replace(r"[^a-z0-9]+", " ", regex=True).str.strip()
+
+
+def _normalized_column(series):
+    # normalize_keys over the distinct values only (a catalog name repeats
+    # on every row)
+    codes, uniques = pd.factorize(series, use_na_sentinel=False)
+    return normalize_keys(pd.Series(uniques, dtype=object)).to_numpy(dtype=object)[codes]
+
+
+def _keys(df, key_cols):
+    # Normalized key per row. Repeats of a key are numbered (the first is
+    # not), so a key listed twice pairs in order.
+    key = pd.Series(_normalized_column(df[key_cols[0]]), dtype=object)
+    for col in key_cols[1:]:
+        key = key + _KEY_SEP + _normalized_column(df[col])
+    repeats = key.duplicated()
+    if repeats.any():
+        codes, _ = pd.factorize(key)
+        occurrence = pd.Series(codes).groupby(codes).cumcount().astype(str)
+        key = key.where(~repeats, key + _KEY_SEP + occurrence)
+    return key.to_numpy()
+
+
+def _wrong(expected, actual):
+    # Positions where the normalized values differ. Values equal as-is are
+    # equal after normalizing, so only the others are normalized.
+    same = (expected == actual) | (pd.isna(expected) & pd.isna(actual))
+    candidates = np.flatnonzero(~same)
+    wrong = np.zeros(len(expected), dtype=bool)
+    if len(candidates):
+        a = normalize_values(pd.Series(expected[candidates], dtype=object)).to_numpy(dtype=object)
+        b = normalize_values(pd.Series(actual[candidates], dtype=object)).to_numpy(dtype=object)
+        wrong[candidates] = a != b
+    return wrong
+
+
+def _ratio(part, whole):
+    return part / whole if whole else 0.0
+
+
+def evaluate(df_truth, df_test, key_cols, fields):
+    """
+    Compares a test file with a truth file. Rows are paired on key_cols
+    (normalized, see normalize_keys) and the fields are compared after
+    normalize_values. Returns a dict with:
+      truth_rows, test_rows: row counts
+      paired: rows whose key is in both files
+      matches: paired rows with every field equal
+      precision, recall: matches / test_rows and matches / truth_rows
+      key_precision, key_recall: paired / test_rows and paired / truth_rows
+      field_accuracy: DataFrame of Column, Correct, Wrong, Accuracy over
+        the paired rows
+      mismatches: DataFrame of the key columns, Column, Truth and Test (the
+        normalized values compared), one row per wrong field
+      in_truth_not_test, in_test_not_truth: the unpaired rows of each file
+    Raises ValueError if either file lacks one of the columns.
+    """
+    columns = list(key_cols) + [f for f in fields if f not in key_cols]
+    for label, df in (("Truth", df_truth), ("Test", df_test)):
+        missing = [c for c in columns if c not in df.columns]
+        if missing:
+            raise ValueError(f"{label} file is missing required columns: {missing}")
+    truth = df_truth[columns].reset_index(drop=True)
+    test = df_test[columns].reset_index(drop=True)
+    fields = columns[len(key_cols):]
+
+    # One outer join of the two files on the key
+    left = pd.DataFrame({"key": _keys(truth, key_cols), "truth_row": np.arange(len(truth))})
+    right = pd.DataFrame({"key": _keys(test, key_cols), "test_row": np.arange(len(test))})
+    merged = pd.merge(left, right, on="key", how="outer", indicator=True)
+    both = merged["_merge"] == "both"
+    truth_rows = merged.loc[both, "truth_row"].astype(np.int64).to_numpy()
+    test_rows = merged.loc[both, "test_row"].astype(np.int64).to_numpy()
+    order = np.argsort(truth_rows, kind="stable")
+    truth_rows, test_rows = truth_rows[order], test_rows[order]
+
+    all_equal = np.ones(len(truth_rows), dtype=bool)
+    accuracy = []
+    mismatch_parts = []
+    for position, field in enumerate(fields):
+        expected = truth[field].to_numpy(dtype=object)[truth_rows]
+        actual = test[field].to_numpy(dtype=object)[test_rows]
+        wrong = _wrong(expected, actual)
+        all_equal &= ~wrong
+        correct = len(wrong) - int(wrong.sum())
+        accuracy.append((field, correct, int(wrong.sum()), _ratio(correct, len(wrong))))
+        if wrong.any():
+            rows = np.flatnonzero(wrong)
+            part = truth.loc[truth_rows[rows], key_cols].reset_index(drop=True)
+            part["Column"] = field
+            part["Truth"] = normalize_values(pd.Series(expected[rows], dtype=object)).to_numpy(dtype=object)
+            part["Test"] = normalize_values(pd.Series(actual[rows], dtype=object)).to_numpy(dtype=object)
+            part["_order"] = truth_rows[rows] * len(fields) + position
+            mismatch_parts.append(part)
+
+    if mismatch_parts:
+        mismatches = pd.concat(mismatch_parts, ignore_index=True).sort_values("_order", kind="stable")
+        mismatches = mismatches.drop(columns="_order").reset_index(drop=True)
+    else:
+        mismatches = pd.DataFrame(columns=list(key_cols) + ["Column", "Truth", "Test"])
+
+    only_truth = np.sort(merged.loc[merged["_merge"] == "left_only", "truth_row"].astype(np.int64).to_numpy())
+    only_test = np.sort(merged.loc[merged["_merge"] == "right_only", "test_row"].astype(np.int64).to_numpy())
+    matches = int(all_equal.sum())
+    paired = len(truth_rows)
+    return {
+        "truth_rows": len(truth),
+        "test_rows": len(test),
+        "paired": paired,
+        "matches": matches,
+        "precision": _ratio(matches, len(test)),
+        "recall": _ratio(matches, len(truth)),
+        "key_precision": _ratio(paired, len(test)),
+        "key_recall": _ratio(paired, len(truth)),
+        "field_accuracy": pd.DataFrame(accuracy, columns=["Column", "Correct", "Wrong", "Accuracy"]),
+        "mismatches": mismatches,
+        "in_truth_not_test": truth.iloc[only_truth].reset_index(drop=True),
+        "in_test_not_truth": test.iloc[only_test].reset_index(drop=True),
+    }
+
+
+def summary_lines(results):
+    """Human-readable lines of an evaluate() result, for logs and the CLI."""
+    lines = [
+        f"Truth rows: {results['truth_rows']}, test rows: {results['test_rows']}, paired: {results['paired']}, "
+        f"fully matching: {results['matches']}",
+        f"Precision {results['precision']:.1%}, recall {results['recall']:.1%} "
+        f"(programs found: precision {results['key_precision']:.1%}, recall {results['key_recall']:.1%})",
+        f"Missing from test: {len(results['in_truth_not_test'])}, extra in test: {len(results['in_test_not_truth'])}",
+    ]
+    for row in results["field_accuracy"].itertuples(index=False):
+        lines.append(f"  {row.Column}: {row.Accuracy:.1%} correct ({row.Wrong} wrong)")
+    return lines
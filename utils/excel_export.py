@@ -0,0 +1,124 @@
+import functools
+import hashlib
+import io
+import json
+import os
+import threading
+from collections import OrderedDict
+
+import pandas as pd
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Font
+
+# Excel bytes for the download buttons. Pages pass download_data(...) to
+# st.download_button, so a workbook is only written when the button is
+# clicked, not on every rerun. The bytes are kept per content hash of the
+# frame, so clicking again (or a rerun that did not change the data) reuses
+# them. Large frames are written with openpyxl's write-only mode, which
+# streams rows instead of building every cell in memory.
+
+# Frames with at least this many cells use the write-only backend
+STREAMING_MIN_CELLS = int(os.getenv("OVS_EXPORT_STREAMING_CELLS", "100000"))
+MAX_CACHE_BYTES = int(float(os.getenv("OVS_EXPORT_CACHE_MAX_MB", "64")) * 1024 * 1024)
+
+XLSX_MIME = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
+_lock = threading.Lock()
+_cache = OrderedDict()
+_stats = {"hits": 0, "misses": 0, "streamed": 0}
+
+
+def frame_hash(df):
+    """
+    Returns a content hash of a DataFrame: its columns, its values (by
+    pandas' row hashes) and the kinds of values in each object column, so
+    12 and "12" in an otherwise identical column hash differently.
+    """
+    digest = hashlib.sha256()
+    kinds = [pd.api.types.infer_dtype(df[c], skipna=True) if df[c].dtype == object else str(df[c].dtype) for c in df.columns]
+    digest.update(json.dumps([[str(c) for c in df.columns], kinds]).encode("utf-8"))
+    digest.update(pd.util.hash_pandas_object(df, index=False).to_numpy().tobytes())
+    return digest.hexdigest()
+
+
+def _write_pandas(df, sheet_name):
+    output = io.BytesIO()
+    with pd.ExcelWriter(output, engine='openpyxl') as writer:
+        df.to_excel(writer, index=False, sheet_name=sheet_name)
+    return output.getvalue()
+
+
+def _write_streaming(df, sheet_name):
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet(sheet_name)
+    header = []
+    for col in df.columns:
+        cell = WriteOnlyCell(ws, value=str(col))
+        cell.font = Font(bold=True)
+        header.append(cell)
+    ws.append(header)
+
+    values = df.astype(object)
+    values = values.where(values.notna(), None)
+    for row in values.itertuples(index=False, name=None):
+        ws.append(row)
+
+    output = io.BytesIO()
+    wb.save(output)
+    return output.getvalue()
+
+
+def to_excel_bytes(df, sheet_name="Sheet1"):
+    """
+    Returns the .xlsx bytes of a DataFrame (one sheet, no index), reusing
+    the bytes written earlier for identical content.
+    """
+    key = (frame_hash(df), sheet_name)
+    with _lock:
+        if key in _cache:
+            _cache.move_to_end(key)
+            _stats["hits"] += 1
+            return _cache[key]
+        _stats["misses"] += 1
+
+    streaming = df.size >= STREAMING_MIN_CELLS
+    data = _write_streaming(df, sheet_name) if streaming else _write_pandas(df, sheet_name)
+
+    with _lock:
+        if streaming:
+            _stats["streamed"] += 1
+        _cache[key] = data
+        _cache.move_to_end(key)
+        total = sum(len(v) for v in _cache.values())
+        while total > MAX_CACHE_BYTES and len(_cache) > 1:
+            _, evicted = _cache.popitem(last=False)
+            total -= len(evicted)
+    return data
+
+
+def download_data(df, sheet_name="Sheet1"):
+    """A callable for st.download_button's data, writing the workbook only when clicked."""
+    return functools.partial(to_excel_bytes, df, sheet_name)
+
+
+def clear_cache():
+    """Drops every cached workbook."""
+    with _lock:
+        _cache.clear()
+
+
+def get_stats():
+    """Returns hit/miss counters, the number of streamed workbooks, and the cache's entries and size."""
+    with _lock:
+        stats = dict(_stats)
+        stats["entries"] = len(_cache)
+        stats["bytes"] = sum(len(v) for v in _cache.values())
+    return stats
+
+
+def reset_stats():
+    """Resets the in-process counters."""
+    with _lock:
+        for k in _stats:
+            _stats[k] = 0
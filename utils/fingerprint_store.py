@@ -0,0 +1,151 @@
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+
+from utils import page_cache
+
+# Program results keyed by a fingerprint of the program's normalized text.
+# Unlike the LLM response cache (keyed by the exact prompt), a fingerprint
+# survives the things that change every year without changing the program:
+# running headers, the academic year, page numbers and whitespace.
+
+_lock = threading.Lock()
+_stats = {"hits": 0, "misses": 0, "writes": 0}
+_initialized_paths = set()
+
+_ACADEMIC_YEAR = re.compile(r"\b(?:19|20)\d{2}\s*[-–]\s*(?:19|20)?\d{2}\b")
+_CATALOG_HEADER = re.compile(r"usf\s+(?:undergraduate|graduate)\s+catalog|university of south florida\s+(?:undergraduate|graduate)?\s*catalog")
+_PAGE_NUMBER_LINE = re.compile(r"^\s*(?:page\s*)?\d{1,4}\s*$", re.MULTILINE)
+
+
+def _db_path():
+    return os.path.join(page_cache.get_cache_root(), "program_fingerprints.sqlite")
+
+
+def _connect():
+    path = _db_path()
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    conn = sqlite3.connect(path, timeout=30)
+    if path not in _initialized_paths:
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS programs (
+                fingerprint TEXT PRIMARY KEY,
+                program TEXT,
+                details TEXT,
+                model TEXT,
+                academic_year TEXT,
+                created REAL
+            )
+        """)
+        conn.commit()
+        _initialized_paths.add(path)
+    return conn
+
+
+def normalize_text(text):
+    """
+    Reduces program text to what matters for its details: NFKC folded,
+    lower-cased, without academic years, catalog running headers or bare
+    page-number lines, and with whitespace collapsed.
+    """
+    text = unicodedata.normalize("NFKC", text or "").lower()
+    text = _ACADEMIC_YEAR.sub(" ", text)
+    text = _CATALOG_HEADER.sub(" ", text)
+    text = _PAGE_NUMBER_LINE.sub(" ", text)
+    return " ".join(text.split())
+
+
+def fingerprint(text, program_name, catalog_type, model_name="", criteria=""):
+    """
+    Returns the fingerprint of a program's text window. The API model name
+    and the criteria the details are read with are part of it, so another
+    model or another year's rules never get a stored result.
+    """
+    raw = json.dumps({
+        "program": " ".join(unicodedata.normalize("NFKC", program_name or "").lower().split()),
+        "catalog_type": catalog_type,
+        "text": normalize_text(text),
+        "model": model_name,
+        "criteria": hashlib.sha256((criteria or "").encode("utf-8")).hexdigest(),
+    }, sort_keys=True)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def get(fp):
+    """Returns the stored details dict for the fingerprint, or None."""
+    with _lock:
+        try:
+            conn = _connect()
+            try:
+                row = conn.execute("SELECT details FROM programs WHERE fingerprint = ?", (fp,)).fetchone()
+            finally:
+                conn.close()
+        except sqlite3.Error as e:
+            print(f"Warning: fingerprint store read failed: {e}")
+            row = None
+
+        if row is None:
+            _stats["misses"] += 1
+            return None
+        _stats["hits"] += 1
+        return json.loads(row[0])
+
+
+def put(fp, program_name, details, model_name="", academic_year="", replace=True):
+    """
+    Stores the details for a fingerprint. An existing entry is replaced,
+    or kept when replace is False.
+    """
+    with _lock:
+        try:
+            conn = _connect()
+            try:
+                cursor = conn.execute(
+                    f"INSERT OR {'REPLACE' if replace else 'IGNORE'} INTO programs (fingerprint, program, details, model, academic_year, created) VALUES (?, ?, ?, ?, ?, ?)",
+                    (fp, program_name, json.dumps(details), model_name, academic_year, time.time())
+                )
+                conn.commit()
+                _stats["writes"] += cursor.rowcount
+            finally:
+                conn.close()
+        except sqlite3.Error as e:
+            print(f"Warning: fingerprint store write failed: {e}")
+
+
+def clear():
+    """Removes every stored program result."""
+    with _lock:
+        conn = _connect()
+        try:
+            conn.execute("DELETE FROM programs")
+            conn.commit()
+        finally:
+            conn.close()
+
+
+def get_stats():
+    """Returns hit/miss counters for this process and the number of stored programs."""
+    with _lock:
+        stats = dict(_stats)
+        try:
+            conn = _connect()
+            try:
+                stats["entries"] = conn.execute("SELECT COUNT(*) FROM programs").fetchone()[0]
+            finally:
+                conn.close()
+        except sqlite3.Error:
+            stats["entries"] = 0
+    return stats
+
+
+def reset_stats():
+    """Resets the in-process hit/miss counters."""
+    with _lock:
+        for k in _stats:
+            _stats[k] = 0
@@ -0,0 +1,331 @@
+import datetime
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+from utils import comparison, page_cache
+
+# Catalog Reports of every academic year, ingested once into SQLite so that
+# multi-year questions ("what changed for this program", "which programs'
+# credit hours changed since 2024-2025") are indexed queries instead of one
+# manual comparison per pair of uploaded years.
+#
+# Cells are stored one row per (year, program, column) as canonical values:
+# text stripped, missing values as NULL, numbers written as text read as
+# numbers and whole floats as integers, so a value read back as "12" or
+# 12.0 in one year and 12 in another is not a change.
+
+_lock = threading.Lock()
+_initialized_paths = set()
+
+_ACADEMIC_YEAR = re.compile(r"\b((?:19|20)\d{2})\s*[-–]\s*((?:19|20)\d{2})\b")
+# Plain decimal numbers; codes with leading zeros ("0101") stay text
+_NUMBER = re.compile(r"[+-]?(?:0|[1-9]\d*)(?:\.\d+)?")
+
+
+def _db_path():
+    return os.getenv("OVS_HISTORY_DB") or os.path.join(page_cache.get_cache_root(), "catalog_history.sqlite")
+
+
+def _connect():
+    path = _db_path()
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    conn = sqlite3.connect(path, timeout=30)
+    if path not in _initialized_paths:
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.executescript("""
+            CREATE TABLE IF NOT EXISTS years (
+                academic_year TEXT PRIMARY KEY,
+                columns TEXT,
+                source TEXT,
+                programs INTEGER,
+                ingested REAL
+            );
+            CREATE TABLE IF NOT EXISTS programs (
+                academic_year TEXT,
+                program TEXT,
+                position INTEGER,
+                PRIMARY KEY (academic_year, program)
+            );
+            CREATE TABLE IF NOT EXISTS cells (
+                program TEXT,
+                field TEXT,
+                academic_year TEXT,
+                value,
+                PRIMARY KEY (program, field, academic_year)
+            );
+            CREATE INDEX IF NOT EXISTS cells_by_field ON cells (field, academic_year);
+            CREATE INDEX IF NOT EXISTS cells_by_year ON cells (academic_year);
+        """)
+        conn.commit()
+        _initialized_paths.add(path)
+    return conn
+
+
+def canonical_value(value):
+    """The stored form of a cell: None when missing, "12" and 12.0 -> 12, text stripped."""
+    if value is None or (not isinstance(value, str) and pd.isna(value)):
+        return None
+    if isinstance(value, str):
+        value = value.strip()
+        if not _NUMBER.fullmatch(value):
+            return value
+        value = float(value)
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    if isinstance(value, (int, float)):
+        return value
+    return str(value).strip()
+
+
+def detect_academic_year(df):
+    """
+    Returns the academic year named most often in a report's Catalog Name
+    column ("USF Undergraduate 2024-2025" -> "2024-2025"), or None.
+    """
+    if 'Catalog Name' not in df.columns:
+        return None
+    years = df['Catalog Name'].dropna().astype(str).str.extract(_ACADEMIC_YEAR).dropna()
+    if years.empty:
+        return None
+    return (years[0] + "-" + years[1]).mode().iloc[0]
+
+
+def following_year(academic_year):
+    """"2025-2026" -> "2026-2027"."""
+    y1, y2 = academic_year.split('-')
+    return f"{int(y1) + 1}-{int(y2) + 1}"
+
+
+def current_year(today=None):
+    """The academic year in progress, starting each August: 2025-10-01 -> "2025-2026"."""
+    today = today or datetime.date.today()
+    start = today.year if today.month >= 8 else today.year - 1
+    return f"{start}-{start + 1}"
+
+
+def year_options(today=None):
+    """
+    Academic years to offer for comparison: every stored year plus the two
+    years before the current one through the next, oldest first.
+    """
+    options = {current_year(today)}
+    for _ in range(2):
+        y1, y2 = min(options).split('-')
+        options.add(f"{int(y1) - 1}-{int(y2) - 1}")
+    options.add(following_year(max(options)))
+    return sorted(options | set(years()))
+
+
+def ingest(df, academic_year, source=""):
+    """
+    Stores a Catalog Report as the given academic year, replacing whatever
+    that year held. A program name listed twice keeps its first row.
+    Returns the number of programs stored.
+    Raises ValueError if the report lacks the key columns.
+    """
+    key = comparison.KEY_COLS[0]
+    if key not in df.columns:
+        raise ValueError(f"Report must contain columns: {comparison.KEY_COLS}")
+
+    df = df[df[key].notna()].copy()
+    df[key] = df[key].astype(str).str.strip()
+    df = df.drop_duplicates(subset=key, keep='first')
+    fields = [c for c in df.columns if c != key]
+
+    names = df[key].tolist()
+    program_rows = [(academic_year, name, position) for position, name in enumerate(names)]
+    cell_rows = [
+        (name, field, academic_year, canonical_value(value))
+        for field in fields
+        for name, value in zip(names, df[field].tolist())
+    ]
+
+    with _lock:
+        conn = _connect()
+        try:
+            with conn:
+                conn.execute("DELETE FROM cells WHERE academic_year = ?", (academic_year,))
+                conn.execute("DELETE FROM programs WHERE academic_year = ?", (academic_year,))
+                conn.executemany("INSERT INTO programs (academic_year, program, position) VALUES (?, ?, ?)", program_rows)
+                conn.executemany("INSERT INTO cells (program, field, academic_year, value) VALUES (?, ?, ?, ?)", cell_rows)
+                conn.execute(
+                    "INSERT OR REPLACE INTO years (academic_year, columns, source, programs, ingested) VALUES (?, ?, ?, ?, ?)",
+                    (academic_year, json.dumps(list(df.columns)), source, len(names), time.time())
+                )
+        finally:
+            conn.close()
+    return len(names)
+
+
+def remove_year(academic_year):
+    """Deletes one academic year from the history."""
+    with _lock:
+        conn = _connect()
+        try:
+            with conn:
+                conn.execute("DELETE FROM cells WHERE academic_year = ?", (academic_year,))
+                conn.execute("DELETE FROM programs WHERE academic_year = ?", (academic_year,))
+                conn.execute("DELETE FROM years WHERE academic_year = ?", (academic_year,))
+        finally:
+            conn.close()
+
+
+def clear():
+    """Removes every stored year."""
+    with _lock:
+        conn = _connect()
+        try:
+            with conn:
+                conn.execute("DELETE FROM cells")
+                conn.execute("DELETE FROM programs")
+                conn.execute("DELETE FROM years")
+        finally:
+            conn.close()
+
+
+def _query(sql, params=()):
+    with _lock:
+        conn = _connect()
+        try:
+            return conn.execute(sql, params).fetchall()
+        finally:
+            conn.close()
+
+
+def years():
+    """Returns the stored academic years, oldest first."""
+    return [row[0] for row in _query("SELECT academic_year FROM years ORDER BY academic_year")]
+
+
+def fields():
+    """Returns the report columns stored in any year, other than the key and the columns that change every year."""
+    skip = comparison.KEY_COLS + comparison.IGNORED_COLS
+    stored = []
+    for (columns,) in _query("SELECT columns FROM years ORDER BY academic_year"):
+        stored.extend(c for c in json.loads(columns) if c not in skip and c not in stored)
+    return stored
+
+
+def summary():
+    """Returns a DataFrame of the stored years with their program counts, sources and ingest times."""
+    rows = _query("SELECT academic_year, programs, source, ingested FROM years ORDER BY academic_year")
+    df = pd.DataFrame(rows, columns=['Academic Year', 'Programs', 'Source', 'Ingested'])
+    df['Ingested'] = pd.to_datetime(df['Ingested'], unit='s')
+    return df
+
+
+def load_year(academic_year):
+    """
+    Returns a stored year as a Catalog Report DataFrame, in its original row
+    and column order, with canonical values (missing values as NaN).
+    Raises KeyError if the year is not stored.
+    """
+    key = comparison.KEY_COLS[0]
+    with _lock:
+        conn = _connect()
+        try:
+            meta = conn.execute("SELECT columns FROM years WHERE academic_year = ?", (academic_year,)).fetchone()
+            if meta is None:
+                raise KeyError(academic_year)
+            names = [row[0] for row in conn.execute(
+                "SELECT program FROM programs WHERE academic_year = ? ORDER BY position", (academic_year,)
+            )]
+            cells = conn.execute("SELECT program, field, value FROM cells WHERE academic_year = ?", (academic_year,)).fetchall()
+        finally:
+            conn.close()
+
+    values = {}
+    for program, field, value in cells:
+        values.setdefault(field, {})[program] = value
+    columns = json.loads(meta[0])
+    data = {col: names if col == key else [values.get(col, {}).get(name) for name in names] for col in columns}
+    return pd.DataFrame(data, columns=columns, dtype=object).fillna(np.nan)
+
+
+def program_history(program):
+    """
+    Returns one row per stored year the program appears in, oldest first,
+    with an Academic Year column followed by the report columns.
+    """
+    key = comparison.KEY_COLS[0]
+    rows = _query("SELECT academic_year, field, value FROM cells WHERE program = ?", (program,))
+    if not rows:
+        return pd.DataFrame(columns=['Academic Year', key])
+    df = pd.DataFrame(rows, columns=['Academic Year', 'field', 'value'])
+    wide = df.pivot(index='Academic Year', columns='field', values='value').sort_index()
+    wide.columns.name = None
+    wide.insert(0, key, program)
+    return wide.reset_index()
+
+
+def changes(program=None, field=None, since=None, include_ignored=False):
+    """
+    Returns the column changes between consecutive stored years of each
+    program: Program Name, Column, Previous Year, Academic Year, Previous
+    Value, Value. Each year is compared with the previous year the program
+    appears in.
+    program and field narrow the search to one program or one column.
+    since keeps only changes made after that year. Catalog Name and Page
+    Number change every year and are skipped unless include_ignored.
+    """
+    where = []
+    params = []
+    if program is not None:
+        where.append("program = ?")
+        params.append(program)
+    if field is not None:
+        where.append("field = ?")
+        params.append(field)
+    elif not include_ignored:
+        where.append(f"field NOT IN ({', '.join('?' for _ in comparison.IGNORED_COLS)})")
+        params.extend(comparison.IGNORED_COLS)
+    if since is not None:
+        # The since year itself is the baseline, not a change
+        where.append("academic_year >= ?")
+        params.append(since)
+
+    sql = f"""
+        SELECT program, field, previous_year, academic_year, previous_value, value FROM (
+            SELECT program, field, academic_year, value,
+                   LAG(academic_year) OVER w AS previous_year,
+                   LAG(value) OVER w AS previous_value
+            FROM cells
+            {"WHERE " + " AND ".join(where) if where else ""}
+            WINDOW w AS (PARTITION BY program, field ORDER BY academic_year)
+        )
+        WHERE previous_year IS NOT NULL AND value IS NOT previous_value
+        ORDER BY program, academic_year, field
+    """
+    rows = _query(sql, params)
+    return pd.DataFrame(rows, columns=[comparison.KEY_COLS[0], 'Column', 'Previous Year', 'Academic Year', 'Previous Value', 'Value'])
+
+
+def timeline(academic_years=None, term="Fall", fuzzy=False, min_score=None):
+    """
+    Compares each stored year with the next (see comparison.compare_reports)
+    and stacks the results, with Previous Year and Academic Year columns
+    first. Defaults to every stored year.
+    Raises ValueError with fewer than two years.
+    """
+    academic_years = sorted(academic_years if academic_years is not None else years())
+    if len(academic_years) < 2:
+        raise ValueError("A timeline needs at least two stored years.")
+
+    options = {} if min_score is None else {"min_score": min_score}
+    frames = []
+    previous = load_year(academic_years[0])
+    for year1, year2 in zip(academic_years, academic_years[1:]):
+        current = load_year(year2)
+        result = comparison.compare_reports(previous, current, term, year2, fuzzy=fuzzy, **options)
+        result.insert(0, 'Academic Year', year2)
+        result.insert(0, 'Previous Year', year1)
+        frames.append(result)
+        previous = current
+    return pd.concat(frames, ignore_index=True)
@@ -0,0 +1,75 @@
+import ast
+import json
+import re
+
+_CODE_FENCE = re.compile(r"^\s*```(?:json)?\s*|\s*```\s*$", re.IGNORECASE)
+_TRAILING_COMMA = re.compile(r",\s*([}\]])")
+_SMART_QUOTES = str.maketrans({"“": '"', "”": '"', "‘": "'", "’": "'"})
+
+
+def _outer_json(text):
+    # Drop any chatter around the outermost object (or array). Returns the
+    # text from the first bracket to the last one, and from the first bracket
+    # to the end (for responses cut off mid-object).
+    starts = [i for i in (text.find("{"), text.find("[")) if i >= 0]
+    if not starts:
+        return text, text
+    start = min(starts)
+    end = max(text.rfind("}"), text.rfind("]"))
+    return (text[start:end + 1] if end > start else text[start:]), text[start:]
+
+
+def _close_brackets(text):
+    # Close objects/arrays left open by a truncated response
+    stack = []
+    in_string = False
+    escaped = False
+    for ch in text:
+        if in_string:
+            if escaped:
+                escaped = False
+            elif ch == "\\":
+                escaped = True
+            elif ch == '"':
+                in_string = False
+        elif ch == '"':
+            in_string = True
+        elif ch in "{[":
+            stack.append("}" if ch == "{" else "]")
+        elif ch in "}]" and stack:
+            stack.pop()
+    if in_string:
+        text += '"'
+    return text + "".join(reversed(stack))
+
+
+def loads(text):
+    """
+    Parses a model's JSON response, repairing common near-misses: code
+    fences, text around the JSON, smart quotes, trailing commas, single
+    quotes / Python literals and unclosed brackets.
+    Returns (data, repaired). Raises ValueError when nothing parses.
+    """
+    if text is None or not str(text).strip():
+        raise ValueError("Empty response")
+    try:
+        return json.loads(text), False
+    except (TypeError, ValueError):
+        pass
+
+    candidate = _CODE_FENCE.sub("", str(text)).translate(_SMART_QUOTES).strip()
+    trimmed, truncated = _outer_json(candidate)
+    for attempt in (trimmed, _close_brackets(truncated.rstrip().rstrip(","))):
+        attempt = _TRAILING_COMMA.sub(r"\1", attempt)
+        try:
+            return json.loads(attempt), True
+        except ValueError:
+            pass
+        try:
+            # {'Accredited': 'Yes', ...} or True/False/None
+            data = ast.literal_eval(attempt)
+            if isinstance(data, (dict, list)):
+                return data, True
+        except (ValueError, SyntaxError, MemoryError, RecursionError):
+            pass
+    raise ValueError(f"Could not repair JSON response: {str(text)[:100]!r}")
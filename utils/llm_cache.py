@@ -0,0 +1,198 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from utils import page_cache
+
+# Cache lifetime and size limits can be overridden through the environment
+LLM_CACHE_TTL_HOURS_ENV = "OVS_LLM_CACHE_TTL_HOURS"
+DEFAULT_LLM_CACHE_TTL_HOURS = 24 * 30
+LLM_CACHE_MAX_MB_ENV = "OVS_LLM_CACHE_MAX_MB"
+DEFAULT_LLM_CACHE_MAX_MB = 200
+
+_lock = threading.Lock()
+_stats = {"hits": 0, "misses": 0, "writes": 0, "evictions": 0}
+_initialized_paths = set()
+
+
+def _db_path():
+    return os.path.join(page_cache.get_cache_root(), "llm_cache.sqlite")
+
+
+def _connect():
+    path = _db_path()
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    conn = sqlite3.connect(path, timeout=30)
+    if path not in _initialized_paths:
+        # WAL lets several Streamlit sessions read while one writes
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                model TEXT,
+                response TEXT,
+                size INTEGER,
+                created REAL,
+                last_access REAL
+            )
+        """)
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_responses_last_access ON responses (last_access)")
+        conn.commit()
+        _initialized_paths.add(path)
+    return conn
+
+
+def make_key(model_name, prompt, json_mode=False, generation_config=None):
+    """
+    Returns the cache key for a request: a hash of everything that can
+    change the model's answer.
+    """
+    raw = json.dumps({
+        "model": model_name,
+        "prompt": prompt,
+        "json_mode": bool(json_mode),
+        "generation_config": generation_config or {}
+    }, sort_keys=True, default=str)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def _ttl_seconds():
+    return float(os.getenv(LLM_CACHE_TTL_HOURS_ENV, DEFAULT_LLM_CACHE_TTL_HOURS)) * 3600
+
+
+def get(key):
+    """Returns the cached response text for the key, or None."""
+    now = time.time()
+    with _lock:
+        try:
+            conn = _connect()
+            try:
+                row = conn.execute("SELECT response, created FROM responses WHERE key = ?", (key,)).fetchone()
+                if row is not None and now - row[1] > _ttl_seconds():
+                    # Expired
+                    conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                    conn.commit()
+                    row = None
+                if row is not None:
+                    conn.execute("UPDATE responses SET last_access = ? WHERE key = ?", (now, key))
+                    conn.commit()
+            finally:
+                conn.close()
+        except sqlite3.Error as e:
+            print(f"Warning: LLM cache read failed: {e}")
+            row = None
+
+        if row is None:
+            _stats["misses"] += 1
+            return None
+        _stats["hits"] += 1
+        return row[0]
+
+
+def put(key, model_name, response_text):
+    """Stores a response and evicts old entries if the cache is over its size limit."""
+    now = time.time()
+    size = len(response_text.encode("utf-8"))
+    with _lock:
+        try:
+            conn = _connect()
+            try:
+                conn.execute(
+                    "INSERT OR REPLACE INTO responses (key, model, response, size, created, last_access) VALUES (?, ?, ?, ?, ?, ?)",
+                    (key, model_name, response_text, size, now, now)
+                )
+                conn.commit()
+                _stats["writes"] += 1
+                _evict(conn)
+            finally:
+                conn.close()
+        except sqlite3.Error as e:
+            print(f"Warning: LLM cache write failed: {e}")
+
+
+def delete(key):
+    """Removes one cached response, if present."""
+    with _lock:
+        try:
+            conn = _connect()
+            try:
+                conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                conn.commit()
+            finally:
+                conn.close()
+        except sqlite3.Error as e:
+            print(f"Warning: LLM cache delete failed: {e}")
+
+
+def _evict(conn, max_mb=None):
+    """Drops expired entries, then least recently used ones until under max_mb."""
+    if max_mb is None:
+        max_mb = float(os.getenv(LLM_CACHE_MAX_MB_ENV, DEFAULT_LLM_CACHE_MAX_MB))
+    max_bytes = max_mb * 1024 * 1024
+
+    removed = conn.execute("DELETE FROM responses WHERE created < ?", (time.time() - _ttl_seconds(),)).rowcount
+
+    total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+    if total > max_bytes:
+        excess = total - max_bytes
+        freed = 0
+        victims = []
+        for key, size in conn.execute("SELECT key, size FROM responses ORDER BY last_access ASC"):
+            if freed >= excess:
+                break
+            victims.append((key,))
+            freed += size
+        conn.executemany("DELETE FROM responses WHERE key = ?", victims)
+        removed += len(victims)
+
+    conn.commit()
+    _stats["evictions"] += removed
+    return removed
+
+
+def evict(max_mb=None):
+    """Applies TTL and size-based LRU eviction. Returns the number of entries removed."""
+    with _lock:
+        conn = _connect()
+        try:
+            return _evict(conn, max_mb)
+        finally:
+            conn.close()
+
+
+def clear():
+    """Removes every cached response."""
+    with _lock:
+        conn = _connect()
+        try:
+            conn.execute("DELETE FROM responses")
+            conn.commit()
+        finally:
+            conn.close()
+
+
+def get_stats():
+    """Returns hit/miss counters for this process and the size of the cache."""
+    with _lock:
+        stats = dict(_stats)
+        try:
+            conn = _connect()
+            try:
+                entries, size = conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses").fetchone()
+            finally:
+                conn.close()
+        except sqlite3.Error:
+            entries, size = 0, 0
+    stats["entries"] = entries
+    stats["size_mb"] = round(size / (1024 * 1024), 2)
+    return stats
+
+
+def reset_stats():
+    """Resets the in-process hit/miss counters."""
+    with _lock:
+        for k in _stats:
+            _stats[k] = 0
@@ -0,0 +1,125 @@
+import hashlib
+import os
+import threading
+
+import google.generativeai as genai
+import httpx2
+from openai import OpenAI, DefaultHttpx2Client
+
+from utils import llm_dispatch
+
+# Idle connections each OpenAI client keeps open between requests; enough
+# for the dispatcher's in-flight calls to one model to all find one.
+OPENAI_KEEPALIVE_CONNECTIONS = llm_dispatch.DEFAULT_MAX_IN_FLIGHT
+
+# Clients live at module level, so they survive Streamlit reruns and are
+# shared by every worker thread in the process. The stats count client
+# objects built versus handed out again from the registry, and for the
+# OpenAI clients' HTTP pools, requests sent versus connections opened.
+_lock = threading.Lock()
+_clients = {}
+_stats = {"builds": 0, "registry_hits": 0, "http_requests": 0, "connections_opened": 0}
+_requests = {}
+
+
+def _key_fingerprint(api_key):
+    # Never keep raw API keys in registry keys or stats
+    return hashlib.sha256((api_key or "").encode("utf-8")).hexdigest()[:12]
+
+
+def _get_or_build(registry_key, build):
+    with _lock:
+        client = _clients.get(registry_key)
+        if client is not None:
+            _stats["registry_hits"] += 1
+        else:
+            client = build()
+            _clients[registry_key] = client
+            _stats["builds"] += 1
+        _requests[registry_key] = _requests.get(registry_key, 0) + 1
+        return client
+
+
+def _trace_connections(request):
+    """
+    httpx request hook: counts the request and traces it through the
+    connection pool, which reports a TCP connect only when the request
+    needs a new connection.
+    """
+    with _lock:
+        _stats["http_requests"] += 1
+
+    def trace(event_name, info):
+        if event_name == "connection.connect_tcp.complete":
+            with _lock:
+                _stats["connections_opened"] += 1
+
+    request.extensions["trace"] = trace
+
+
+def build_http_client():
+    """
+    Returns the HTTP client behind each OpenAI client: the SDK's defaults,
+    a keep-alive pool of OPENAI_KEEPALIVE_CONNECTIONS and connection
+    counting.
+    """
+    return DefaultHttpx2Client(
+        limits=httpx2.Limits(max_keepalive_connections=OPENAI_KEEPALIVE_CONNECTIONS),
+        event_hooks={"request": [_trace_connections]},
+    )
+
+
+def get_gemini_model(model_name):
+    """
+    Returns a shared GenerativeModel for the model. The model keeps its gRPC
+    channel after the first call, so later calls reuse the open connection.
+    The API key is not part of the registry key: genai.configure sets it for
+    the whole process, so every model uses the same one.
+    """
+    registry_key = ("gemini", model_name, None)
+    return _get_or_build(registry_key, lambda: genai.GenerativeModel(model_name))
+
+
+def get_openai_client(model_name, api_key=None):
+    """
+    Returns a shared OpenAI client. Its HTTP connection pool keeps
+    connections alive between requests, so TLS handshakes happen once per
+    pooled connection instead of once per call.
+    """
+    if api_key is None:
+        api_key = os.getenv("OPENAI_API_KEY")
+    registry_key = ("openai", model_name, _key_fingerprint(api_key))
+    return _get_or_build(registry_key, lambda: OpenAI(api_key=api_key, http_client=build_http_client()))
+
+
+def get_stats():
+    """
+    Returns how many clients were built versus returned from the registry
+    (registry_hits), the number of requests served by each client, and how
+    many OpenAI HTTP requests opened a connection versus reused a pooled
+    one.
+    """
+    with _lock:
+        stats = dict(_stats)
+        stats["clients"] = {}
+        for (provider, model_name, _), count in _requests.items():
+            name = f"{provider}:{model_name}"
+            stats["clients"][name] = stats["clients"].get(name, 0) + count
+    total = stats["builds"] + stats["registry_hits"]
+    stats["registry_hit_rate"] = round(stats["registry_hits"] / total, 3) if total else 0.0
+    stats["connections_reused"] = stats["http_requests"] - stats["connections_opened"]
+    stats["connection_reuse_rate"] = round(stats["connections_reused"] / stats["http_requests"], 3) if stats["http_requests"] else 0.0
+    return stats
+
+
+def reset():
+    """Drops every pooled client (e.g. after an API key change)."""
+    with _lock:
+        for client in _clients.values():
+            # OpenAI clients release their pooled connections
+            if hasattr(client, "close"):
+                client.close()
+        _clients.clear()
+        _requests.clear()
+        for k in _stats:
+            _stats[k] = 0
@@ -0,0 +1,245 @@
+import asyncio
+import concurrent.futures
+import contextvars
+import hashlib
+import os
+import queue
+import threading
+import time
+
+# Requests-per-minute and tokens-per-minute defaults for each API model.
+# These should match the project's quota tier; override them with
+# OVS_LLM_RPM / OVS_LLM_TPM or configure_limits().
+DEFAULT_LIMITS = {
+    "gemini-2.0-flash": (2000, 4000000),
+    "gemini-2.5-pro": (150, 2000000),
+    "gemini-3-pro-preview": (50, 1000000),
+    "gpt-4o-mini": (500, 200000),
+}
+FALLBACK_LIMITS = (60, 250000)
+
+LLM_RPM_ENV = "OVS_LLM_RPM"
+LLM_TPM_ENV = "OVS_LLM_TPM"
+
+# Rough output allowance added to the prompt size when reserving tokens
+DEFAULT_OUTPUT_TOKENS = 512
+DEFAULT_MAX_IN_FLIGHT = 32
+
+# Seconds of quota a limiter may bank while idle. A full minute would let a
+# burst on top of the refill reach twice the quota within one minute.
+BURST_SECONDS = 5
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket that refills continuously up to its capacity.
+    """
+
+    def __init__(self, capacity, refill_per_second):
+        self.capacity = float(capacity)
+        self.refill_per_second = float(refill_per_second)
+        self._tokens = float(capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        elapsed = now - self._updated
+        self._tokens = min(self.capacity, self._tokens + elapsed * self.refill_per_second)
+        self._updated = now
+
+    def reserve(self, amount):
+        """
+        Takes amount tokens and returns how long the caller must wait before
+        they are actually available (0 if available now). Requests larger
+        than the capacity go through once the refill has covered them.
+        """
+        amount = float(amount)
+        with self._lock:
+            self._refill(time.monotonic())
+            self._tokens -= amount
+            if self._tokens >= 0:
+                return 0.0
+            return -self._tokens / self.refill_per_second
+
+    def set_rate(self, capacity, refill_per_second):
+        with self._lock:
+            self._refill(time.monotonic())
+            self.capacity = float(capacity)
+            self.refill_per_second = float(refill_per_second)
+            self._tokens = min(self._tokens, self.capacity)
+
+
+def _burst(per_minute):
+    # (capacity, refill per second) for a per-minute quota
+    refill = per_minute / 60.0
+    return max(1.0, refill * BURST_SECONDS), refill
+
+
+class RateLimiter:
+    """
+    Combined requests-per-minute and tokens-per-minute limiter for one model.
+    """
+
+    def __init__(self, rpm, tpm):
+        self.rpm = rpm
+        self.tpm = tpm
+        self._requests = TokenBucket(*_burst(rpm))
+        self._tokens = TokenBucket(*_burst(tpm))
+        self._lock = threading.Lock()
+        self.total_wait = 0.0
+        self.total_requests = 0
+
+    def _reserve(self, tokens):
+        wait = max(self._requests.reserve(1), self._tokens.reserve(tokens))
+        with self._lock:
+            self.total_requests += 1
+            self.total_wait += wait
+        return wait
+
+    def acquire(self, tokens):
+        """Blocks the calling thread until the request fits in the quota."""
+        wait = self._reserve(tokens)
+        if wait > 0:
+            time.sleep(wait)
+
+    def configure(self, rpm, tpm):
+        self.rpm = rpm
+        self.tpm = tpm
+        self._requests.set_rate(*_burst(rpm))
+        self._tokens.set_rate(*_burst(tpm))
+
+
+# One limiter per (model, API key), shared by every Streamlit session in the
+# process so concurrent users draw from the same quota.
+_limiters = {}
+_limiters_lock = threading.Lock()
+
+
+def _default_limits(model_name):
+    rpm, tpm = DEFAULT_LIMITS.get(model_name, FALLBACK_LIMITS)
+    rpm = int(os.getenv(LLM_RPM_ENV, rpm))
+    tpm = int(os.getenv(LLM_TPM_ENV, tpm))
+    return rpm, tpm
+
+
+def _api_key_for(provider):
+    env = "GOOGLE_API_KEY" if provider == "gemini" else "OPENAI_API_KEY"
+    return os.getenv(env) or ""
+
+
+def get_limiter(provider, model_name, api_key=None):
+    """Returns the shared limiter for the model and API key."""
+    if api_key is None:
+        api_key = _api_key_for(provider)
+    key = (model_name, hashlib.sha256(api_key.encode("utf-8")).hexdigest()[:12])
+    with _limiters_lock:
+        limiter = _limiters.get(key)
+        if limiter is None:
+            limiter = RateLimiter(*_default_limits(model_name))
+            _limiters[key] = limiter
+        return limiter
+
+
+def configure_limits(provider, model_name, rpm, tpm, api_key=None):
+    """Sets the requests/tokens per minute for a model's shared limiter."""
+    get_limiter(provider, model_name, api_key).configure(rpm, tpm)
+
+
+def get_limits(provider, model_name, api_key=None):
+    """Returns the (rpm, tpm) currently applied to the model."""
+    limiter = get_limiter(provider, model_name, api_key)
+    return limiter.rpm, limiter.tpm
+
+
+def estimate_tokens(prompt):
+    """Cheap token estimate (~4 characters per token) plus an output allowance."""
+    return len(prompt) // 4 + DEFAULT_OUTPUT_TOKENS
+
+
+async def acall(fn, *args, executor=None):
+    """Runs a blocking function (e.g. call_llm) from async code, in the caller's context."""
+    loop = asyncio.get_running_loop()
+    context = contextvars.copy_context()
+    return await loop.run_in_executor(executor, lambda: context.run(fn, *args))
+
+
+async def _dispatch_async(fn, jobs, max_in_flight, on_result):
+    results = [None] * len(jobs)
+    semaphore = asyncio.Semaphore(max_in_flight)
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max_in_flight) as executor:
+        async def run(i, args):
+            async with semaphore:
+                try:
+                    return i, await acall(fn, *args, executor=executor)
+                except Exception as e:
+                    print(f"Error in dispatched job {i}: {e}")
+                    return i, None
+
+        tasks = [asyncio.ensure_future(run(i, args)) for i, args in enumerate(jobs)]
+        done_count = 0
+        for task in asyncio.as_completed(tasks):
+            i, result = await task
+            results[i] = result
+            done_count += 1
+            if on_result:
+                on_result(done_count, len(jobs), result)
+    return results
+
+
+def dispatch(fn, jobs, max_in_flight=DEFAULT_MAX_IN_FLIGHT, on_result=None):
+    """
+    Runs fn(*args) for every args tuple in jobs with up to max_in_flight
+    calls in flight, each on a worker thread (call_llm blocks its thread
+    while the limiter waits). Throughput is governed by the shared rate
+    limiters inside call_llm, so max_in_flight can be well above the old
+    10 workers.
+
+    on_result(done_count, total, result) is called from the calling thread
+    as each job finishes (safe for Streamlit progress bars).
+    Returns the results in job order.
+    """
+    if not jobs:
+        return []
+    max_in_flight = max(1, int(max_in_flight))
+    return asyncio.run(_dispatch_async(fn, jobs, max_in_flight, on_result))
+
+
+_STREAM_DONE = object()
+
+
+def iter_concurrently(generators, max_in_flight=DEFAULT_MAX_IN_FLIGHT, failed=None):
+    """
+    Drains several generators (e.g. streaming LLM parses) on worker threads
+    and yields (generator index, item) pairs in arrival order, in the
+    calling thread. A generator that raises is logged and simply ends, so
+    items it produced before failing are kept; its index is appended to
+    the failed list when one is given.
+    """
+    if not generators:
+        return
+    results = queue.Queue()
+
+    def drain(i, generator):
+        try:
+            for item in generator:
+                results.put((i, item))
+        except Exception as e:
+            print(f"Error in streamed job {i}: {e}")
+            if failed is not None:
+                failed.append(i)
+        finally:
+            results.put((i, _STREAM_DONE))
+
+    max_in_flight = max(1, int(max_in_flight))
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max_in_flight) as executor:
+        for i, generator in enumerate(generators):
+            # Workers see the caller's context (e.g. the telemetry run)
+            executor.submit(contextvars.copy_context().run, drain, i, generator)
+        remaining = len(generators)
+        while remaining:
+            i, item = results.get()
+            if item is _STREAM_DONE:
+                remaining -= 1
+            else:
+                yield i, item
@@ -2,125 +2,376 @@ import google.generativeai as genai
 import pandas as pd
 from pypdf import PdfReader
 import io
+import hashlib
 import json
+import re
 import typing_extensions as typing
-from openai import OpenAI
 import os
+import sys
+import threading
+import time
+import unicodedata
+from utils import page_cache
+from utils import parallel_extract
+from utils import llm_cache
+from utils import llm_clients
+from utils import llm_dispatch
+from utils import llm_transport
+from utils import llm_telemetry
+from utils import json_repair
+from utils import fingerprint_store
+from utils import detail_rules
+from utils import toc_rules
 
-def extract_text_from_pdf(pdf_file):
+def extract_text_from_pdf(pdf_file, workers=None):
     """Extracts text from a PDF file."""
+    if workers is None:
+        workers = parallel_extract.get_default_workers()
+    if workers > 1:
+        pdf_bytes = page_cache.read_pdf_bytes(pdf_file)
+        return "".join(parallel_extract.extract_pages_parallel(pdf_bytes, workers=workers))
+
     reader = PdfReader(pdf_file)
     text = ""
     for page in reader.pages:
         text += page.extract_text()
     return text
 
-def extract_text_from_pdf_range(pdf_file, start_page, end_page):
+def extract_text_from_pdf_range(pdf_file, start_page, end_page, workers=None):
     """Extracts text from a PDF file within a specific page range (1-based)."""
-    reader = PdfReader(pdf_file)
-    text = ""
     # Adjust for 0-based indexing
     start_idx = max(0, start_page - 1)
+
+    if workers is None:
+        workers = parallel_extract.get_default_workers()
+    if workers > 1:
+        pdf_bytes = page_cache.read_pdf_bytes(pdf_file)
+        return "".join(parallel_extract.extract_pages_parallel(pdf_bytes, start_idx, end_page, workers=workers))
+
+    reader = PdfReader(pdf_file)
+    text = ""
     end_idx = min(len(reader.pages), end_page)
     
     for i in range(start_idx, end_idx):
         text += reader.pages[i].extract_text()
     return text
 
-def extract_all_pages(pdf_file):
+def extract_all_pages(pdf_file, use_cache=True, workers=None, pdf_hash=None):
     """
     Extracts text from all pages of a PDF file.
     Returns a list of strings, where index i corresponds to page i+1.
+
+    Results are cached on disk keyed by the SHA-256 of the PDF bytes
+    (pdf_hash, when the caller has already computed it), so re-running
+    against the same catalog skips extraction entirely.
+    With workers > 1, pages are extracted across a process pool.
     """
-    reader = PdfReader(pdf_file)
-    pages_text = []
-    for page in reader.pages:
-        pages_text.append(page.extract_text())
+    if workers is None:
+        workers = parallel_extract.get_default_workers()
+
+    pdf_bytes = page_cache.read_pdf_bytes(pdf_file)
+    key = None
+    if use_cache:
+        key = page_cache.make_cache_key(pdf_hash or page_cache.hash_pdf_bytes(pdf_bytes))
+        pages_text = page_cache.load_pages(key)
+        if pages_text is not None:
+            gaps = [i for i, text in enumerate(pages_text) if text is None]
+            if not gaps:
+                return pages_text
+            # A lazy run cached some of the pages: extract only the rest
+            if workers > 1:
+                span = parallel_extract.extract_pages_parallel(pdf_bytes, gaps[0], gaps[-1] + 1, workers=workers)
+                for i in gaps:
+                    pages_text[i] = span[i - gaps[0]]
+            else:
+                reader = PdfReader(io.BytesIO(pdf_bytes))
+                for i in gaps:
+                    pages_text[i] = reader.pages[i].extract_text()
+            page_cache.save_pages(key, pages_text)
+            return pages_text
+
+    if workers > 1:
+        pages_text = parallel_extract.extract_pages_parallel(pdf_bytes, workers=workers)
+    else:
+        reader = PdfReader(io.BytesIO(pdf_bytes))
+        pages_text = []
+        for page in reader.pages:
+            pages_text.append(page.extract_text())
+
+    if use_cache:
+        page_cache.save_pages(key, pages_text)
     return pages_text
 
 from tenacity import retry, stop_after_attempt, wait_exponential, retry_if_exception_type
 import google.api_core.exceptions
 
+def _acquire_retry_quota(retry_state):
+    """
+    tenacity before hook: each retry is another request against the
+    model's quota, so it waits for the shared limiter like the first
+    attempt did in call_llm.
+    """
+    if retry_state.attempt_number > 1:
+        model_name, prompt = retry_state.args[0], retry_state.args[2]
+        llm_dispatch.get_limiter("gemini", model_name).acquire(llm_dispatch.estimate_tokens(prompt))
+
 # Retry configuration: Retry up to 5 times, waiting exponentially (1s, 2s, 4s...)
 @retry(
     retry=retry_if_exception_type(google.api_core.exceptions.ResourceExhausted),
     stop=stop_after_attempt(5),
-    wait=wait_exponential(multiplier=2, min=4, max=60)
+    wait=wait_exponential(multiplier=2, min=4, max=60),
+    before=_acquire_retry_quota,
+    before_sleep=llm_telemetry.count_retry
 )
-def _generate_with_retry(model, prompt, generation_config):
+def _generate_with_retry(model_name, model, prompt, generation_config):
     return model.generate_content(prompt, generation_config=generation_config)
 
-def call_llm(prompt, model_choice="Gemini 3 Pro", json_mode=False):
+def resolve_model(model_choice):
+    """
+    Maps the UI model name to (provider, API model name).
+    """
+    if "Gemini" in model_choice:
+        if "2.5" in model_choice:
+            return "gemini", 'gemini-2.5-pro'
+        elif "3" in model_choice:
+            return "gemini", 'gemini-3-pro-preview'
+        elif "Flash" in model_choice:
+            return "gemini", 'gemini-2.0-flash'
+        return "gemini", 'gemini-3-pro-preview' # Default to 3 Pro
+    elif "ChatGPT" in model_choice or "gpt" in model_choice.lower():
+        return "openai", "gpt-4o-mini" # User asked for "ChatGPT 5 mini", mapping to 4o-mini as the closest real equivalent.
+    return None, None
+
+def _call_gemini(model_name, prompt, generation_config):
+    model = llm_clients.get_gemini_model(model_name)
+    
+    # Use the retry-wrapped function
+    response = _generate_with_retry(model_name, model, prompt, generation_config)
+    
+    usage = getattr(response, "usage_metadata", None)
+    if usage is not None:
+        llm_telemetry.note_response(usage.prompt_token_count, usage.candidates_token_count)
+
+    # Robust response handling
+    if response and response.candidates:
+        candidate = response.candidates[0]
+        llm_telemetry.note_response(finish_reason=getattr(candidate.finish_reason, "name", candidate.finish_reason))
+        if candidate.content and candidate.content.parts:
+            return response.text
+        else:
+            print(f"Warning: Gemini returned no content. Finish Reason: {candidate.finish_reason}")
+            if candidate.safety_ratings:
+                print(f"Safety Ratings: {candidate.safety_ratings}")
+            return ""
+    else:
+        print("Error: Gemini response contained no candidates.")
+        return ""
+
+@retry(
+    retry=retry_if_exception_type(google.api_core.exceptions.ResourceExhausted),
+    stop=stop_after_attempt(5),
+    wait=wait_exponential(multiplier=2, min=4, max=60),
+    before=_acquire_retry_quota,
+    before_sleep=llm_telemetry.count_retry
+)
+def _start_gemini_stream(model_name, model, prompt, generation_config):
+    return model.generate_content(prompt, generation_config=generation_config, stream=True)
+
+def _stream_gemini(model_name, prompt, generation_config):
+    model = llm_clients.get_gemini_model(model_name)
+    for chunk in _start_gemini_stream(model_name, model, prompt, generation_config):
+        usage = getattr(chunk, "usage_metadata", None)
+        if usage is not None and usage.candidates_token_count:
+            llm_telemetry.note_response(usage.prompt_token_count, usage.candidates_token_count)
+        if chunk.candidates and chunk.candidates[0].finish_reason:
+            finish_reason = chunk.candidates[0].finish_reason
+            llm_telemetry.note_response(finish_reason=getattr(finish_reason, "name", finish_reason))
+        # Chunks without content parts (e.g. the final safety chunk) raise on .text
+        if chunk.candidates and chunk.candidates[0].content and chunk.candidates[0].content.parts:
+            yield chunk.text
+
+def _stream_openai(model_name, prompt, json_mode):
+    client = llm_clients.get_openai_client(model_name)
+
+    response_format = None
+    if json_mode:
+        response_format = {"type": "json_object"}
+
+    stream = client.chat.completions.create(
+        model=model_name,
+        messages=[{"role": "user", "content": prompt}],
+        response_format=response_format,
+        stream=True,
+        stream_options={"include_usage": True}
+    )
+    for chunk in stream:
+        if chunk.usage is not None:
+            llm_telemetry.note_response(chunk.usage.prompt_tokens, chunk.usage.completion_tokens)
+        if chunk.choices and chunk.choices[0].finish_reason:
+            llm_telemetry.note_response(finish_reason=chunk.choices[0].finish_reason)
+        if chunk.choices and chunk.choices[0].delta.content:
+            yield chunk.choices[0].delta.content
+
+def _gemini_schema(schema):
+    # Gemini's schema dialect has no additionalProperties
+    if isinstance(schema, dict):
+        return {k: _gemini_schema(v) for k, v in schema.items() if k != "additionalProperties"}
+    if isinstance(schema, list):
+        return [_gemini_schema(v) for v in schema]
+    return schema
+
+def _call_openai(model_name, prompt, json_mode, response_schema=None):
+    client = llm_clients.get_openai_client(model_name)
+    
+    messages = [{"role": "user", "content": prompt}]
+    
+    response_format = None
+    if response_schema is not None:
+        response_format = {"type": "json_schema", "json_schema": {"name": "response", "strict": True, "schema": response_schema}}
+    elif json_mode:
+        response_format = {"type": "json_object"}
+
+    response = client.chat.completions.create(
+        model=model_name,
+        messages=messages,
+        response_format=response_format
+    )
+    if response.usage is not None:
+        llm_telemetry.note_response(response.usage.prompt_tokens, response.usage.completion_tokens)
+    llm_telemetry.note_response(finish_reason=response.choices[0].finish_reason)
+    return response.choices[0].message.content
+
+def _generation_config(provider, json_mode, response_schema=None):
+    generation_config = {}
+    if json_mode and provider == "gemini":
+        generation_config["response_mime_type"] = "application/json"
+        if response_schema is not None:
+            generation_config["response_schema"] = _gemini_schema(response_schema)
+    return generation_config
+
+def _response_cache_key(provider, model_name, prompt, json_mode, generation_config, response_schema=None):
+    return llm_cache.make_key(model_name, prompt, json_mode, generation_config if provider == "gemini" else response_schema)
+
+def discard_cached_response(prompt, model_choice, json_mode=False, response_schema=None):
+    """
+    Drops the cached response for a call_llm request whose answer could not
+    be used (truncated or unparseable), so the next run asks the model
+    again instead of replaying it.
+    """
+    if response_schema is not None:
+        json_mode = True
+    provider, model_name = resolve_model(model_choice)
+    if provider is None:
+        return
+    generation_config = _generation_config(provider, json_mode, response_schema)
+    llm_cache.delete(_response_cache_key(provider, model_name, prompt, json_mode, generation_config, response_schema))
+
+def call_llm(prompt, model_choice="Gemini 3 Pro", json_mode=False, use_cache=True, stream=False, response_schema=None):
     """
     Helper function to call the selected LLM.
+    Identical requests are served from the on-disk response cache unless
+    use_cache is False.
+    With stream=True, returns an iterator of text fragments as the model
+    produces them instead of the full response text; it raises
+    LLMStreamError if the stream breaks off partway.
+    response_schema (a JSON schema dict, implies json_mode) constrains the
+    output with the provider's native structured output support.
     """
-    try:
-        if "Gemini" in model_choice:
-            # Map UI name to API model name
-            if "2.5" in model_choice:
-                model_name = 'gemini-2.5-pro' 
-            elif "3" in model_choice:
-                model_name = 'gemini-3-pro-preview'
-            elif "Flash" in model_choice:
-                model_name = 'gemini-2.0-flash'
-            else:
-                model_name = 'gemini-3-pro-preview' # Default to 3 Pro
+    if response_schema is not None:
+        json_mode = True
+    # Telemetry records which function asked for the call
+    caller = sys._getframe(1).f_code.co_name
+    if stream:
+        return _stream_llm(prompt, model_choice, json_mode, use_cache, caller)
 
-            model = genai.GenerativeModel(model_name)
-            generation_config = {}
-            if json_mode:
-                generation_config["response_mime_type"] = "application/json"
-            
-            # Use the retry-wrapped function
-            response = _generate_with_retry(model, prompt, generation_config)
-            
-            # Robust response handling
-            if response and response.candidates:
-                candidate = response.candidates[0]
-                if candidate.content and candidate.content.parts:
-                    return response.text
-                else:
-                    print(f"Warning: Gemini returned no content. Finish Reason: {candidate.finish_reason}")
-                    if candidate.safety_ratings:
-                        print(f"Safety Ratings: {candidate.safety_ratings}")
-                    return ""
-            else:
-                print("Error: Gemini response contained no candidates.")
-                return ""
+    provider, model_name = resolve_model(model_choice)
+    if provider is None:
+        return ""
 
-        elif "ChatGPT" in model_choice or "gpt" in model_choice.lower():
-            # OpenAI
-            client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
-            model_name = "gpt-4o-mini" # User asked for "ChatGPT 5 mini", mapping to 4o-mini as the closest real equivalent.
-            
-            messages = [{"role": "user", "content": prompt}]
-            
-            response_format = None
-            if json_mode:
-                response_format = {"type": "json_object"}
-
-            response = client.chat.completions.create(
-                model=model_name,
-                messages=messages,
-                response_format=response_format
-            )
-            return response.choices[0].message.content
-            
+    generation_config = _generation_config(provider, json_mode, response_schema)
+
+    cache_key = None
+    if use_cache:
+        cache_key = _response_cache_key(provider, model_name, prompt, json_mode, generation_config, response_schema)
+        cached = llm_cache.get(cache_key)
+        if cached is not None:
+            llm_telemetry.end_call(model_name, prompt, cached, 0.0, caller, cache_hit=True)
+            return cached
+
+    # Wait for room in the shared per-model quota before sending
+    llm_dispatch.get_limiter(provider, model_name).acquire(llm_dispatch.estimate_tokens(prompt))
+    llm_telemetry.begin_call()
+    start = time.monotonic()
+
+    if provider == "gemini":
+        live_call = lambda: _call_gemini(model_name, prompt, generation_config)
+    else:
+        live_call = lambda: _call_openai(model_name, prompt, json_mode, response_schema)
+
+    try:
+        # The transport decides whether this goes to the API, a recording or a stub
+        response_text = llm_transport.get_transport().complete(model_name, prompt, json_mode, live_call)
     except Exception as e:
         print(f"Error calling LLM ({model_choice}): {e}")
+        llm_telemetry.end_call(model_name, prompt, "", time.monotonic() - start, caller, ok=False)
         return ""
-    return ""
 
-def parse_catalog_toc(text, catalog_name, academic_year="2025-2026", model_choice="Gemini 2.5 Pro"):
-    """
-    Parses the catalog ToC text using Gemini to extract programs.
-    Returns a list of dictionaries.
-    """
-    # model = genai.GenerativeModel('gemini-2.5-pro') # Moved to call_llm
+    llm_telemetry.end_call(model_name, prompt, response_text, time.monotonic() - start, caller, ok=bool(response_text))
+
+    # Only successful responses are cached so failures are retried next run
+    if cache_key and response_text:
+        llm_cache.put(cache_key, model_name, response_text)
+    return response_text or ""
+
+class LLMStreamError(RuntimeError):
+    """A streamed response broke off before the model finished it."""
+
+def _stream_llm(prompt, model_choice, json_mode, use_cache, caller):
+    provider, model_name = resolve_model(model_choice)
+    if provider is None:
+        return
+
+    generation_config = _generation_config(provider, json_mode)
+
+    cache_key = None
+    if use_cache:
+        cache_key = _response_cache_key(provider, model_name, prompt, json_mode, generation_config)
+        cached = llm_cache.get(cache_key)
+        if cached is not None:
+            llm_telemetry.end_call(model_name, prompt, cached, 0.0, caller, cache_hit=True)
+            yield cached
+            return
+
+    llm_dispatch.get_limiter(provider, model_name).acquire(llm_dispatch.estimate_tokens(prompt))
+    llm_telemetry.begin_call()
+    start = time.monotonic()
 
+    parts = []
+    try:
+        if provider == "gemini":
+            live_stream = lambda: _stream_gemini(model_name, prompt, generation_config)
+        else:
+            live_stream = lambda: _stream_openai(model_name, prompt, json_mode)
+        for fragment in llm_transport.get_transport().stream(model_name, prompt, json_mode, live_stream):
+            parts.append(fragment)
+            yield fragment
+    except Exception as e:
+        # Fragments already yielded stay with the caller; nothing is cached.
+        # Raise so the caller knows the response is incomplete.
+        print(f"Error streaming from LLM ({model_choice}): {e}")
+        llm_telemetry.end_call(model_name, prompt, "".join(parts), time.monotonic() - start, caller, ok=False)
+        raise LLMStreamError(f"{model_choice} stream broke off after {len(''.join(parts))} characters: {e}") from e
+
+    response_text = "".join(parts)
+    llm_telemetry.end_call(model_name, prompt, response_text, time.monotonic() - start, caller, ok=bool(response_text))
+    if cache_key and response_text:
+        llm_cache.put(cache_key, model_name, response_text)
+
+def _build_toc_prompt(text, catalog_name, academic_year, start_point):
+    """Builds the ToC extraction prompt for the academic year's catalog format."""
     # Determine Start Point logic based on catalog name
     start_point_instruction = ""
-    if "Graduate" in catalog_name:
+    if "Graduate" in catalog_name and start_point:
         if "2024-2025" in academic_year:
              start_point_instruction = '- **Start Point**: The list of relevant programs typically starts with "Accountancy and Analytics". Ignore entries before that.'
         else:
@@ -212,38 +463,60 @@ def parse_catalog_toc(text, catalog_name, academic_year="2025-2026", model_choic
 
     # Select Prompt based on Academic Year
     if "2024-2025" in academic_year:
-        prompt = prompt_2425
-    else:
-        prompt = prompt_2526
-    
+        return prompt_2425
+    return prompt_2526
+
+def parse_toc_line(line, catalog_name):
+    """
+    Parses one "Original Text | Program Name | Credential | Page Number"
+    line from the ToC prompt's output. Returns a program dict, or None if
+    the line is not a valid program entry.
+    """
+    parts = line.split('|')
+    if len(parts) != 4:
+        return None
+    original_text = parts[0].strip()
+    program_name = parts[1].strip()
+    credential = parts[2].strip()
+    page_number_str = parts[3].strip()
+
+    # Basic validation
+    if not (program_name and credential and page_number_str.isdigit()):
+        return None
+
+    # EXCLUSION FILTER: Remove Catalog Headers mistakenly identified as programs
+    header_keywords = ["Catalog", "University", "South Florida", "USF Graduate", "USF Undergraduate"]
+    if any(kw in program_name for kw in header_keywords) or any(kw in original_text for kw in header_keywords):
+        return None
+
+    return {
+        "original_text": original_text,
+        "program_name": program_name,
+        "credential": credential,
+        "page_number": int(page_number_str),
+        "catalog_name": catalog_name
+    }
+
+def parse_catalog_toc(text, catalog_name, academic_year="2025-2026", model_choice="Gemini 2.5 Pro", use_cache=True, start_point=True):
+    """
+    Parses the catalog ToC text using Gemini to extract programs.
+    Returns a list of dictionaries.
+    Pass start_point=False when the text has already been trimmed to the
+    first program entry (chunks and ambiguous lines).
+    """
+    prompt = _build_toc_prompt(text, catalog_name, academic_year, start_point)
+
     try:
-        response_text = call_llm(prompt, model_choice)
-        
-        data = []
-        lines = response_text.strip().split('\n')
-        for line in lines:
-            parts = line.split('|')
-            if len(parts) == 4:
-                original_text = parts[0].strip()
-                program_name = parts[1].strip()
-                credential = parts[2].strip()
-                page_number_str = parts[3].strip()
-                
-                # Basic validation
-                if program_name and credential and page_number_str.isdigit():
-                    # EXCLUSION FILTER: Remove Catalog Headers mistakenly identified as programs
-                    header_keywords = ["Catalog", "University", "South Florida", "USF Graduate", "USF Undergraduate"]
-                    if any(kw in program_name for kw in header_keywords) or any(kw in original_text for kw in header_keywords):
-                        continue
+        response_text = call_llm(prompt, model_choice, use_cache=use_cache)
 
-                    data.append({
-                        "original_text": original_text,
-                        "program_name": program_name,
-                        "credential": credential,
-                        "page_number": int(page_number_str),
-                        "catalog_name": catalog_name
-                    })
-        
+        data = []
+        for line in response_text.strip().split('\n'):
+            program = parse_toc_line(line, catalog_name)
+            if program:
+                data.append(program)
+        if response_text.strip() and not data and use_cache:
+            # Text without a single program line is a malformed answer
+            discard_cached_response(prompt, model_choice)
         return data
 
     except Exception as e:
@@ -254,6 +527,136 @@ def parse_catalog_toc(text, catalog_name, academic_year="2025-2026", model_choic
             pass
         return []
 
+def stream_catalog_toc(text, catalog_name, academic_year="2025-2026", model_choice="Gemini 2.5 Pro", use_cache=True, start_point=True):
+    """
+    Streaming version of parse_catalog_toc: yields each program dict as soon
+    as its complete output line has arrived from the model.
+    """
+    prompt = _build_toc_prompt(text, catalog_name, academic_year, start_point)
+
+    buffer = ""
+    received = False
+    found = 0
+    for fragment in call_llm(prompt, model_choice, use_cache=use_cache, stream=True):
+        buffer += fragment
+        received = received or bool(fragment.strip())
+        *lines, buffer = buffer.split('\n')
+        for line in lines:
+            program = parse_toc_line(line, catalog_name)
+            if program:
+                found += 1
+                yield program
+
+    # The last line has no trailing newline
+    program = parse_toc_line(buffer, catalog_name)
+    if program:
+        found += 1
+        yield program
+    if received and not found and use_cache:
+        discard_cached_response(prompt, model_choice)
+
+# Ambiguous ToC entries sent to the LLM per request
+TOC_LLM_BATCH_LINES = 20
+
+def parse_catalog_toc_rules(text, catalog_name, academic_year="2025-2026", model_choice="Gemini 2.5 Pro", use_cache=True, llm_fallback=True):
+    """
+    Parses the catalog ToC text with the rule-based engine in toc_rules.
+    Only entries the rules cannot classify are sent to the LLM, in small
+    batches, using the parse_catalog_toc prompt.
+    Returns a list of dictionaries in ToC page order.
+    """
+    programs, ambiguous = toc_rules.parse_toc_text(text, catalog_name, academic_year)
+    if not ambiguous or not llm_fallback:
+        return programs
+
+    jobs = []
+    for i in range(0, len(ambiguous), TOC_LLM_BATCH_LINES):
+        batch_text = "\n".join(f"{name} ........ {page}" for name, page in ambiguous[i:i + TOC_LLM_BATCH_LINES])
+        jobs.append((batch_text, catalog_name, academic_year, model_choice, use_cache, False))
+
+    for result in llm_dispatch.dispatch(parse_catalog_toc, jobs):
+        programs.extend(result or [])
+    programs.sort(key=lambda p: p["page_number"])
+    return programs
+
+# ToC PDF pages per LLM request, plus pages repeated from the next chunk so
+# entries that wrap across a page break are seen whole
+TOC_CHUNK_PAGES = 3
+TOC_CHUNK_OVERLAP_PAGES = 1
+
+def trim_toc_pages(pages, catalog_name, academic_year="2025-2026"):
+    """
+    Drops the Graduate 2024-2025 ToC text before its first program entry,
+    so chunks can be parsed without the start point instruction.
+    """
+    if not ("Graduate" in catalog_name and "2024-2025" in academic_year):
+        return list(pages)
+    for i, page_text in enumerate(pages):
+        pos = (page_text or "").find(toc_rules.GR_2425_START)
+        if pos >= 0:
+            return [page_text[pos:]] + list(pages[i + 1:])
+    return list(pages)
+
+def chunk_toc_pages(pages, chunk_pages=TOC_CHUNK_PAGES, overlap_pages=TOC_CHUNK_OVERLAP_PAGES):
+    """
+    Splits a list of page texts into overlapping, page-aligned chunks of text.
+    """
+    chunk_pages = max(1, int(chunk_pages))
+    overlap_pages = max(0, int(overlap_pages))
+    chunks = []
+    for start in range(0, len(pages), chunk_pages):
+        chunks.append("".join(p or "" for p in pages[start:start + chunk_pages + overlap_pages]))
+    return chunks
+
+def merge_toc_results(results):
+    """
+    Concatenates per-chunk ToC results in chunk order, dropping entries
+    repeated by the chunk overlap (same original text and page number).
+    """
+    merged = []
+    seen = set()
+    for programs in results:
+        for program in programs or []:
+            key = (program["original_text"], program["page_number"])
+            if key in seen:
+                continue
+            seen.add(key)
+            merged.append(program)
+    return merged
+
+def parse_catalog_toc_chunked(pages, catalog_name, academic_year="2025-2026", model_choice="Gemini 2.5 Pro", use_cache=True,
+                              chunk_pages=TOC_CHUNK_PAGES, overlap_pages=TOC_CHUNK_OVERLAP_PAGES):
+    """
+    Parses the ToC with the LLM prompt, one request per chunk of pages, with
+    all chunks in flight at once. pages is the list from extract_all_pages.
+    Returns a list of dictionaries in ToC order.
+    """
+    pages = trim_toc_pages(pages, catalog_name, academic_year)
+    chunks = [c for c in chunk_toc_pages(pages, chunk_pages, overlap_pages) if c.strip()]
+    jobs = [(chunk, catalog_name, academic_year, model_choice, use_cache, False) for chunk in chunks]
+    return merge_toc_results(llm_dispatch.dispatch(parse_catalog_toc, jobs))
+
+def stream_catalog_toc_chunked(pages, catalog_name, academic_year="2025-2026", model_choice="Gemini 2.5 Pro", use_cache=True,
+                               chunk_pages=TOC_CHUNK_PAGES, overlap_pages=TOC_CHUNK_OVERLAP_PAGES, failed_chunks=None):
+    """
+    Streaming version of parse_catalog_toc_chunked: all chunks stream at
+    once and each program is yielded as it arrives (chunks interleave, so
+    rows are not in ToC order). Overlap duplicates are skipped.
+    A chunk whose stream breaks off keeps the rows it produced; its index
+    is appended to failed_chunks (a list) when given, so the caller can
+    flag the ToC as partial.
+    """
+    pages = trim_toc_pages(pages, catalog_name, academic_year)
+    chunks = [c for c in chunk_toc_pages(pages, chunk_pages, overlap_pages) if c.strip()]
+    streams = [stream_catalog_toc(chunk, catalog_name, academic_year, model_choice, use_cache, False) for chunk in chunks]
+
+    seen = set()
+    for _, program in llm_dispatch.iter_concurrently(streams, failed=failed_chunks):
+        key = (program["original_text"], program["page_number"])
+        if key not in seen:
+            seen.add(key)
+            yield program
+
 def validate_catalog_type(programs, catalog_type):
     """
     Filters programs based on catalog type (ug or gr) and credential.
@@ -340,7 +743,7 @@ def filter_programs(programs, min_page, max_page):
             continue # Skip if page number is not an integer
     return filtered
 
-def parse_full_catalog_programs(text, catalog_name, model_choice="Gemini 2.5 Pro"):
+def parse_full_catalog_programs(text, catalog_name, model_choice="Gemini 2.5 Pro", use_cache=True):
     """
     Parses the full catalog text to extract programs.
     This uses a prompt tailored for full text extraction, ignoring policies etc.
@@ -385,7 +788,7 @@ def parse_full_catalog_programs(text, catalog_name, model_choice="Gemini 2.5 Pro
     """
     
     try:
-        response_text = call_llm(prompt, model_choice)
+        response_text = call_llm(prompt, model_choice, use_cache=use_cache)
         
         data = []
         lines = response_text.strip().split('\\n')
@@ -420,17 +823,18 @@ def get_educational_objective(credential, catalog_type):
     """
     Determines the Educational Objective based on the credential and catalog type.
     """
-    cred_lower = credential.lower()
+    # NFKC folds PDF ligatures ("Certiﬁcate") back to plain letters
+    cred_lower = unicodedata.normalize("NFKC", credential).lower()
     
     # Check for Certificates first
     if "certificate" in cred_lower:
-        if "graduate" in cred_lower or catalog_type == 'gr':
+        if ("graduate" in cred_lower and "undergraduate" not in cred_lower) or catalog_type == 'gr':
             return "Grad Cert"
         else:
             return "Certificate" # Undergraduate Certificate
             
     # Check for Doctorate
-    if any(x in cred_lower for x in ["ph.d", "ed.d", "au.d", "d.b.a", "d.n.p", "d.p.t", "pharm.d", "doctor"]):
+    if any(x in cred_lower for x in ["ph.d", "ed.d", "au.d", "d.b.a", "d.n.p", "d.p.t", "pharm.d", "dr.p.h", "m.d.", "doctor"]):
         return "Doctorate"
         
     # Check for Masters
@@ -457,19 +861,187 @@ def has_concentration(program_name):
         return "Yes"
     return "No"
 
-def parse_program_details(text, program_name, credential, catalog_type, academic_year="2025-2026", model_choice="Gemini 2.5 Pro"):
+DETAIL_KEYS = ["Accredited", "Educational_Objective", "Concentrations", "Total_Credit_Hours", "License_Prep", "Modality"]
+
+class ProgramDetails(typing.TypedDict):
+    """The details extracted for one program (values as written to the report)."""
+    Accredited: typing.Literal["Yes", "No"]
+    Educational_Objective: typing.Literal["Bachelor", "Certificate", "Masters", "Doctorate", "Grad Cert"]
+    Concentrations: typing.Literal["Yes", "No"]
+    Total_Credit_Hours: str  # a number such as "120", or "Unknown"
+    License_Prep: typing.Literal["Yes", "No"]
+    Modality: typing.Literal["Resident", "Distant", "Both"]
+
+def _details_properties():
+    properties = {}
+    for key, hint in typing.get_type_hints(ProgramDetails).items():
+        prop = {"type": "string"}
+        if typing.get_origin(hint) is typing.Literal:
+            prop["enum"] = list(typing.get_args(hint))
+        properties[key] = prop
+    return properties
+
+# JSON schemas passed to call_llm for structured detail output
+DETAIL_SCHEMA = {
+    "type": "object",
+    "properties": _details_properties(),
+    "required": DETAIL_KEYS,
+    "additionalProperties": False,
+}
+BATCH_DETAIL_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "programs": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "properties": dict({"Index": {"type": "integer"}, "Program": {"type": "string"}}, **_details_properties()),
+                "required": ["Index", "Program"] + DETAIL_KEYS,
+                "additionalProperties": False,
+            },
+        },
+    },
+    "required": ["programs"],
+    "additionalProperties": False,
+}
+
+_HOURS_VALUE = re.compile(r"\d{1,3}")
+_BOOLEAN_WORDS = {"yes": "Yes", "true": "Yes", "y": "Yes", "no": "No", "false": "No", "n": "No"}
+
+def coerce_details(item):
     """
-    Analyzes the program text to determine Accreditation, Educational Objective, and Concentrations.
+    Maps a decoded details object onto ProgramDetails: keys are matched
+    loosely ("Educational Objective"), values case-insensitively against
+    the allowed ones, and credit hours reduced to the number.
+    Returns a dict of the fields that could be read.
     """
-    # model = genai.GenerativeModel('gemini-2.5-pro') # Moved to call_llm
+    if not isinstance(item, dict):
+        return {}
+    lookup = {re.sub(r"[\s_]+", "", str(k)).lower(): v for k, v in item.items()}
+    properties = _details_properties()
 
-    prompt_2526 = f"""
-    You are analyzing the catalog entry for the academic program: "{program_name}" with credential "{credential}".
-    
-    Based on the provided text, determine the following:
-    1. **Accredited**: Is the program accredited? Return "No" ONLY if the text EXPLICITLY states it is "not accredited" or "pending accreditation". Otherwise, return "Yes".
+    details = {}
+    for key in DETAIL_KEYS:
+        value = lookup.get(key.replace("_", "").lower())
+        if value is None:
+            continue
+        if isinstance(value, bool):
+            value = "Yes" if value else "No"
+        value = str(value).strip()
+        allowed = properties[key].get("enum")
+        if key == "Total_Credit_Hours":
+            match = _HOURS_VALUE.search(value)
+            if match:
+                details[key] = match.group(0)
+            elif value.lower() == "unknown":
+                details[key] = "Unknown"
+        elif allowed:
+            matches = [a for a in allowed if a.lower() == value.lower()]
+            if not matches and allowed == ["Yes", "No"]:
+                matches = [_BOOLEAN_WORDS.get(value.lower())] if value.lower() in _BOOLEAN_WORDS else []
+            if matches:
+                details[key] = matches[0]
+    return details
+
+_detail_response_stats = {"responses": 0, "repaired": 0, "malformed": 0}
+
+def _count_detail_response(status, count=1):
+    with _stats_lock:
+        _detail_response_stats["responses"] += count
+        if status != "ok":
+            _detail_response_stats[status] += count
+
+def parse_details_response(response_text):
+    """
+    Decodes a single-program details response. Returns (details, status)
+    where status is "ok", "repaired" (near-valid JSON or values that needed
+    normalizing) or "malformed" (details holds whatever fields were usable).
+    """
+    try:
+        data, repaired = json_repair.loads(response_text)
+    except ValueError:
+        return {}, "malformed"
+    details = coerce_details(data)
+    if len(details) < len(DETAIL_KEYS):
+        return details, "malformed"
+    if repaired or any(details[k] != data.get(k) for k in DETAIL_KEYS):
+        return details, "repaired"
+    return details, "ok"
+
+def get_detail_response_stats():
+    """Returns how many detail responses were received, needed repair, or were unusable."""
+    with _stats_lock:
+        return dict(_detail_response_stats)
+
+def reset_detail_response_stats():
+    with _stats_lock:
+        for k in _detail_response_stats:
+            _detail_response_stats[k] = 0
+
+# Placeholder credential the Catalog Report passes; the ToC program name
+# ("History B.A.") carries the real one
+DERIVED_CREDENTIAL = "Derived from Program Name"
+
+_stats_lock = threading.Lock()
+_batch_stats = {"batches": 0, "programs": 0, "fallbacks": 0}
+_fast_path_stats = {"checked": 0, "resolved": 0, "partial": 0}
+
+def resolve_details_locally(text, program_name, credential, catalog_type, academic_year="2025-2026"):
+    """
+    Fast path that settles detail fields without the LLM. Only applies when
+    the text states one unambiguous credit hour total; the Educational
+    Objective and Concentrations then come from the credential helpers and
+    the remaining fields from keyword rules.
+    Returns a dict with only the resolved fields (empty if none).
+    """
+    hours = detail_rules.find_total_credit_hours(text, academic_year)
+    if hours is None:
+        return {}
+
+    source = program_name if credential == DERIVED_CREDENTIAL else credential
+    objective = get_educational_objective(source, catalog_type)
+    resolved = {"Total_Credit_Hours": hours, "Educational_Objective": objective}
+
+    # Graduate programs can list concentrations in the text; those need the LLM
+    if objective not in ("Masters", "Doctorate", "Grad Cert") or not detail_rules.mentions_concentrations(text):
+        resolved["Concentrations"] = has_concentration(program_name)
+
+    for key, value in (
+        ("Accredited", detail_rules.detect_accredited(text)),
+        ("License_Prep", detail_rules.detect_license_prep(text)),
+        ("Modality", detail_rules.detect_modality(text)),
+    ):
+        if value is not None:
+            resolved[key] = value
+    return resolved
+
+def _fast_path(text, program_name, credential, catalog_type, academic_year):
+    """Runs resolve_details_locally and records whether the LLM is still needed."""
+    resolved = resolve_details_locally(text, program_name, credential, catalog_type, academic_year)
+    complete = all(k in resolved for k in DETAIL_KEYS)
+    with _stats_lock:
+        _fast_path_stats["checked"] += 1
+        if complete:
+            _fast_path_stats["resolved"] += 1
+        elif resolved:
+            _fast_path_stats["partial"] += 1
+    return resolved, complete
+
+def get_fast_path_stats():
+    """Returns how many programs the fast path checked, fully resolved without an LLM call, or partially resolved."""
+    with _stats_lock:
+        return dict(_fast_path_stats)
+
+def reset_fast_path_stats():
+    with _stats_lock:
+        for k in _fast_path_stats:
+            _fast_path_stats[k] = 0
+
+# Determination rules shared by the single-program and batched detail prompts.
+# {credential_guide} is filled in with the credential hint for the request.
+_DETAIL_CRITERIA_2526 = """    1. **Accredited**: Is the program accredited? Return "No" ONLY if the text EXPLICITLY states it is "not accredited" or "pending accreditation". Otherwise, return "Yes".
     2. **Educational Objective**: What is the level of this program? Choose one: "Bachelor", "Certificate", "Masters", "Doctorate", "Grad Cert".
-       - Use the credential "{credential}" as the primary guide.
+       - {credential_guide}
        - "B.S.", "B.A." -> "Bachelor"
        - "Minor" -> "Bachelor"
        - "M.S.", "M.A." -> "Masters"
@@ -515,23 +1087,11 @@ def parse_program_details(text, program_name, credential, catalog_type, academic
     6. **Modality**: What is the primary means of instruction delivery?
        - **"Distant"**: If the text explicitly states the program is offered "entirely online", "fully online", "100% online", or "exclusively online".
        - **"Both"**: If the text states the program is offered "both on-campus and online", "hybrid", or available in "both formats".
-       - **"Resident"**: Default value. Use this if neither of the above are explicitly stated, or if it says "on-campus", "face-to-face", or "in-person".
-
-    **OUTPUT FORMAT:**
-    Return a JSON object with keys: "Accredited", "Educational_Objective", "Concentrations", "Total_Credit_Hours", "License_Prep", "Modality".
-    Example: {{"Accredited": "Yes", "Educational_Objective": "Bachelor", "Concentrations": "No", "Total_Credit_Hours": "120", "License_Prep": "No", "Modality": "Resident"}}
-
-    Text to analyze:
-    {text}
-    """
+       - **"Resident"**: Default value. Use this if neither of the above are explicitly stated, or if it says "on-campus", "face-to-face", or "in-person"."""
 
-    prompt_2425 = f"""
-    You are analyzing the catalog entry for the academic program: "{program_name}" with credential "{credential}".
-    
-    Based on the provided text, determine the following:
-    1. **Accredited**: Is the program accredited? Return "No" ONLY if the text EXPLICITLY states it is "not accredited" or "pending accreditation". Otherwise, return "Yes".
+_DETAIL_CRITERIA_2425 = """    1. **Accredited**: Is the program accredited? Return "No" ONLY if the text EXPLICITLY states it is "not accredited" or "pending accreditation". Otherwise, return "Yes".
     2. **Educational Objective**: What is the level of this program? Choose one: "Bachelor", "Certificate", "Masters", "Doctorate", "Grad Cert".
-       - Use the credential "{credential}" as the primary guide.
+       - {credential_guide}
        - "B.S.", "B.A." -> "Bachelor"
        - "Minor" -> "Bachelor"
        - "M.S.", "M.A." -> "Masters"
@@ -568,7 +1128,69 @@ def parse_program_details(text, program_name, credential, catalog_type, academic
     6. **Modality**: What is the primary means of instruction delivery?
        - **"Distant"**: If the text explicitly states the program is offered "entirely online", "fully online", "100% online", or "exclusively online".
        - **"Both"**: If the text states the program is offered "both on-campus and online", "hybrid", or available in "both formats".
-       - **"Resident"**: Default value. Use this if neither of the above are explicitly stated, or if it says "on-campus", "face-to-face", or "in-person".
+       - **"Resident"**: Default value. Use this if neither of the above are explicitly stated, or if it says "on-campus", "face-to-face", or "in-person"."""
+
+
+def _detail_criteria(academic_year):
+    # The 2024-2025 catalog is read with its own rules
+    if "2024-2025" in academic_year:
+        return _DETAIL_CRITERIA_2425
+    return _DETAIL_CRITERIA_2526
+
+def _program_fingerprint(text, program_name, catalog_type, academic_year, model_choice):
+    model_name = resolve_model(model_choice)[1] or model_choice
+    return fingerprint_store.fingerprint(text, program_name, catalog_type, model_name, _detail_criteria(academic_year))
+
+def parse_program_details(text, program_name, credential, catalog_type, academic_year="2025-2026", model_choice="Gemini 2.5 Pro", use_cache=True, fast_path=False, reuse=False,
+                          reuse_model=None):
+    """
+    Analyzes the program text to determine Accreditation, Educational Objective, and Concentrations.
+    With fast_path, fields settled by resolve_details_locally are kept and
+    the LLM is only called if some remain ambiguous.
+    With reuse (and use_cache), a program whose normalized text matches one
+    analyzed in an earlier run by the same model under the same criteria
+    gets the stored result instead. reuse_model reads the stored results of
+    another model and stores nothing: the cascade's fast stage passes its
+    strong model, and escalate_details stores answers once reviewed.
+    """
+    resolved = {}
+    if fast_path:
+        resolved, complete = _fast_path(text, program_name, credential, catalog_type, academic_year)
+        if complete:
+            return {k: resolved[k] for k in DETAIL_KEYS}
+
+    fp = None
+    if reuse and use_cache:
+        fp = _program_fingerprint(text, program_name, catalog_type, academic_year, reuse_model or model_choice)
+        stored = fingerprint_store.get(fp)
+        if stored is not None:
+            stored.update(resolved)
+            return stored
+        if reuse_model and reuse_model != model_choice:
+            fp = None  # not this model's answer to keep
+
+    # model = genai.GenerativeModel('gemini-2.5-pro') # Moved to call_llm
+    credential_guide = f'Use the credential "{credential}" as the primary guide.'
+
+    prompt_2526 = f"""
+    You are analyzing the catalog entry for the academic program: "{program_name}" with credential "{credential}".
+    
+    Based on the provided text, determine the following:
+{_DETAIL_CRITERIA_2526.format(credential_guide=credential_guide)}
+
+    **OUTPUT FORMAT:**
+    Return a JSON object with keys: "Accredited", "Educational_Objective", "Concentrations", "Total_Credit_Hours", "License_Prep", "Modality".
+    Example: {{"Accredited": "Yes", "Educational_Objective": "Bachelor", "Concentrations": "No", "Total_Credit_Hours": "120", "License_Prep": "No", "Modality": "Resident"}}
+
+    Text to analyze:
+    {text}
+    """
+
+    prompt_2425 = f"""
+    You are analyzing the catalog entry for the academic program: "{program_name}" with credential "{credential}".
+    
+    Based on the provided text, determine the following:
+{_DETAIL_CRITERIA_2425.format(credential_guide=credential_guide)}
 
     **OUTPUT FORMAT:**
     Return a JSON object with keys: "Accredited", "Educational_Objective", "Concentrations", "Total_Credit_Hours", "License_Prep", "Modality".
@@ -584,16 +1206,299 @@ def parse_program_details(text, program_name, credential, catalog_type, academic
     else:
         prompt = prompt_2526
     
-    try:
-        response_text = call_llm(prompt, model_choice, json_mode=True)
-        return json.loads(response_text)
-    except Exception as e:
-        print(f"Error parsing details for {program_name}: {e}")
-        # Fallback using helpers
-        return {
+    response_text = call_llm(prompt, model_choice, use_cache=use_cache, response_schema=DETAIL_SCHEMA)
+    details, status = parse_details_response(response_text)
+    _count_detail_response(status)
+    if status == "malformed":
+        print(f"Error parsing details for {program_name}: malformed response {str(response_text)[:100]!r}")
+        # Don't replay an unusable answer on the next run
+        if use_cache and response_text:
+            discard_cached_response(prompt, model_choice, response_schema=DETAIL_SCHEMA)
+        # Fallback using helpers, keeping any fields that could be read
+        details = dict({
             "Accredited": "Yes",
             "Educational_Objective": get_educational_objective(credential, catalog_type),
             "Concentrations": has_concentration(program_name),
             "Total_Credit_Hours": "Unknown"
-        }
+        }, **details)
+    details.update(resolved)
+    # Fallback values are not worth keeping for later runs
+    if fp and status != "malformed":
+        fingerprint_store.put(fp, program_name, details, model_choice, academic_year)
+    return details
+
+# Cheap-first cascade: programs go to the fast model first and are re-run on
+# the stronger model when the answer looks wrong, or when a sampled audit
+# finds the two models disagree
+CASCADE_FAST_MODEL = "Gemini 1.5 Flash"
+DEFAULT_CASCADE_AUDIT_RATE = 0.05
+
+# Input token budget for one batched details request (override with
+# OVS_LLM_BATCH_TOKENS) and the most programs packed into a single batch
+BATCH_TOKENS_ENV = "OVS_LLM_BATCH_TOKENS"
+DEFAULT_BATCH_TOKENS = 12000
+DEFAULT_BATCH_MAX_PROGRAMS = 8
+
+def get_batch_token_budget():
+    return int(os.getenv(BATCH_TOKENS_ENV, DEFAULT_BATCH_TOKENS))
+
+def plan_detail_batches(programs, token_budget=None, max_programs=DEFAULT_BATCH_MAX_PROGRAMS):
+    """
+    Greedily packs programs (dicts with a "text" key) into batches whose
+    combined text stays within the token budget. A program larger than the
+    budget gets a batch of its own.
+    """
+    if token_budget is None:
+        token_budget = get_batch_token_budget()
+
+    batches = []
+    current = []
+    used = 0
+    for program in programs:
+        cost = len(program["text"]) // 4
+        if current and (used + cost > token_budget or len(current) >= max_programs):
+            batches.append(current)
+            current = []
+            used = 0
+        current.append(program)
+        used += cost
+    if current:
+        batches.append(current)
+    return batches
+
+def _build_batch_prompt(programs, academic_year):
+    criteria = _detail_criteria(academic_year).format(credential_guide="Use that program's credential as the primary guide.")
+
+    entries = ""
+    for i, program in enumerate(programs, 1):
+        entries += f"""
+    === PROGRAM {i}: "{program['program_name']}" with credential "{program['credential']}" ===
+{program['text']}
+"""
+
+    return f"""
+    You are analyzing the catalog entries for {len(programs)} academic programs. Each entry starts with a header line giving its number, program name and credential.
+    
+    For EACH program, based only on that program's own text, determine the following:
+{criteria}
+
+    **OUTPUT FORMAT:**
+    Return a JSON object with a single key "programs" holding an array with one object per program, in the order given.
+    Each object has the keys: "Index", "Program", "Accredited", "Educational_Objective", "Concentrations", "Total_Credit_Hours", "License_Prep", "Modality".
+    "Index" is the program's number and "Program" its name, exactly as given in the entry header.
+    Example: {{"programs": [{{"Index": 1, "Program": "History B.A.", "Accredited": "Yes", "Educational_Objective": "Bachelor", "Concentrations": "No", "Total_Credit_Hours": "120", "License_Prep": "No", "Modality": "Resident"}}]}}
+
+    Programs to analyze:
+{entries}
+    """
+
+def _match_batch_results(response_text, programs):
+    """
+    Maps a batched response back onto the programs by name (the index is
+    only used to tell apart programs sharing a name). Programs with a
+    missing or incomplete result get None.
+    """
+    data, repaired = json_repair.loads(response_text)
+    if isinstance(data, dict):
+        data = data.get("programs")
+    if not isinstance(data, list):
+        return [None] * len(programs)
+
+    by_name = {}
+    for item in data:
+        details = coerce_details(item)
+        if len(details) < len(DETAIL_KEYS):
+            continue
+        name = str(item.get("Program", "")).strip().lower()
+        by_name.setdefault(name, {})[str(item.get("Index", ""))] = details
+
+    results = []
+    for i, program in enumerate(programs, 1):
+        candidates = by_name.get(str(program["program_name"]).strip().lower(), {})
+        details = candidates.get(str(i))
+        if details is None and len(candidates) == 1:
+            details = next(iter(candidates.values()))
+        results.append(details)
+    return results
+
+def parse_program_details_batch(programs, academic_year="2025-2026", model_choice="Gemini 2.5 Pro", use_cache=True, fast_path=False,
+                                escalate_model=None, audit_rate=DEFAULT_CASCADE_AUDIT_RATE, reuse=False):
+    """
+    Analyzes several programs in one JSON-mode request. programs is a list of
+    dicts with "text", "program_name", "credential" and "catalog_type".
+    Returns one details dict per program, in order. Programs missing from a
+    malformed or incomplete response are re-sent individually. With
+    fast_path, programs the fast path fully resolves are left out of the
+    request. With escalate_model, each result goes through the cascade
+    review (escalate_details) against that model. With reuse, programs
+    whose text fingerprint is already stored are left out as well; under
+    the cascade those are the escalate_model's stored answers, and
+    first-stage answers are only stored once they pass review.
+    """
+    results = [None] * len(programs)
+    resolved = [{} for _ in programs]
+    if fast_path:
+        for i, p in enumerate(programs):
+            resolved[i], complete = _fast_path(p["text"], p["program_name"], p["credential"], p["catalog_type"], academic_year)
+            if complete:
+                results[i] = {k: resolved[i][k] for k in DETAIL_KEYS}
+
+    fingerprints = [None] * len(programs)
+    if reuse and use_cache:
+        for i, p in enumerate(programs):
+            if results[i] is None:
+                fingerprints[i] = _program_fingerprint(p["text"], p["program_name"], p["catalog_type"], academic_year, escalate_model or model_choice)
+                stored = fingerprint_store.get(fingerprints[i])
+                if stored is not None:
+                    stored.update(resolved[i])
+                    results[i] = stored
+                if stored is not None or escalate_model:
+                    fingerprints[i] = None  # nothing new to store
+
+    pending = [i for i, details in enumerate(results) if details is None]
+    if len(pending) > 1:
+        batch = [programs[i] for i in pending]
+        prompt = _build_batch_prompt(batch, academic_year)
+        response_text = call_llm(prompt, model_choice, use_cache=use_cache, response_schema=BATCH_DETAIL_SCHEMA)
+        try:
+            batch_results = _match_batch_results(response_text, batch)
+        except ValueError as e:
+            print(f"Error parsing batched details for {len(batch)} programs: {e}")
+            batch_results = [None] * len(batch)
+        _count_detail_response("ok", len(batch) - batch_results.count(None))
+        _count_detail_response("malformed", batch_results.count(None))
+        if None in batch_results and use_cache and response_text:
+            discard_cached_response(prompt, model_choice, response_schema=BATCH_DETAIL_SCHEMA)
+
+        missing = 0
+        for i, details in zip(pending, batch_results):
+            if details is None:
+                missing += 1
+            else:
+                details.update(resolved[i])
+                results[i] = details
+                if fingerprints[i]:
+                    fingerprint_store.put(fingerprints[i], programs[i]["program_name"], details, model_choice, academic_year)
+        if missing:
+            print(f"Batch of {len(batch)}: {missing} program(s) missing from response, retrying individually.")
+
+        with _stats_lock:
+            _batch_stats["batches"] += 1
+            _batch_stats["programs"] += len(batch)
+            _batch_stats["fallbacks"] += missing
+
+    # Single leftovers and programs missing from the batch response
+    for i, details in enumerate(results):
+        if details is None:
+            p = programs[i]
+            results[i] = parse_program_details(p["text"], p["program_name"], p["credential"], p["catalog_type"], academic_year, model_choice, use_cache=use_cache,
+                                               reuse=reuse, reuse_model=escalate_model)
+            results[i].update(resolved[i])
+
+    if escalate_model:
+        for i, p in enumerate(programs):
+            results[i] = escalate_details(results[i], p["text"], p["program_name"], p["credential"], p["catalog_type"], academic_year,
+                                          escalate_model, use_cache=use_cache, fast_path=fast_path, audit_rate=audit_rate, reuse=reuse)
+    return results
+
+def get_batch_stats():
+    """Returns how many batched requests were sent, the programs they covered and the per-program fallbacks."""
+    with _stats_lock:
+        return dict(_batch_stats)
+
+def reset_batch_stats():
+    with _stats_lock:
+        for k in _batch_stats:
+            _batch_stats[k] = 0
+
+# Plausible total credit hours for each Educational Objective. Minors,
+# undergraduate certificates and exploratory pathways may be reported as
+# "Bachelor", so they are recognized by name and get their own ranges.
+CREDIT_HOUR_BOUNDS = {
+    "Minor": (9, 40),
+    "Exploratory": (12, 60),
+    "Bachelor": (60, 200),
+    "Certificate": (6, 60),
+    "Grad Cert": (6, 40),
+    "Masters": (24, 120),
+    "Doctorate": (24, 200),
+}
+
+_cascade_stats = {"programs": 0, "escalated": 0, "unknown": 0, "implausible": 0, "audited": 0, "disagreed": 0}
+
+def check_plausibility(details, program_name):
+    """
+    Returns why a details result needs a second opinion ("unknown" or
+    "implausible"), or None when it looks sound.
+    """
+    hours = str(details.get("Total_Credit_Hours", "Unknown")).strip()
+    if not hours.isdigit():
+        return "unknown"
+    name = unicodedata.normalize("NFKC", program_name).lower()
+    objective = details.get("Educational_Objective")
+    if "minor" in name:
+        objective = "Minor"
+    elif name.startswith("exploratory curriculum"):
+        objective = "Exploratory"
+    elif "certificate" in name and objective != "Grad Cert":
+        objective = "Certificate"
+    low, high = CREDIT_HOUR_BOUNDS.get(objective, (1, 250))
+    if not low <= int(hours) <= high:
+        return "implausible"
+    return None
+
+def _in_audit_sample(program_name, text, audit_rate):
+    # Stable per program, so reruns audit the same programs (and hit the cache)
+    digest = hashlib.sha256(f"{program_name}\n{text}".encode("utf-8")).digest()
+    return int.from_bytes(digest[:4], "big") / 2 ** 32 < audit_rate
+
+def escalate_details(details, text, program_name, credential, catalog_type, academic_year="2025-2026", strong_model="Gemini 2.5 Pro",
+                     use_cache=True, fast_path=False, audit_rate=DEFAULT_CASCADE_AUDIT_RATE, reuse=False):
+    """
+    Second stage of the cascade for a fast-model result. Re-runs the program
+    on strong_model when the result is Unknown or implausible, and for a
+    sampled audit_rate fraction of the rest; an audit that disagrees
+    replaces the fast result. With reuse, results that pass review are
+    stored under strong_model's fingerprint. Returns the details to report.
+    """
+    if fast_path:
+        local = resolve_details_locally(text, program_name, credential, catalog_type, academic_year)
+        if all(k in local for k in DETAIL_KEYS):
+            return details  # settled without an LLM, nothing to second-guess
+
+    reason = check_plausibility(details, program_name)
+    audit = reason is None and _in_audit_sample(program_name, text, audit_rate)
+    with _stats_lock:
+        _cascade_stats["programs"] += 1
+        if reason:
+            _cascade_stats[reason] += 1
+        if audit:
+            _cascade_stats["audited"] += 1
+    if reason is None and not audit:
+        # The answer passed review: keep it for later runs under the key
+        # the fast stage reads (reused answers are already there)
+        if reuse and use_cache:
+            fp = _program_fingerprint(text, program_name, catalog_type, academic_year, strong_model)
+            fingerprint_store.put(fp, program_name, details, strong_model, academic_year, replace=False)
+        return details
+
+    # With reuse, later runs get the reviewed answer, never an unreviewed one
+    strong = parse_program_details(text, program_name, credential, catalog_type, academic_year, strong_model, use_cache=use_cache, fast_path=fast_path, reuse=reuse)
+    if audit:
+        if all(str(strong.get(k)) == str(details.get(k)) for k in DETAIL_KEYS):
+            return details
+        with _stats_lock:
+            _cascade_stats["disagreed"] += 1
+    with _stats_lock:
+        _cascade_stats["escalated"] += 1
+    return strong
+
+def get_cascade_stats():
+    """Returns how many programs the cascade reviewed and escalated, and why."""
+    with _stats_lock:
+        return dict(_cascade_stats)
 
+def reset_cascade_stats():
+    with _stats_lock:
+        for k in _cascade_stats:
+            _cascade_stats[k] = 0
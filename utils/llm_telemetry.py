@@ -0,0 +1,215 @@
+import contextlib
+import contextvars
+import functools
+import io
+import threading
+import time
+import uuid
+
+import pandas as pd
+
+# List prices in USD per million (prompt, completion) tokens, used for the
+# cost estimate in the run summary. Update them when pricing changes.
+MODEL_PRICES = {
+    "gemini-2.0-flash": (0.10, 0.40),
+    "gemini-2.5-pro": (1.25, 10.00),
+    "gemini-3-pro-preview": (2.00, 12.00),
+    "gpt-4o-mini": (0.15, 0.60),
+}
+
+RECORD_FIELDS = [
+    "timestamp", "run_id", "model", "caller", "cache_hit", "prompt_tokens", "completion_tokens",
+    "tokens_estimated", "latency_s", "retries", "finish_reason", "ok", "cost_usd",
+]
+
+# Records are kept for the whole process, like the cache and client stats,
+# and tagged with the run (one ToC or Catalog Report generation) that made
+# the call. llm_dispatch copies the run into its worker threads.
+_lock = threading.Lock()
+_records = []
+_run_id = contextvars.ContextVar("llm_run_id", default=None)
+
+# What the provider reported for the call running on this thread
+_current = threading.local()
+
+
+@contextlib.contextmanager
+def run_scope(kind):
+    """Tags every call made inside the block with a new run id, which it yields."""
+    run_id = f"{kind}-{time.strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:6]}"
+    token = _run_id.set(run_id)
+    try:
+        yield run_id
+    finally:
+        _run_id.reset(token)
+
+
+def scoped_run(kind):
+    """Decorator form of run_scope; the function can read current_run()."""
+    def decorate(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with run_scope(kind):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def current_run():
+    """Returns the id of the run the calling code belongs to, or None."""
+    return _run_id.get()
+
+
+def begin_call():
+    """Starts collecting provider details (usage, retries) for this thread's call."""
+    _current.details = {"retries": 0}
+
+
+def note_response(prompt_tokens=None, completion_tokens=None, finish_reason=None):
+    """Records usage and finish reason reported by the provider for the current call."""
+    details = getattr(_current, "details", None)
+    if details is None:
+        return
+    if prompt_tokens is not None:
+        details["prompt_tokens"] = int(prompt_tokens)
+    if completion_tokens is not None:
+        details["completion_tokens"] = int(completion_tokens)
+    if finish_reason is not None:
+        details["finish_reason"] = str(finish_reason)
+
+
+def count_retry(retry_state=None):
+    """tenacity before_sleep hook: counts a retry against the current call."""
+    details = getattr(_current, "details", None)
+    if details is not None:
+        details["retries"] += 1
+
+
+def estimate_cost(model, prompt_tokens, completion_tokens):
+    prompt_price, completion_price = MODEL_PRICES.get(model, (0.0, 0.0))
+    return (prompt_tokens * prompt_price + completion_tokens * completion_price) / 1_000_000
+
+
+def end_call(model, prompt, response_text, latency_s, caller, cache_hit=False, ok=True):
+    """
+    Stores one structured record for the call. Token counts fall back to a
+    ~4 characters per token estimate when the provider reported none (cache
+    hits, replayed responses, errors).
+    """
+    details = getattr(_current, "details", None) or {"retries": 0}
+    _current.details = None
+
+    estimated = "prompt_tokens" not in details or "completion_tokens" not in details
+    prompt_tokens = details.get("prompt_tokens", len(prompt or "") // 4)
+    completion_tokens = details.get("completion_tokens", len(response_text or "") // 4)
+    finish_reason = details.get("finish_reason", "CACHED" if cache_hit else ("" if ok else "ERROR"))
+
+    record = {
+        "timestamp": time.time(),
+        "run_id": _run_id.get(),
+        "model": model,
+        "caller": caller,
+        "cache_hit": bool(cache_hit),
+        "prompt_tokens": prompt_tokens,
+        "completion_tokens": completion_tokens,
+        "tokens_estimated": estimated,
+        "latency_s": round(latency_s, 3),
+        "retries": details["retries"],
+        "finish_reason": finish_reason,
+        "ok": bool(ok),
+        # Cache hits cost nothing
+        "cost_usd": 0.0 if cache_hit else round(estimate_cost(model, prompt_tokens, completion_tokens), 6),
+    }
+    with _lock:
+        _records.append(record)
+    return record
+
+
+def get_records(run_id=None):
+    """Returns the records of one run, or of every run when run_id is None."""
+    with _lock:
+        return [r for r in _records if run_id is None or r["run_id"] == run_id]
+
+
+def reset():
+    with _lock:
+        _records.clear()
+
+
+def get_records_frame(run_id=None):
+    return pd.DataFrame(get_records(run_id), columns=RECORD_FIELDS)
+
+
+def summarize(run_id=None):
+    """
+    Rolls the records of one run (every run when run_id is None) up per
+    model: calls, cache hits, tokens, latency percentiles (of calls that
+    reached the model), retries, failures and estimated cost. Returns an
+    empty DataFrame when nothing was recorded.
+    """
+    df = get_records_frame(run_id)
+    columns = ["model", "calls", "cache_hits", "prompt_tokens", "completion_tokens",
+               "p50_latency_s", "p95_latency_s", "retries", "failures", "cost_usd"]
+    if df.empty:
+        return pd.DataFrame(columns=columns)
+
+    rows = []
+    for model, group in df.groupby("model", sort=True):
+        sent = group[~group["cache_hit"]]
+        rows.append({
+            "model": model,
+            "calls": len(group),
+            "cache_hits": int(group["cache_hit"].sum()),
+            "prompt_tokens": int(group["prompt_tokens"].sum()),
+            "completion_tokens": int(group["completion_tokens"].sum()),
+            "p50_latency_s": round(float(sent["latency_s"].quantile(0.5)), 3) if len(sent) else 0.0,
+            "p95_latency_s": round(float(sent["latency_s"].quantile(0.95)), 3) if len(sent) else 0.0,
+            "retries": int(group["retries"].sum()),
+            "failures": int((~group["ok"]).sum()),
+            "cost_usd": round(float(group["cost_usd"].sum()), 4),
+        })
+    return pd.DataFrame(rows, columns=columns)
+
+
+def to_csv(run_id=None):
+    """Returns the call records of one run (every run when run_id is None) as CSV bytes."""
+    output = io.StringIO()
+    get_records_frame(run_id).to_csv(output, index=False)
+    return output.getvalue().encode("utf-8")
+
+
+def estimate_cascade_savings(records, fast_model, strong_model):
+    """
+    Compares a cascade run's calls against running every program on
+    strong_model. The all-strong run is approximated by repricing the fast
+    model's calls at strong_model prices, with latencies scaled by the
+    observed strong/fast latency ratio (None when no uncached call to
+    either model was seen). Latencies are summed per call, not wall time.
+    """
+    fast = [r for r in records if r["model"] == fast_model]
+    strong = [r for r in records if r["model"] == strong_model]
+
+    actual_cost = sum(r["cost_usd"] for r in fast + strong)
+    all_strong_cost = sum(
+        0.0 if r["cache_hit"] else estimate_cost(strong_model, r["prompt_tokens"], r["completion_tokens"])
+        for r in fast
+    )
+
+    actual_latency = sum(r["latency_s"] for r in fast + strong)
+    fast_sent = [r["latency_s"] for r in fast if not r["cache_hit"]]
+    strong_sent = [r["latency_s"] for r in strong if not r["cache_hit"]]
+    all_strong_latency = None
+    if fast_sent and strong_sent and sum(fast_sent) > 0:
+        ratio = (sum(strong_sent) / len(strong_sent)) / (sum(fast_sent) / len(fast_sent))
+        all_strong_latency = round(sum(fast_sent) * ratio, 3)
+
+    return {
+        "fast_calls": len(fast),
+        "strong_calls": len(strong),
+        "actual_cost_usd": round(actual_cost, 4),
+        "all_strong_cost_usd": round(all_strong_cost, 4),
+        "cost_saved_usd": round(all_strong_cost - actual_cost, 4),
+        "actual_latency_s": round(actual_latency, 3),
+        "all_strong_latency_s": all_strong_latency,
+        "latency_saved_s": None if all_strong_latency is None else round(all_strong_latency - actual_latency, 3),
+    }
@@ -0,0 +1,306 @@
+import argparse
+import json
+import os
+import random
+import threading
+import time
+import urllib.error
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import google.api_core.exceptions
+from tenacity import retry, stop_after_attempt, wait_exponential, retry_if_exception_type
+
+from utils import llm_cache
+from utils import llm_telemetry
+from utils import page_cache
+
+# How call_llm reaches a model:
+#   live   - the provider APIs (default)
+#   record - the provider APIs, appending every prompt/response/latency to a JSONL file
+#   replay - answers from a recorded JSONL file, no network
+#   stub   - a local HTTP stand-in server (python -m utils.llm_transport serve)
+TRANSPORT_ENV = "OVS_LLM_TRANSPORT"
+TRANSPORT_FILE_ENV = "OVS_LLM_TRANSPORT_FILE"
+REPLAY_LATENCY_ENV = "OVS_LLM_REPLAY_LATENCY"
+REPLAY_429_RATE_ENV = "OVS_LLM_REPLAY_429_RATE"
+STUB_URL_ENV = "OVS_LLM_STUB_URL"
+
+MODES = ("live", "record", "replay", "stub")
+DEFAULT_STUB_PORT = 8765
+DEFAULT_STUB_URL = f"http://127.0.0.1:{DEFAULT_STUB_PORT}"
+
+
+def get_transport_file():
+    return os.getenv(TRANSPORT_FILE_ENV) or os.path.join(page_cache.get_cache_root(), "llm_transport.jsonl")
+
+
+def request_key(model_name, prompt, json_mode=False):
+    return llm_cache.make_key(model_name, prompt, json_mode)
+
+
+def load_recording(path):
+    """
+    Reads a record-mode JSONL file into {request key: (response, latency)}.
+    Later entries for the same request win.
+    """
+    responses = {}
+    if not os.path.exists(path):
+        return responses
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                entry = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            responses[entry["key"]] = (entry.get("response", ""), float(entry.get("latency_s", 0.0)))
+    return responses
+
+
+class LiveTransport:
+    """Sends requests to the provider APIs."""
+
+    mode = "live"
+
+    def complete(self, model_name, prompt, json_mode, live_call):
+        return live_call()
+
+    def stream(self, model_name, prompt, json_mode, live_stream):
+        yield from live_stream()
+
+
+class RecordTransport(LiveTransport):
+    """
+    Sends requests to the provider APIs and appends each prompt, response
+    and latency to a JSONL file that ReplayTransport can serve later.
+    """
+
+    mode = "record"
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def _record(self, model_name, prompt, json_mode, response, latency):
+        entry = {
+            "key": request_key(model_name, prompt, json_mode),
+            "model": model_name,
+            "json_mode": bool(json_mode),
+            "prompt": prompt,
+            "response": response,
+            "latency_s": round(latency, 3),
+        }
+        with self._lock:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(entry) + "\n")
+
+    def complete(self, model_name, prompt, json_mode, live_call):
+        start = time.monotonic()
+        response = live_call()
+        self._record(model_name, prompt, json_mode, response, time.monotonic() - start)
+        return response
+
+    def stream(self, model_name, prompt, json_mode, live_stream):
+        start = time.monotonic()
+        parts = []
+        for fragment in live_stream():
+            parts.append(fragment)
+            yield fragment
+        self._record(model_name, prompt, json_mode, "".join(parts), time.monotonic() - start)
+
+
+class ReplayTransport:
+    """
+    Serves recorded responses without touching the network.
+
+    latency_scale multiplies the recorded latency (0 answers instantly, 1
+    reproduces the live timings) and rate_limit_rate is the fraction of
+    requests that fail with a simulated 429 before being retried.
+    """
+
+    mode = "replay"
+
+    def __init__(self, path, latency_scale=0.0, rate_limit_rate=0.0, seed=None):
+        self.path = path
+        self.latency_scale = float(latency_scale)
+        self.rate_limit_rate = float(rate_limit_rate)
+        self.responses = load_recording(path)
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self.stats = {"served": 0, "missing": 0, "rate_limited": 0}
+
+    def _count(self, name):
+        with self._lock:
+            self.stats[name] += 1
+
+    @retry(
+        retry=retry_if_exception_type(google.api_core.exceptions.ResourceExhausted),
+        stop=stop_after_attempt(5),
+        wait=wait_exponential(multiplier=2, min=4, max=60),
+        before_sleep=llm_telemetry.count_retry
+    )
+    def _serve(self, model_name, prompt, json_mode):
+        with self._lock:
+            limited = self._random.random() < self.rate_limit_rate
+        if limited:
+            self._count("rate_limited")
+            raise google.api_core.exceptions.ResourceExhausted("Simulated 429 from replay transport")
+
+        entry = self.responses.get(request_key(model_name, prompt, json_mode))
+        if entry is None:
+            self._count("missing")
+            raise KeyError(f"No recorded response for this {model_name} prompt in {self.path}")
+
+        response, latency = entry
+        if self.latency_scale > 0:
+            time.sleep(latency * self.latency_scale)
+        self._count("served")
+        return response
+
+    def complete(self, model_name, prompt, json_mode, live_call):
+        return self._serve(model_name, prompt, json_mode)
+
+    def stream(self, model_name, prompt, json_mode, live_stream):
+        # Line by line, so streaming consumers see rows arrive one at a time
+        yield from self._serve(model_name, prompt, json_mode).splitlines(keepends=True)
+
+
+class StubTransport:
+    """Posts requests to a local stand-in server (see serve_stub)."""
+
+    mode = "stub"
+
+    def __init__(self, url=DEFAULT_STUB_URL, timeout=60):
+        self.url = url.rstrip("/")
+        self.timeout = timeout
+
+    @retry(
+        retry=retry_if_exception_type(google.api_core.exceptions.ResourceExhausted),
+        stop=stop_after_attempt(5),
+        wait=wait_exponential(multiplier=2, min=4, max=60),
+        before_sleep=llm_telemetry.count_retry
+    )
+    def complete(self, model_name, prompt, json_mode, live_call):
+        body = json.dumps({"model": model_name, "prompt": prompt, "json_mode": bool(json_mode)}).encode("utf-8")
+        request = urllib.request.Request(self.url + "/v1/complete", data=body, headers={"Content-Type": "application/json"})
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                return json.loads(response.read().decode("utf-8"))["text"]
+        except urllib.error.HTTPError as e:
+            if e.code == 429:
+                raise google.api_core.exceptions.ResourceExhausted("429 from stub server")
+            raise
+
+    def stream(self, model_name, prompt, json_mode, live_stream):
+        yield from self.complete(model_name, prompt, json_mode, None).splitlines(keepends=True)
+
+
+def serve_stub(path=None, host="127.0.0.1", port=DEFAULT_STUB_PORT, latency_scale=0.0, rate_limit_rate=0.0, default_response=None):
+    """
+    Builds a local HTTP server that answers StubTransport requests from a
+    recorded JSONL file, with optional latency and 429 responses. Unknown
+    prompts get default_response, or a 404 when it is None.
+    Returns the server; call serve_forever() (or run it on a thread).
+    """
+    replay = ReplayTransport(path or get_transport_file(), latency_scale, 0.0)
+    rng = random.Random()
+    rng_lock = threading.Lock()
+
+    class Handler(BaseHTTPRequestHandler):
+        def _reply(self, status, payload):
+            data = json.dumps(payload).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_POST(self):
+            length = int(self.headers.get("Content-Length", 0))
+            request = json.loads(self.rfile.read(length).decode("utf-8") or "{}")
+            with rng_lock:
+                limited = rng.random() < rate_limit_rate
+            if limited:
+                self._reply(429, {"error": "rate limited"})
+                return
+            try:
+                text = replay._serve(request.get("model"), request.get("prompt", ""), request.get("json_mode", False))
+            except KeyError as e:
+                if default_response is None:
+                    self._reply(404, {"error": str(e)})
+                    return
+                text = default_response
+            self._reply(200, {"text": text})
+
+        def log_message(self, format, *args):
+            pass
+
+    return ThreadingHTTPServer((host, port), Handler)
+
+
+_transport = None
+_transport_lock = threading.Lock()
+
+
+def build_transport(mode=None):
+    """Builds the transport for a mode (defaults to OVS_LLM_TRANSPORT)."""
+    mode = (mode or os.getenv(TRANSPORT_ENV) or "live").strip().lower()
+    if mode not in MODES:
+        raise ValueError(f"Unknown LLM transport '{mode}'. Expected one of: {', '.join(MODES)}")
+    if mode == "record":
+        return RecordTransport(get_transport_file())
+    if mode == "replay":
+        return ReplayTransport(
+            get_transport_file(),
+            latency_scale=float(os.getenv(REPLAY_LATENCY_ENV, 0)),
+            rate_limit_rate=float(os.getenv(REPLAY_429_RATE_ENV, 0)),
+        )
+    if mode == "stub":
+        return StubTransport(os.getenv(STUB_URL_ENV, DEFAULT_STUB_URL))
+    return LiveTransport()
+
+
+def get_transport():
+    """Returns the process-wide transport, built from the environment on first use."""
+    global _transport
+    with _transport_lock:
+        if _transport is None:
+            _transport = build_transport()
+        return _transport
+
+
+def set_transport(transport):
+    """Replaces the process-wide transport (None rebuilds it from the environment)."""
+    global _transport
+    with _transport_lock:
+        _transport = transport
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local stand-in server for the LLM stub transport.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    serve = sub.add_parser("serve", help="Answer stub transport requests from a recorded JSONL file.")
+    serve.add_argument("--file", default=None, help="Recording to serve (default: OVS_LLM_TRANSPORT_FILE).")
+    serve.add_argument("--host", default="127.0.0.1")
+    serve.add_argument("--port", type=int, default=DEFAULT_STUB_PORT)
+    serve.add_argument("--latency", type=float, default=0.0, help="Multiplier for the recorded latencies.")
+    serve.add_argument("--rate-limit-rate", type=float, default=0.0, help="Fraction of requests answered with 429.")
+    serve.add_argument("--default-response", default=None, help="Answer for prompts missing from the recording.")
+    args = parser.parse_args()
+
+    server = serve_stub(args.file, args.host, args.port, args.latency, args.rate_limit_rate, args.default_response)
+    print(f"Serving LLM stub on http://{args.host}:{args.port} from {args.file or get_transport_file()}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
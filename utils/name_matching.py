@@ -0,0 +1,276 @@
+import math
+import re
+import unicodedata
+from collections import defaultdict
+
+import numpy as np
+
+from utils import toc_rules
+
+# Pairs program names that differ between catalog years only in punctuation,
+# word order, small edits or a dropped credential ("Behavioral & Community
+# Sciences, B.S." vs "Behavioral and Community Sciences B.S.").
+#
+# Candidates come from a trigram index blocked by credential: a name only
+# reads the posting lists of its rarest trigrams, for the name lengths that
+# can reach min_score, and overlaps are counted over the pairs reached
+# instead of over every name in the block.
+
+DEFAULT_MIN_SCORE = 0.85
+
+# A credential found in only one of the two names costs this much
+CREDENTIAL_MISSING_PENALTY = 0.95
+
+_NON_WORD = re.compile(r"[^a-z0-9]+")
+_TRAILING_CREDENTIAL = re.compile(r"^(?P<program>.+?),?\s+(?P<credential>(?:[A-Z][A-Za-z]{0,5}\.)+[A-Za-z]{0,5}\.?)$")
+
+
+def split_credential(name):
+    """
+    Splits a program name into (program, credential), e.g.
+    "Accounting, M.Acc." -> ("Accounting", "M.Acc."). The credential is ""
+    when none is recognized.
+    """
+    name = " ".join(unicodedata.normalize("NFKC", str(name)).split())
+    kind, program, credential = toc_rules.classify_entry(name)
+    if kind == "program" and credential and credential != "N/A":
+        return program, credential
+    match = _TRAILING_CREDENTIAL.match(name)
+    if match:
+        return match.group("program").rstrip(",").strip(), match.group("credential")
+    return name, ""
+
+
+def normalize_name(text):
+    """Lower-cases, spells out "&" and drops punctuation: "Arts & Sciences," -> "arts and sciences"."""
+    text = unicodedata.normalize("NFKC", str(text)).lower().replace("&", " and ")
+    return " ".join(_NON_WORD.sub(" ", text).split())
+
+
+def credential_key(credential):
+    """"M.S.A.I." and "MSAI" both become "msai"."""
+    return normalize_name(credential).replace(" ", "")
+
+
+def _grams(text):
+    padded = f"  {text} "
+    return frozenset(padded[i:i + 3] for i in range(len(padded) - 2))
+
+
+class _Name:
+    __slots__ = ("name", "base", "compact", "credential", "tokens", "grams")
+
+    def __init__(self, name):
+        program, credential = split_credential(name)
+        self.name = name
+        self.base = normalize_name(program)
+        self.compact = self.base.replace(" ", "")
+        self.credential = credential_key(credential)
+        self.tokens = frozenset(self.base.split())
+        self.grams = _grams(self.base)
+
+
+def _min_overlap(size, min_score):
+    # Dice >= t needs t/(2-t) <= |y|/|x| <= (2-t)/t, so even the shortest
+    # name it allows shares at least t|x|/(2-t) trigrams with x
+    return max(1, math.ceil(min_score * size / (2 - min_score) - 1e-9))
+
+
+class _GramIndex:
+    # Names are given as their trigram ids, sorted; ids are numbered rarest
+    # first. Posting lists of trigram id -> positions of the names containing
+    # it are stored back to back, sorted by name length so a lookup only
+    # reads the lengths that can reach min_score. Every name's ids are kept
+    # back to back too, to count overlaps exactly.
+
+    # Names looked up together; bounds the size of the overlap arrays
+    CHUNK = 256
+    # Grams looked up past the prefix; each one read tightens the overlap
+    # bound, so fewer pairs need an exact count
+    PROBE_EXTRA = 2
+
+    def __init__(self, ranked, ids, gram_count, min_score):
+        self.gram_count = gram_count
+        self.min_score = min_score
+        self.sizes = np.array([len(mine) for mine in ranked])
+        self.ids = np.array(ids)
+        self.span = max(self.sizes) + 1
+        self.grams = np.concatenate([np.array(mine, dtype=np.int64) for mine in ranked])
+        self.row_starts = np.cumsum(self.sizes) - self.sizes
+        positions = np.repeat(np.arange(len(ranked)), self.sizes)
+        keys = self.grams * self.span + self.sizes[positions]
+        order = np.argsort(keys, kind="stable")
+        self.keys = keys[order]
+        self.positions = positions[order]
+
+    def candidates(self, names):
+        """
+        For each of names, given as (trigram count, sorted ids of its grams
+        found in the index order), the ids of names whose trigram Dice with
+        it is at least min_score.
+        """
+        if self.min_score <= 0:
+            return [self.ids.tolist() for _ in names]
+        results = []
+        for start in range(0, len(names), self.CHUNK):
+            results.extend(self._chunk_candidates(names[start:start + self.CHUNK]))
+        return results
+
+    def _chunk_candidates(self, names):
+        # Prefix filter: a name sharing min_overlap grams with x shares one of
+        # x's first size - min_overlap + 1 grams, so only those (the rarest)
+        # are looked up and the common trigrams' long posting lists are never
+        # read. Grams no name in the index has come first in the order and
+        # are never shared; they use up prefix places without a lookup.
+        min_score = self.min_score
+        sizes, rests, probe_of, probes, lows, highs, mine_of, mine = [], [], [], [], [], [], [], []
+        for k, (size, ids) in enumerate(names):
+            min_overlap = _min_overlap(size, min_score)
+            probe = ids[:max(0, size - min_overlap + 1 + self.PROBE_EXTRA - (size - len(ids)))]
+            sizes.append(size)
+            rests.append(len(ids) - len(probe))
+            probe_of.extend([k] * len(probe))
+            probes.extend(probe)
+            lows.extend([min_overlap] * len(probe))
+            highs.extend([math.floor((2 - min_score) * size / min_score + 1e-9)] * len(probe))
+            mine_of.extend([k] * len(ids))
+            mine.extend(ids)
+        results = [[] for _ in names]
+        if not probes:
+            return results
+        sizes, rests = np.array(sizes), np.array(rests)
+
+        # Length filter: each posting list is read only for the name lengths
+        # that can reach min_score. A name longer than any in the block
+        # reads nothing (its shortest length lies past the block's longest).
+        base = np.array(probes) * self.span
+        starts = np.searchsorted(self.keys, base + np.minimum(lows, self.span))
+        lengths = np.maximum(np.searchsorted(self.keys, base + np.minimum(highs, self.span - 1), side="right") - starts, 0)
+        at = np.repeat(starts - (np.cumsum(lengths) - lengths), lengths) + np.arange(lengths.sum())
+        reached = np.repeat(np.array(probe_of), lengths) * len(self.sizes) + self.positions[at]
+
+        # Overlap over the looked up grams, counted sparsely over the (name,
+        # indexed name) pairs reached; the grams not looked up add at most
+        # one each
+        pairs, counts = np.unique(reached, return_counts=True)
+        query, position = np.divmod(pairs, len(self.sizes))
+        other = self.sizes[position]
+        reachable = 2 * (counts + rests[query]) >= min_score * (sizes[query] + other) - 1e-9
+        query, position, other = query[reachable], position[reachable], other[reachable]
+        if not len(query):
+            return results
+
+        # Exact overlap for the pairs left
+        has = np.zeros((len(names), self.gram_count), dtype=bool)
+        has[mine_of, mine] = True
+        row_starts = np.cumsum(other) - other
+        at = np.repeat(self.row_starts[position] - row_starts, other) + np.arange(other.sum())
+        overlap = np.add.reduceat(has[np.repeat(query, other), self.grams[at]], row_starts, dtype=np.int64)
+        hit = 2 * overlap >= min_score * (sizes[query] + other)
+        for k, j in zip(query[hit].tolist(), self.ids[position[hit]].tolist()):
+            results[k].append(j)
+        return results
+
+
+def score_names(a, b):
+    """
+    Scores how likely two program names are the same program, from 0 to 1.
+    Returns (score, reason). Names with different credentials score 0.
+    """
+    score, reason = _score(_Name(a), _Name(b))
+    return round(score, 4), reason
+
+
+def _score(a, b):
+    if a.credential and b.credential and a.credential != b.credential:
+        return 0.0, "different credential"
+
+    if a.base == b.base:
+        score, reason = 1.0, "same name after normalizing"
+    elif a.tokens == b.tokens:
+        score, reason = 0.97, "same words, reordered"
+    elif a.compact == b.compact:
+        score, reason = 0.97, "same words, spaced differently"
+    else:
+        overlap = len(a.grams & b.grams)
+        score = 2 * overlap / (len(a.grams) + len(b.grams)) if overlap else 0.0
+        reason = "similar name"
+
+    if a.credential != b.credential:
+        score *= CREDENTIAL_MISSING_PENALTY
+        reason += ", credential in one year only"
+    return score, reason
+
+
+def match_names(names1, names2, min_score=DEFAULT_MIN_SCORE):
+    """
+    Pairs names from names1 with names from names2, one to one, best
+    scores first. Returns a list of (name1, name2, score, reason) for pairs
+    scoring at least min_score.
+    """
+    left = [_Name(n) for n in dict.fromkeys(names1)]
+    right = [_Name(n) for n in dict.fromkeys(names2)]
+    if not left or not right:
+        return []
+
+    scored = []
+
+    def keep(i, j):
+        score, reason = _score(left[i], right[j])
+        if score >= min_score:
+            scored.append((score, left[i].name, right[j].name, i, j, reason))
+
+    # Exact blocks: identical word sets, or identical letters ignoring spaces
+    by_tokens = defaultdict(list)
+    by_compact = defaultdict(list)
+    for j, r in enumerate(right):
+        by_tokens[r.tokens].append(j)
+        by_compact[r.compact].append(j)
+    exact = [set(by_tokens.get(l.tokens, [])) | set(by_compact.get(l.compact, [])) for l in left]
+    for i, js in enumerate(exact):
+        for j in js:
+            keep(i, j)
+
+    # Trigram index per credential block: a name only meets names with the
+    # same credential or none, and a name without one meets every name.
+    # The index's prefix and length filters and exact overlap count leave
+    # only pairs whose Dice reaches min_score. Trigrams are numbered rarest
+    # first over names2, one order for every block, and the names are looked
+    # up a block at a time.
+    frequency = defaultdict(int)
+    for r in right:
+        for g in r.grams:
+            frequency[g] += 1
+    gram_ids = {g: i for i, g in enumerate(sorted(frequency, key=lambda g: (frequency[g], g)))}
+    right_ids = [sorted(gram_ids[g] for g in r.grams) for r in right]
+    left_ids = [sorted(gram_ids[g] for g in l.grams if g in gram_ids) for l in left]
+
+    blocks = defaultdict(list)
+    for j, r in enumerate(right):
+        blocks[r.credential].append(j)
+        blocks[None].append(j)
+    indexes = {key: _GramIndex([right_ids[j] for j in members], members, len(gram_ids), min_score) for key, members in blocks.items()}
+
+    queries = defaultdict(list)
+    for i, l in enumerate(left):
+        for key in [None] if not l.credential else [l.credential, ""]:
+            if key in indexes:
+                queries[key].append(i)
+    for key, members in queries.items():
+        for i, js in zip(members, indexes[key].candidates([(len(left[i].grams), left_ids[i]) for i in members])):
+            for j in js:
+                if j not in exact[i]:
+                    keep(i, j)
+
+    # Best pairs first; names break ties so results do not depend on set order
+    scored.sort(key=lambda s: (-s[0], s[1], s[2]))
+    used_left = set()
+    used_right = set()
+    matches = []
+    for score, name1, name2, i, j, reason in scored:
+        if i in used_left or j in used_right:
+            continue
+        used_left.add(i)
+        used_right.add(j)
+        matches.append((name1, name2, round(score, 4), reason))
+    return matches
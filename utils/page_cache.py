@@ -0,0 +1,237 @@
+import gzip
+import hashlib
+import json
+import os
+import threading
+
+import pypdf
+
+# Cache location and size limit can be overridden through the environment
+CACHE_ROOT_ENV = "OVS_CACHE_DIR"
+DEFAULT_CACHE_ROOT = ".cache"
+PAGE_CACHE_MAX_MB_ENV = "OVS_PAGE_CACHE_MAX_MB"
+DEFAULT_PAGE_CACHE_MAX_MB = 500
+
+_stats_lock = threading.Lock()
+_stats = {"hits": 0, "misses": 0, "writes": 0, "evictions": 0}
+
+
+def get_cache_root():
+    """Returns the root directory used for all on-disk caches."""
+    return os.getenv(CACHE_ROOT_ENV, DEFAULT_CACHE_ROOT)
+
+
+def get_cache_dir(name):
+    """Returns (and creates) a named sub-directory of the cache root."""
+    path = os.path.join(get_cache_root(), name)
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def read_pdf_bytes(pdf_file):
+    """
+    Returns the raw bytes of a PDF given a path, a Streamlit UploadedFile,
+    raw bytes, or any file-like object.
+    """
+    if isinstance(pdf_file, (bytes, bytearray)):
+        return bytes(pdf_file)
+    if isinstance(pdf_file, (str, os.PathLike)):
+        with open(pdf_file, "rb") as f:
+            return f.read()
+    if hasattr(pdf_file, "getvalue"):
+        return pdf_file.getvalue()
+
+    # Generic file-like object: read from the start and restore the position
+    pos = pdf_file.tell()
+    pdf_file.seek(0)
+    data = pdf_file.read()
+    pdf_file.seek(pos)
+    return data
+
+
+def hash_pdf_bytes(pdf_bytes):
+    """Returns the SHA-256 hex digest of the PDF contents."""
+    return hashlib.sha256(pdf_bytes).hexdigest()
+
+
+def make_cache_key(pdf_hash, extraction_mode="plain"):
+    """
+    Builds the cache key for a PDF. The pypdf version is part of the key
+    because text extraction output changes between releases.
+    """
+    raw = f"{pdf_hash}|pypdf-{pypdf.__version__}|{extraction_mode}"
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def _entry_path(key):
+    return os.path.join(get_cache_dir("pages"), f"{key}.json.gz")
+
+
+def _bump(stat, amount=1):
+    with _stats_lock:
+        _stats[stat] += amount
+
+
+def load_pages(key):
+    """
+    Returns the cached list of page texts for the key, or None on a miss.
+    Entries written by a lazy run hold None for pages not yet extracted.
+    """
+    path = _entry_path(key)
+    try:
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            pages = json.load(f)
+    except (OSError, ValueError):
+        _bump("misses")
+        return None
+
+    # Touch the file so eviction treats it as recently used
+    try:
+        os.utime(path, None)
+    except OSError:
+        pass
+
+    _bump("hits")
+    return pages
+
+
+def save_pages(key, pages):
+    """
+    Writes the list of page texts to the cache and evicts old entries if the
+    cache has grown past its size limit.
+    """
+    path = _entry_path(key)
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        with gzip.open(tmp_path, "wt", encoding="utf-8") as f:
+            json.dump(pages, f)
+        # Atomic rename so concurrent readers never see a partial file
+        os.replace(tmp_path, path)
+        _bump("writes")
+    except OSError as e:
+        print(f"Warning: Could not write page cache entry: {e}")
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        return
+
+    evict()
+
+
+def _map_path(key):
+    return os.path.join(get_cache_dir("pages"), f"{key}.map.json")
+
+
+def load_page_map(key):
+    """
+    Returns the cached printed page -> PDF index map for the key, or None.
+    """
+    try:
+        with open(_map_path(key), "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return None
+    # JSON object keys are strings; restore the integer page numbers
+    return {
+        "printed_to_index": {int(k): v for k, v in data["printed_to_index"].items()},
+        "missing": data["missing"],
+        "scanned": data.get("scanned"),
+    }
+
+
+def save_page_map(key, page_map):
+    """Writes the page map next to the page text entry for the same PDF."""
+    path = _map_path(key)
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(page_map, f)
+        os.replace(tmp_path, path)
+    except OSError as e:
+        print(f"Warning: Could not write page map: {e}")
+
+
+def evict(max_mb=None):
+    """
+    Removes least recently used entries until the cache fits within max_mb.
+    Returns the number of entries removed.
+    """
+    if max_mb is None:
+        max_mb = float(os.getenv(PAGE_CACHE_MAX_MB_ENV, DEFAULT_PAGE_CACHE_MAX_MB))
+    max_bytes = max_mb * 1024 * 1024
+
+    cache_dir = get_cache_dir("pages")
+    entries = []
+    total = 0
+    for name in os.listdir(cache_dir):
+        if not name.endswith(".json.gz"):
+            continue
+        path = os.path.join(cache_dir, name)
+        try:
+            st = os.stat(path)
+        except OSError:
+            continue
+        entries.append((st.st_mtime, st.st_size, path))
+        total += st.st_size
+
+    removed = 0
+    # Oldest access time first
+    for mtime, size, path in sorted(entries):
+        if total <= max_bytes:
+            break
+        try:
+            os.remove(path)
+            total -= size
+            removed += 1
+        except OSError:
+            continue
+        # Drop the page map stored alongside the evicted entry
+        try:
+            os.remove(path[:-len(".json.gz")] + ".map.json")
+        except OSError:
+            pass
+
+    if removed:
+        _bump("evictions", removed)
+    return removed
+
+
+def clear():
+    """Removes every entry from the page cache."""
+    cache_dir = get_cache_dir("pages")
+    for name in os.listdir(cache_dir):
+        try:
+            os.remove(os.path.join(cache_dir, name))
+        except OSError:
+            pass
+
+
+def get_stats():
+    """
+    Returns hit/miss counters for this process along with the current size
+    of the on-disk cache.
+    """
+    with _stats_lock:
+        stats = dict(_stats)
+
+    cache_dir = get_cache_dir("pages")
+    entries = 0
+    size = 0
+    for name in os.listdir(cache_dir):
+        if name.endswith(".json.gz"):
+            entries += 1
+            try:
+                size += os.path.getsize(os.path.join(cache_dir, name))
+            except OSError:
+                pass
+    stats["entries"] = entries
+    stats["size_mb"] = round(size / (1024 * 1024), 2)
+    return stats
+
+
+def reset_stats():
+    """Resets the in-process hit/miss counters."""
+    with _stats_lock:
+        for k in _stats:
+            _stats[k] = 0
@@ -0,0 +1,162 @@
+import re
+
+from utils import page_cache
+
+# Printed page number formats, tried in order
+PRINTED_PAGE_PATTERNS = [
+    # 2025-2026 Graduate: "131 | Page"
+    re.compile(r'(\d+)\s*\|\s*Page'),
+    # 2024-2025 Graduate header: "2024-2025 USF Graduate Catalog \n 137"
+    re.compile(r'\d{4}-\d{4} USF (?:Undergraduate|Graduate) Catalog\s+(\d+)', re.IGNORECASE),
+    # Undergraduate header (both years): "UNIVERSITY OF SOUTH FLORIDA 2025-2026 UNDERGRADUATE CATALOG \n51"
+    re.compile(r'UNIVERSITY OF SOUTH FLORIDA \d{4}-\d{4} (?:UNDERGRADUATE|GRADUATE) CATALOG\s+(\d+)', re.IGNORECASE),
+]
+
+# How many pages either side of the naive index to check when probing
+PROBE_RADIUS = 2
+
+
+def find_printed_page(page_text):
+    """
+    Returns the printed page number found in the page's header/footer,
+    or None if the page has no recognizable page number.
+    """
+    if not page_text:
+        return None
+    for pattern in PRINTED_PAGE_PATTERNS:
+        match = pattern.search(page_text)
+        if match:
+            return int(match.group(1))
+    return None
+
+
+def build_page_map(pages, start_idx=0, end_idx=None):
+    """
+    Scans the pages in [start_idx, end_idx) once (every page by default)
+    and builds the printed page -> PDF index map.
+
+    Returns a dict with:
+    - printed_to_index: {printed page: 0-based PDF index}
+    - missing: PDF indices where no printed page number was found
+    - scanned: the [start, end) range of PDF indices that were scanned
+    """
+    if end_idx is None or end_idx > len(pages):
+        end_idx = len(pages)
+    start_idx = max(0, start_idx)
+    printed_to_index = {}
+    missing = []
+    for idx in range(start_idx, end_idx):
+        printed = find_printed_page(pages[idx])
+        if printed is None:
+            missing.append(idx)
+        elif printed not in printed_to_index:
+            # First occurrence wins (later matches are usually cross-references)
+            printed_to_index[printed] = idx
+    return {"printed_to_index": printed_to_index, "missing": missing, "scanned": [start_idx, end_idx]}
+
+
+def _covers(page_map, pages, index_range):
+    scanned = page_map.get("scanned")
+    if scanned is None:
+        # Maps saved before ranges were recorded always cover the whole PDF
+        return True
+    start_idx, end_idx = index_range or (0, len(pages))
+    return scanned[0] <= start_idx and end_idx <= scanned[1]
+
+
+def get_page_map(pages, cache_key=None, build=True, index_range=None):
+    """
+    Returns the page map for a PDF, loading it from the page cache when the
+    saved map covers index_range ([start, end) PDF indices; the whole PDF
+    when None). Otherwise the map is built over index_range plus the range
+    the saved map covered, and saved. If build is False and nothing is
+    cached, returns None.
+    """
+    cached = page_cache.load_page_map(cache_key) if cache_key else None
+    if cached is not None and (not build or _covers(cached, pages, index_range)):
+        return cached
+
+    if not build:
+        return None
+
+    start_idx, end_idx = index_range or (0, len(pages))
+    if cached is not None and cached["scanned"][0] < cached["scanned"][1]:
+        start_idx, end_idx = min(start_idx, cached["scanned"][0]), max(end_idx, cached["scanned"][1])
+    page_map = build_page_map(pages, start_idx, end_idx)
+    if page_map["missing"]:
+        print(f"Page map: no printed page number found on {len(page_map['missing'])} of {end_idx - start_idx} pages.")
+    if cached is not None:
+        # Keep pages found by probing outside the scanned range
+        for printed, idx in cached["printed_to_index"].items():
+            page_map["printed_to_index"].setdefault(printed, idx)
+    if cache_key:
+        page_cache.save_page_map(cache_key, page_map)
+    return page_map
+
+
+def get_probed_page_map(pages, printed_pages, cache_key=None):
+    """
+    Returns a page map holding the given printed pages, found by probing
+    near each page's expected index (probe_page_index) instead of scanning
+    the PDF, so a lazy page store only extracts the pages around them.
+    Pages are merged into the saved map, so later runs only probe pages
+    they have not seen. Only indices whose page shows the printed number
+    are recorded; the rest are left to resolve_page_index's fallback.
+    """
+    page_map = page_cache.load_page_map(cache_key) if cache_key else None
+    if page_map is None:
+        page_map = {"printed_to_index": {}, "missing": [], "scanned": [0, 0]}
+    printed_to_index = page_map["printed_to_index"]
+
+    added = False
+    for printed_page in sorted(set(printed_pages) - set(printed_to_index)):
+        idx = probe_page_index(pages, printed_page)
+        if 0 <= idx < len(pages) and find_printed_page(pages[idx]) == printed_page:
+            printed_to_index[printed_page] = idx
+            added = True
+
+    if added and cache_key:
+        page_cache.save_page_map(cache_key, page_map)
+    return page_map
+
+
+def resolve_page_index(page_map, printed_page):
+    """
+    O(1) lookup of the PDF index for a printed page number.
+    If the printed page itself had no number, the offset of the nearest
+    numbered page before it is used. Returns None if it cannot be resolved.
+    """
+    if not page_map:
+        return None
+    printed_to_index = page_map["printed_to_index"]
+
+    if printed_page in printed_to_index:
+        return printed_to_index[printed_page]
+
+    # Nearest numbered page before the target (front matter offsets can
+    # change partway through the book, so use the local offset)
+    for delta in range(1, PROBE_RADIUS + 1):
+        prev = printed_page - delta
+        if prev in printed_to_index:
+            return printed_to_index[prev] + delta
+    return None
+
+
+def probe_page_index(pages, printed_page):
+    """
+    Finds the PDF index for a printed page without a full page map by
+    reading the printed number on the naive page (printed page - 1) and
+    shifting by the difference. Only touches a couple of pages, which keeps
+    lazy page stores lazy.
+    """
+    naive_idx = max(0, printed_page - 1)
+    if naive_idx >= len(pages):
+        return min(naive_idx, len(pages) - 1)
+
+    found_printed_page = find_printed_page(pages[naive_idx])
+    if found_printed_page is None:
+        return naive_idx
+
+    # e.g. naive index 152 shows printed page 131, target 153 -> shift 22
+    shift = printed_page - found_printed_page
+    return naive_idx + shift
@@ -0,0 +1,102 @@
+import io
+import threading
+
+from pypdf import PdfReader
+
+from utils import page_cache
+
+
+class LazyPageStore:
+    """
+    List-like view over the pages of a PDF that extracts each page's text the
+    first time it is indexed and memoizes it.
+
+    Supports len(), integer indexing and slicing, so it can be passed anywhere
+    the list returned by llm_parser.extract_all_pages is expected. Safe to
+    share between worker threads.
+    """
+
+    def __init__(self, pdf_file, use_cache=True):
+        self._pdf_bytes = page_cache.read_pdf_bytes(pdf_file)
+        self.pdf_hash = page_cache.hash_pdf_bytes(self._pdf_bytes)
+        self.cache_key = page_cache.make_cache_key(self.pdf_hash)
+        self._use_cache = use_cache
+        self._lock = threading.Lock()
+        self._reader = None
+
+        cached = page_cache.load_pages(self.cache_key) if use_cache else None
+        if cached is not None and all(p is not None for p in cached):
+            # Full extraction already on disk: nothing left to do lazily
+            self._pages = list(cached)
+        else:
+            self._reader = PdfReader(io.BytesIO(self._pdf_bytes))
+            self._pages = [None] * len(self._reader.pages)
+            if cached is not None and len(cached) == len(self._pages):
+                # Pages extracted by an earlier lazy run; the gaps are
+                # extracted on first access as usual
+                self._pages = list(cached)
+        self._saved_count = self.extracted_count
+
+    def __len__(self):
+        return len(self._pages)
+
+    def __bool__(self):
+        return len(self._pages) > 0
+
+    def __iter__(self):
+        for i in range(len(self._pages)):
+            yield self[i]
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self._get_page(i) for i in range(*index.indices(len(self._pages)))]
+        if index < 0:
+            index += len(self._pages)
+        if not 0 <= index < len(self._pages):
+            raise IndexError("page index out of range")
+        return self._get_page(index)
+
+    def _get_page(self, index):
+        text = self._pages[index]
+        if text is not None:
+            return text
+
+        # pypdf readers are not thread-safe, so extraction is serialized.
+        # Re-check inside the lock in case another thread got here first.
+        with self._lock:
+            text = self._pages[index]
+            if text is None:
+                text = self._reader.pages[index].extract_text()
+                self._pages[index] = text
+        return text
+
+    @property
+    def extracted_count(self):
+        """Number of pages whose text has been extracted so far."""
+        return sum(1 for p in self._pages if p is not None)
+
+    @property
+    def is_complete(self):
+        return all(p is not None for p in self._pages)
+
+    def prefetch(self, indices):
+        """Extracts the given page indices ahead of time."""
+        for i in indices:
+            if 0 <= i < len(self._pages):
+                self._get_page(i)
+
+    def save_to_cache(self):
+        """
+        Writes the pages extracted so far to the shared page cache. Pages
+        not yet extracted are stored as gaps (None) and merged with any
+        pages another run saved for the same PDF in the meantime.
+        """
+        if not self._use_cache or self._reader is None or self.extracted_count <= self._saved_count:
+            return
+        with self._lock:
+            pages = list(self._pages)
+        on_disk = page_cache.load_pages(self.cache_key)
+        if on_disk is not None and len(on_disk) == len(pages):
+            pages = [p if p is not None else other for p, other in zip(pages, on_disk)]
+        page_cache.save_pages(self.cache_key, pages)
+        self._saved_count = sum(1 for p in pages if p is not None)
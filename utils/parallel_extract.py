@@ -0,0 +1,95 @@
+import concurrent.futures
+import os
+import tempfile
+
+from pypdf import PdfReader
+
+# Number of worker processes used when a caller does not specify one.
+# 1 keeps the original serial behaviour.
+EXTRACT_WORKERS_ENV = "OVS_EXTRACT_WORKERS"
+
+# Below this many pages the process start-up cost outweighs the speed-up
+MIN_PAGES_FOR_PARALLEL = 20
+
+
+def get_default_workers():
+    """Returns the worker count configured through OVS_EXTRACT_WORKERS."""
+    try:
+        return max(1, int(os.getenv(EXTRACT_WORKERS_ENV, "1")))
+    except ValueError:
+        return 1
+
+
+def _extract_chunk(pdf_path, start_idx, end_idx):
+    """
+    Worker entry point. Opens its own reader on the shared temp file and
+    extracts pages [start_idx, end_idx).
+    """
+    reader = PdfReader(pdf_path)
+    return start_idx, [reader.pages[i].extract_text() for i in range(start_idx, end_idx)]
+
+
+def split_range(start_idx, end_idx, num_chunks):
+    """
+    Splits [start_idx, end_idx) into at most num_chunks contiguous ranges of
+    near-equal size.
+    """
+    total = end_idx - start_idx
+    if total <= 0:
+        return []
+    num_chunks = max(1, min(num_chunks, total))
+    base, extra = divmod(total, num_chunks)
+
+    ranges = []
+    current = start_idx
+    for i in range(num_chunks):
+        size = base + (1 if i < extra else 0)
+        ranges.append((current, current + size))
+        current += size
+    return ranges
+
+
+def extract_pages_parallel(pdf_bytes, start_idx=0, end_idx=None, workers=None):
+    """
+    Extracts the text of pages [start_idx, end_idx) using a process pool.
+    Returns a list of strings in page order, identical to the serial path.
+    """
+    if workers is None:
+        workers = get_default_workers()
+
+    # Write the PDF once so every worker can open its own reader on it
+    with tempfile.NamedTemporaryFile(suffix=".pdf", delete=False) as tmp:
+        tmp.write(pdf_bytes)
+        pdf_path = tmp.name
+
+    try:
+        total_pages = len(PdfReader(pdf_path).pages)
+        if end_idx is None or end_idx > total_pages:
+            end_idx = total_pages
+        start_idx = max(0, start_idx)
+
+        num_pages = end_idx - start_idx
+        if workers <= 1 or num_pages < MIN_PAGES_FOR_PARALLEL:
+            return _extract_chunk(pdf_path, start_idx, end_idx)[1]
+
+        # Several chunks per worker so a slow chunk (dense tables) doesn't
+        # leave the other processes idle at the end
+        ranges = split_range(start_idx, end_idx, workers * 4)
+
+        chunks = {}
+        with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = [executor.submit(_extract_chunk, pdf_path, s, e) for s, e in ranges]
+            for future in concurrent.futures.as_completed(futures):
+                chunk_start, texts = future.result()
+                chunks[chunk_start] = texts
+
+        # Reassemble in page order
+        pages_text = []
+        for s, _ in ranges:
+            pages_text.extend(chunks[s])
+        return pages_text
+    finally:
+        try:
+            os.remove(pdf_path)
+        except OSError:
+            pass
@@ -0,0 +1,78 @@
+import hashlib
+import json
+import os
+import threading
+
+from utils import page_cache
+
+
+def make_run_key(toc_bytes, pdf_hashes, academic_year, model_choice, settings=None):
+    """
+    Returns the key of a Catalog Report run: a hash of the ToC file, the
+    catalog PDF hashes, the academic year, the model and any other settings
+    that change the results.
+    """
+    raw = json.dumps({
+        "toc": hashlib.sha256(toc_bytes or b"").hexdigest(),
+        "pdfs": list(pdf_hashes),
+        "academic_year": academic_year,
+        "model": model_choice,
+        "settings": settings or {},
+    }, sort_keys=True, default=str)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def make_row_key(catalog_name, program_name, page_number):
+    """Identifies one ToC program within a run."""
+    return f"{catalog_name}|{program_name}|{int(page_number)}"
+
+
+class RunJournal:
+    """
+    Append-only JSONL journal of finished programs for one run. Every
+    result is flushed and fsynced as it is written, so a crash or rerun
+    loses at most the line being written.
+    """
+
+    def __init__(self, run_key):
+        self.run_key = run_key
+        self.path = os.path.join(page_cache.get_cache_dir("journals"), f"{run_key}.jsonl")
+        self._lock = threading.Lock()
+
+    def load(self):
+        """Returns {row key: report row} for every program already finished."""
+        done = {}
+        if not os.path.exists(self.path):
+            return done
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    continue  # a line cut off by a crash
+                done[entry["key"]] = entry["row"]
+        return done
+
+    def append(self, row):
+        """Records a finished report row."""
+        key = make_row_key(row["Catalog Name"], row["Program Name"], row["Page Number"])
+        line = json.dumps({"key": key, "row": row}, default=str)
+        with self._lock:
+            # Start on a fresh line if a crash left the last one unfinished
+            if os.path.exists(self.path) and os.path.getsize(self.path) > 0:
+                with open(self.path, "rb") as f:
+                    f.seek(-1, os.SEEK_END)
+                    if f.read(1) != b"\n":
+                        line = "\n" + line
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(line + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+
+    def clear(self):
+        with self._lock:
+            if os.path.exists(self.path):
+                os.remove(self.path)
+
+    def __len__(self):
+        return len(self.load())
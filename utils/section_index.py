@@ -0,0 +1,105 @@
+import re
+
+# Upper bound on how many pages a single program section may span. Matches
+# the old growing-window limit in the Catalog Report.
+MAX_SECTION_PAGES = 4
+
+# How many pages after the ToC page to look for a program's heading
+HEADING_SEARCH_PAGES = 2
+
+
+def _heading_pattern(program_name):
+    """
+    Builds a regex that matches the program heading as it appears in the
+    extracted text, where pypdf may wrap the line or drop spaces, and can
+    even split words ("A rtificial Intelligence, M .S .A .I.").
+    """
+    chars = [c for c in program_name if not c.isspace()]
+    if not chars:
+        return None
+    return re.compile(r"\s*".join(re.escape(c) for c in chars), re.IGNORECASE)
+
+
+def find_heading(page_text, program_name):
+    """
+    Returns the character offset where the program heading starts on the
+    page, or None if it does not appear. Matches at the start of a line are
+    preferred over mentions inside a paragraph.
+    """
+    pattern = _heading_pattern(program_name)
+    if pattern is None or not page_text:
+        return None
+
+    first = None
+    for match in pattern.finditer(page_text):
+        line_start = page_text.rfind("\n", 0, match.start()) + 1
+        if not page_text[line_start:match.start()].strip():
+            return match.start()
+        if first is None:
+            first = match.start()
+    return first
+
+
+def locate_program(pages, program_name, start_idx):
+    """
+    Finds the heading for a program at or just after its resolved page.
+    Returns (page index, character offset), or None when the heading
+    cannot be found.
+    """
+    last_idx = min(len(pages), start_idx + HEADING_SEARCH_PAGES)
+    for idx in range(start_idx, last_idx):
+        offset = find_heading(pages[idx], program_name)
+        if offset is not None:
+            return idx, offset
+    return None
+
+
+def build_section_index(entries, pages, max_pages=MAX_SECTION_PAGES):
+    """
+    Splits the catalog text into one section per program, using the ToC
+    entries as anchors. Each section runs from the program's heading up to
+    the heading of the next program (or at most max_pages pages).
+
+    entries: list of dicts with "key", "program" and "start_idx" (the
+    resolved 0-based PDF index of the program's page).
+    Returns {key: section text}. Programs whose heading cannot be found
+    are left out, so callers fall back to reading whole pages for them.
+    """
+    if not pages:
+        return {}
+
+    positions = []
+    for entry in entries:
+        start_idx = max(0, min(entry["start_idx"], len(pages) - 1))
+        located = locate_program(pages, entry["program"], start_idx)
+        if located is not None:
+            positions.append((*located, entry["key"]))
+
+    positions.sort()
+    sections = {}
+    for i, (idx, offset, key) in enumerate(positions):
+        limit_idx = min(len(pages), idx + max_pages)
+        end_idx, end_offset = limit_idx, 0
+
+        # Next program that starts strictly after this one. Entries sharing a
+        # heading position (e.g. a degree and its concentration) are skipped.
+        for next_idx, next_offset, _ in positions[i + 1:]:
+            if (next_idx, next_offset) > (idx, offset):
+                if next_idx < limit_idx:
+                    end_idx, end_offset = next_idx, next_offset
+                break
+
+        sections[key] = _slice_pages(pages, idx, offset, end_idx, end_offset)
+    return sections
+
+
+def _slice_pages(pages, start_idx, start_offset, end_idx, end_offset):
+    """Returns the text from (start_idx, start_offset) up to (end_idx, end_offset)."""
+    if start_idx == end_idx:
+        return pages[start_idx][start_offset:end_offset]
+
+    parts = [pages[start_idx][start_offset:]]
+    parts.extend(pages[start_idx + 1:end_idx])
+    if end_idx < len(pages) and end_offset:
+        parts.append(pages[end_idx][:end_offset])
+    return "".join(parts)
@@ -0,0 +1,142 @@
+import re
+
+# Running headers and footers that pypdf leaves between (or glued onto) ToC lines
+_HEADER_PATTERNS = [
+    re.compile(r"\d{4}-\d{4}\s+USF\s+UNDERGRADUATE.*$"),
+    re.compile(r"\d{4}-\d{4}\s+USF\s+Graduate\s+Catalog.*$"),
+    re.compile(r"UNIVERSITY OF SOUTH FLORIDA\s+\d{4}-\d{4}\s+UNDERGRADUATE\s+CATALOG.*$"),
+]
+_FOOTER_LINE = re.compile(r"^(?:CATALOG|[ivxlcdm]+(?:\s*\|\s*Page)?|\d+)$", re.IGNORECASE)
+
+# "Program Name ........ 123" (leaders may be broken up by spaces, and a
+# few entries have no leaders at all: "Program Name   696")
+_ENTRY_LINE = re.compile(r"^(?P<name>.*?)(?P<gap>\s*)(?:\.{2,}[\s.]*|(?<=\S)\s+)(?P<page>\d{1,4})$")
+
+# "B.S.E.V ." - pypdf sometimes puts a space before an abbreviation's last dot
+_SPACED_DOT = re.compile(r"(?<=[A-Z])\s+\.(?=\s|$)")
+_LOOSE_DOT = re.compile(r"\s+\.$")
+
+# A degree abbreviation: "B.S.", "M.S.A.I.", "Ph.D.", "M.Arch.", "D.B.A"
+_ABBREVIATION = r"(?:[A-Z][A-Za-z]{0,5}\.)+[A-Za-z]{0,5}\.?"
+
+_EXPLORATORY = re.compile(r"^Exploratory Curriculum:")
+_CONCENTRATION = re.compile(rf"^(?P<program>.+?),?\s+(?P<credential>{_ABBREVIATION},?\s+with\s+.+\s+Concentration)$")
+_MINOR = re.compile(r"^(?P<program>.+?)\s+(?P<credential>Minor)(?:\s+(?:for\b|-|\().*)?$")
+_CERTIFICATE = re.compile(r"^(?P<program>.+?)\s+(?P<credential>(?:Graduate\s+)?Certi(?:fi|ﬁ)cate)$")
+
+# Graduate certificate codes: "Smart City Technology Graduate Certificate (XSCT)"
+_CERTIFICATE_CODE = re.compile(r"(Certi(?:fi|ﬁ)cate)\s*\([A-Z]{2,6}\)$")
+_DEGREE = re.compile(rf"^(?P<program>.+?),?\s+(?P<credential>{_ABBREVIATION})$")
+
+# Entries that are never programs
+_SECTION_HEADING = re.compile(r"^(?:College|Department|School|Office|Division|Center)\s+of\b")
+_CREDENTIAL_FIRST = re.compile(rf"^{_ABBREVIATION}\s+(?:in\s+)?\S")
+_EMBEDDED_CREDENTIAL = re.compile(r"(?:^|\s)(?:[A-Z][A-Za-z]{0,5}\.){2,}")
+HEADER_KEYWORDS = ["Catalog", "University", "South Florida", "USF Graduate", "USF Undergraduate"]
+
+# Wording that suggests a program even though no rule matched
+_CREDENTIAL_HINT = re.compile(r"\bMinor\b|\bCerti(?:fi|ﬁ)cate\b|\bConcentration\b|\bPathway\b|(?:[A-Z][A-Za-z]{0,5}\.){2,}")
+
+# Graduate 2024-2025 ToC lists programs from this entry on
+GR_2425_START = "Accountancy and Analytics"
+
+# How many physical lines a wrapped entry may span before its page number
+MAX_WRAPPED_LINES = 3
+
+
+def _strip_headers(line):
+    for pattern in _HEADER_PATTERNS:
+        line = pattern.sub("", line)
+    return line.strip()
+
+
+def split_entries(text):
+    """
+    Splits ToC text into (entry text, page number) pairs. Joins names that
+    wrap onto following lines and page numbers that sit on their own
+    leader line, and drops running headers and footers.
+    """
+    entries = []
+    pending = []
+    for raw in text.split("\n"):
+        had_header = any(p.search(raw) for p in _HEADER_PATTERNS)
+        line = _SPACED_DOT.sub(".", " ".join(_strip_headers(raw).split()))
+        if not line or (_FOOTER_LINE.match(line) and (had_header or not pending)):
+            continue
+
+        match = _ENTRY_LINE.match(line)
+        if match is None:
+            pending = (pending + [line])[-MAX_WRAPPED_LINES:]
+            continue
+
+        # A lone dot before the leaders ("... Concentration . ....") is not part of the name
+        name = _LOOSE_DOT.sub("", match.group("name").strip())
+        # "Public Administration, M.P.A....." - the abbreviation's final dot
+        # runs straight into the leaders
+        if name and not match.group("gap") and "." in name.split()[-1] and not name.endswith("."):
+            name += "."
+        if pending:
+            name = " ".join(pending + ([name] if name else []))
+            pending = []
+        if name:
+            entries.append((_CERTIFICATE_CODE.sub(r"\1", name), int(match.group("page"))))
+    return entries
+
+
+def classify_entry(name):
+    """
+    Decides whether a ToC entry is a program. Returns
+    ("program", program_name, credential), ("skip", None, None) or
+    ("ambiguous", None, None) when only an LLM can tell.
+    """
+    if any(kw in name for kw in HEADER_KEYWORDS) or _CREDENTIAL_FIRST.match(name) or _SECTION_HEADING.match(name):
+        return "skip", None, None
+
+    if _EXPLORATORY.match(name):
+        return "program", name, "N/A"
+
+    for pattern in (_CONCENTRATION, _MINOR, _CERTIFICATE, _DEGREE):
+        match = pattern.match(name)
+        if match:
+            program = match.group("program").rstrip(",").strip()
+            # Concurrent degrees ("Anthropology, M.A. and Public Health, M.P.H.")
+            if _EMBEDDED_CREDENTIAL.search(program):
+                return "skip", None, None
+            # Section headings such as "Other Information - Departmental Minor"
+            if " - " in program:
+                return "ambiguous", None, None
+            return "program", program, match.group("credential")
+
+    if _CREDENTIAL_HINT.search(name):
+        return "ambiguous", None, None
+    return "skip", None, None
+
+
+def parse_toc_text(text, catalog_name, academic_year="2025-2026"):
+    """
+    Rule-based ToC parser. Returns (programs, ambiguous) where programs are
+    dicts in the parse_catalog_toc format and ambiguous is a list of
+    (entry text, page number) pairs the rules could not decide.
+    """
+    entries = split_entries(text)
+
+    if "Graduate" in catalog_name and "2024-2025" in academic_year:
+        starts = [i for i, (name, _) in enumerate(entries) if name.startswith(GR_2425_START)]
+        if starts:
+            entries = entries[starts[0]:]
+
+    programs = []
+    ambiguous = []
+    for name, page in entries:
+        kind, program_name, credential = classify_entry(name)
+        if kind == "program":
+            programs.append({
+                "original_text": name,
+                "program_name": program_name,
+                "credential": credential,
+                "page_number": page,
+                "catalog_name": catalog_name
+            })
+        elif kind == "ambiguous":
+            ambiguous.append((name, page))
+    return programs, ambiguous